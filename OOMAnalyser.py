@@ -230,6 +230,12 @@ class OOMAllocationFailureReason:
     FAILED_UNKNOWN_REASON = "ALLOCATION_FAILED_UNKNOWN_REASON"
     """Failed, but the reason is unknown"""
 
+    WOULD_SUCCEED = "ALLOCATION_WOULD_SUCCEED"
+    """Watermarks are met and a suitable chunk is free
+
+    @see: AllocationFeasibility
+    """
+
     SKIPPED_HIGH_ORDER_DONT_TRIGGER_OOM = (
         "ALLOCATION_SKIPPED_HIGH_ORDER_DONT_TRIGGER_OOM"
     )
@@ -349,6 +355,67 @@ def add_to_notifybox(prefix: str, msg: str) -> None:
     console.log("{}: {}".format(prefix, msg))
 
 
+def nlargest(k: int, items: List[Any], key: Callable[[Any], int]) -> List[Any]:
+    """
+    Return the k largest items sorted descending by their key
+
+    A bounded min-heap keeps the k largest items seen so far. Therefore, only
+    k items are sorted instead of the whole list. Items with identical keys
+    keep their original order.
+
+    The heap is implemented here, because Transcrypt doesn't provide heapq.
+
+    @param k: Number of items to return
+    @param items: Items to choose from
+    @param key: Function to return the sort key of an item
+    """
+    # heap entries are [key, position, item], heap[0] is the smallest entry
+    heap = []
+
+    def smaller(a: List[Any], b: List[Any]) -> bool:
+        if a[0] != b[0]:
+            return a[0] < b[0]
+        # a later item is smaller to keep the original order of identical keys
+        return a[1] > b[1]
+
+    def sift_down(pos: int) -> None:
+        while True:
+            child = 2 * pos + 1
+            if child >= len(heap):
+                return
+            if child + 1 < len(heap) and smaller(heap[child + 1], heap[child]):
+                child += 1
+            if not smaller(heap[child], heap[pos]):
+                return
+            heap[pos], heap[child] = heap[child], heap[pos]
+            pos = child
+
+    for position in range(len(items)):
+        entry = [key(items[position]), position, items[position]]
+        if len(heap) < k:
+            heap.append(entry)
+            pos = len(heap) - 1
+            while pos > 0:
+                parent = int((pos - 1) / 2)
+                if not smaller(heap[pos], heap[parent]):
+                    break
+                heap[pos], heap[parent] = heap[parent], heap[pos]
+                pos = parent
+        elif k > 0 and smaller(heap[0], entry):
+            heap[0] = entry
+            sift_down(0)
+
+    # pop the smallest entries and fill the result from the end
+    result = [None for _ in range(len(heap))]
+    for pos in range(len(result) - 1, -1, -1):
+        result[pos] = heap[0][2]
+        last = heap.pop()
+        if len(heap):
+            heap[0] = last
+            sift_down(0)
+    return result
+
+
 class KernelRelease:
     """Index constants for the release tuple (major, minor, suffix)"""
 
@@ -649,7 +716,9 @@ class BaseKernelConfig:
     a value of 11 means that the largest free memory block is 2^10 pages.
 
     The value will be calculated dynamically based on the numbers of
-    orders in OOMAnalyser._extract_buddyinfo().
+    orders in OOMAnalyser._extract_buddyinfo(). The default value of a
+    kernel release is extracted by extract_kernel_details.py, but the
+    architecture can change it with CONFIG_ARCH_FORCE_MAX_ORDER.
 
     @see: OOMAnalyser._extract_buddyinfo().
     """
@@ -673,6 +742,19 @@ class BaseKernelConfig:
     Requests with order > PAGE_ALLOC_COSTLY_ORDER will never trigger the OOM-killer to satisfy the request.
     """
 
+    OOM_SCORE_ADJ_MIN = -1000
+    """Processes with this oom_score_adj are never killed by the OOM killer"""
+
+    oom_badness_root_bonus = True
+    """
+    Reduce the badness score of root processes by 3%
+
+    The kernel grants the bonus to processes with CAP_SYS_ADMIN. The process
+    table doesn't show capabilities, therefore, UID 0 is used instead.
+
+    Source: mm/oom_kill.c:oom_badness()
+    """
+
     PLATFORM_DESCRIPTION = (
         ("aarch64", "ARM 64-bit"),
         ("amd64", "x86 64-bit"),
@@ -712,6 +794,24 @@ class BaseKernelConfig:
     @type: str
     """
 
+    unreclaimable_slab_start = "Unreclaimable slab info:"
+    """
+    Pattern to find the start of the table of unreclaimable slab caches
+
+    Source: mm/slab_common.c:dump_unreclaimable_slab()
+
+    @type: str
+    """
+
+    REC_UNRECLAIMABLE_SLAB_LINE = re.compile(
+        r"^(?P<name>\S.*?)\s+(?P<used_kb>\d+)KB\s+(?P<total_kb>\d+)KB\s*$"
+    )
+    """
+    RE to match a single slab cache in the table of unreclaimable slab caches
+
+    Source: mm/slab_common.c:dump_unreclaimable_slab()
+    """
+
     release = (3, 10, "")
     """
     Kernel release with this configuration
@@ -742,6 +842,50 @@ class BaseKernelConfig:
     REC_CGROUP_V1 = re.compile(r"^memory\+swap: usage", re.MULTILINE)
     """RE to match if the cgroup is a v1 cgroup"""
 
+    cgroup_memory_stat_start = "Memory cgroup stats for"
+    """
+    Pattern to find the start of the cgroup memory.stat block
+
+    @type: str
+    """
+
+    REC_CGROUP_MEMORY_STAT_LINE = re.compile(
+        r"^\s*(?P<key>[a-z][a-z0-9_]*) (?P<value>\d+)$"
+    )
+    """
+    RE to match a single "key value" line of the cgroup memory.stat block
+
+    4.5 mm: memcontrol: basic memory statistics in cgroup2 memory controller (587d9f726aaec52157e4156e50363dbe6cb82bdb)
+    5.3 mm: memcontrol: dump memory.stat during cgroup OOM (c8713d0b23123759c9d86b0421243c2c309505d7)
+    """
+
+    REC_CGROUP_MEMORY_STAT_V1_ITEM = re.compile(
+        r"^(?P<key>[a-z][a-z0-9_]*):(?P<value>\d+)KB$"
+    )
+    """
+    RE to match a single "key:valueKB" item of the cgroup v1 memory.stat line
+
+    Before 5.3, all values of a cgroup are printed in a single line after
+    "Memory cgroup stats for <path>:".
+
+    3.9 memcg, oom: provide more precise dump info while memcg oom happening (58cf188ed649b6570dfdc9c62156cdf396c2e395)
+    """
+
+    cgroup_memory_stat_v1_keys = {"cache": "file", "rss": "anon"}
+    """
+    cgroup v1 memory.stat keys and the names of the matching cgroup v2 keys
+
+    @type: Dict(str, str)
+    """
+
+    cgroup_memory_stat_mandatory = []
+    """
+    Keys that have to be part of the cgroup memory.stat block
+
+    @type: List(str)
+    @see: OOMAnalyser._extract_cgroup_memory_stat()
+    """
+
     REC_PAGE_SIZE = re.compile(
         r"Node \d+ (?:DMA|DMA32|Normal): \d+\*(?P<page_size>\d+)kB"
     )
@@ -768,7 +912,7 @@ class BaseKernelConfig:
 
     ZONE_TYPES = ["DMA", "DMA32", "Normal", "HighMem", "Movable"]
     """
-    List of memory zones
+    List of memory zones in the order of enum zone_type in include/linux/mmzone.h
 
     @type: List(str)
     """
@@ -796,9 +940,14 @@ class BaseKernelConfig:
     def _gfp_calc_all_values(self):
         """
         Calculate decimal values for all GFP flags and store in in GFP_FLAGS[<flag>]["_value"]
+
+        Flags extracted with extract_kernel_details.py contain already evaluated
+        values. They are kept as they are.
         """
         # __pragma__ ('jsiter')
         for flag in self.GFP_FLAGS:
+            if "_value" in self.GFP_FLAGS[flag]:
+                continue
             value = self._gfp_flag2decimal(flag)
             self.GFP_FLAGS[flag]["_value"] = value
         # __pragma__ ('nojsiter')
@@ -809,11 +958,16 @@ class BaseKernelConfig:
 
         The flags can be concatenated with "|" or "~" and negated with "~". The
         flags will be processed from left to right. Parentheses are not supported.
+        Already evaluated values from GFP_FLAGS[<flag>]["_value"] are returned
+        unchanged.
         """
         if flag not in self.GFP_FLAGS:
             error("Missing definition for flag {}".format(flag))
             return 0
 
+        if "_value" in self.GFP_FLAGS[flag]:
+            return self.GFP_FLAGS[flag]["_value"]
+
         value = self.GFP_FLAGS[flag]["value"]
         if isinstance(value, int):
             return value
@@ -1437,6 +1591,9 @@ class KernelConfig_4_5(KernelConfig_4_4):
     name = "Configuration for Linux kernel 4.5 or later"
     release = (4, 5, "")
 
+    # 4.5 mm: memcontrol: basic memory statistics in cgroup2 memory controller (587d9f726aaec52157e4156e50363dbe6cb82bdb)
+    cgroup_memory_stat_mandatory = ["anon", "file"]
+
     # NOTE: These flags are automatically extracted from the gfp.h file.
     #       Please do not change them manually!
     GFP_FLAGS = {
@@ -1526,42 +1683,6 @@ class KernelConfig_4_5(KernelConfig_4_4):
             r"file-rss:(?P<killed_proc_file_rss_kb>\d+)kB, shmem-rss:(?P<killed_proc_shmem_rss_kb>\d+)kB",
             OOMPatternMatchRule.KERNEL_MANDATORY,
         ),
-        "cgroup oom: mem info block (check first two lines)": (
-            # first line (starting w/o a space)
-            # 4.5 mm: memcontrol: basic memory statistics in cgroup2 memory controller (587d9f726aaec52157e4156e50363dbe6cb82bdb)
-            r"^anon (?P<cgroup_memory_anon_bytes>\d+)\n"
-            # remaining lines (w/ leading space)
-            # 4.5 mm: memcontrol: basic memory statistics in cgroup2 memory controller (587d9f726aaec52157e4156e50363dbe6cb82bdb)
-            r"^\s+file (?P<cgroup_memory_file_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-        "cgroup oom: mem info block (basic memory stats 1)": (
-            # 4.5 mm: memcontrol: basic memory statistics in cgroup2 memory controller (587d9f726aaec52157e4156e50363dbe6cb82bdb)
-            r"^\s+file_mapped (?P<cgroup_memory_file_mapped_bytes>\d+)\n"
-            r"^\s+file_dirty (?P<cgroup_memory_file_dirty_bytes>\d+)\n"
-            r"^\s+file_writeback (?P<cgroup_memory_file_writeback_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-        "cgroup oom: mem info block (basic memory stats 2)": (
-            # 4.5 mm: memcontrol: basic memory statistics in cgroup2 memory controller (587d9f726aaec52157e4156e50363dbe6cb82bdb)
-            r"^\s+inactive_anon (?P<cgroup_memory_inactive_anon_bytes>\d+)\n"
-            r"^\s+active_anon (?P<cgroup_memory_active_anon_bytes>\d+)\n"
-            r"^\s+inactive_file (?P<cgroup_memory_inactive_file_bytes>\d+)\n"
-            r"^\s+active_file (?P<cgroup_memory_active_file_bytes>\d+)\n"
-            r"^\s+unevictable (?P<cgroup_memory_unevictable_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-        "cgroup oom: mem info block (page stats 1)": (
-            # 4.5 mm: memcontrol: basic memory statistics in cgroup2 memory controller (587d9f726aaec52157e4156e50363dbe6cb82bdb)
-            r"^\s+pgfault (?P<cgroup_memory_pgfault_bytes>\d+)\n"
-            r"^\s+pgmajfault (?P<cgroup_memory_pgmajfault_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-        "cgroup oom: mem info block (sock)": (
-            # 4.5 mm: memcontrol: add "sock" to cgroup2 memory.stat (b2807f07f4f87362925b8a5b8cbb7b624da10f03)
-            r"^\s+sock (?P<cgroup_memory_sock_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
     }
 
     def __init__(self):
@@ -1658,31 +1779,12 @@ class KernelConfig_4_6(KernelConfig_4_5):
         "___GFP_KSWAPD_RECLAIM": {"value": 0x2000000},
     }
 
-    EXTRACT_PATTERN_OVERLAY_46 = {
-        "cgroup oom: mem info block (kernel_stack)": (
-            # 4.6 mm: memcontrol: report kernel stack usage in cgroup2 memory.stat (12580e4b54ba8a1b22ec977c200be0174ca42348)
-            r"^\s+kernel_stack (?P<cgroup_memory_kernel_stack_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-        "cgroup oom: mem info block (slab)": (
-            # 4.6 mm: memcontrol: report slab usage in cgroup2 memory.stat (27ee57c93ff00b8a2d6c6dd6b0b3dddda7b43b77)
-            r"^\s+slab_reclaimable (?P<cgroup_memory_slab_reclaimable_bytes>\d+)\n"
-            r"^\s+slab_unreclaimable (?P<cgroup_memory_slab_unreclaimable_bytes>\d+)\n"
-            r"^\s+slab (?P<cgroup_memory_slab_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-    }
-
     # The "oom_reaper" line is optionally
     REC_OOM_END = re.compile(
         r"^((Out of memory.*|Memory cgroup out of memory): Killed process \d+|oom_reaper:)",
         re.MULTILINE,
     )
 
-    def __init__(self):
-        super().__init__()
-        self.EXTRACT_PATTERN.update(self.EXTRACT_PATTERN_OVERLAY_46)
-
 
 class KernelConfig_4_8(KernelConfig_4_6):
     # Supported changes:
@@ -1865,7 +1967,7 @@ class KernelConfig_4_10(KernelConfig_4_8):
 class KernelConfig_4_12(KernelConfig_4_10):
     # Supported changes:
     #  * update GFP flags
-    #  * add/update cgroup pattern
+    #  * new cgroup memory.stat keys (handled by the generic memory.stat tokenizer)
 
     name = "Configuration for Linux kernel 4.12 or later"
     release = (4, 12, "")
@@ -1952,30 +2054,11 @@ class KernelConfig_4_12(KernelConfig_4_10):
         "___GFP_NOLOCKDEP": {"value": 0x2000000},
     }
 
-    EXTRACT_PATTERN_OVERLAY_412 = {
-        "cgroup oom: mem info block (shmem)": (
-            # 4.12 mm: memcontrol: provide shmem statistics (9a4caf1e9fa4864ce21ba9584a2c336bfbc72740)
-            r"^\s+shmem (?P<cgroup_memory_shmem_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-        "cgroup oom: mem info block (workingset)": (
-            # 4.12  mm: vmscan: fix IO/refault regression in cache workingset transition (2a2e48854d704214dac7546e87ae0e4daa0e61a0)
-            r"^\s+workingset_refault (?P<cgroup_memory_workingset_refault_bytes>\d+)\n"
-            r"^\s+workingset_activate (?P<cgroup_memory_workingset_activate_bytes>\d+)\n"
-            r"^\s+workingset_nodereclaim (?P<cgroup_memory_workingset_nodereclaim_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-    }
-
-    def __init__(self):
-        super().__init__()
-        self.EXTRACT_PATTERN.update(self.EXTRACT_PATTERN_OVERLAY_412)
-
 
 class KernelConfig_4_13(KernelConfig_4_12):
     # Supported changes:
     #  * update GFP flags
-    #  * add/update cgroup pattern
+    #  * new cgroup memory.stat keys (handled by the generic memory.stat tokenizer)
 
     name = "Configuration for Linux kernel 4.13 or later"
     release = (4, 13, "")
@@ -2062,24 +2145,6 @@ class KernelConfig_4_13(KernelConfig_4_12):
         "___GFP_NOLOCKDEP": {"value": 0x2000000},
     }
 
-    EXTRACT_PATTERN_OVERLAY_413 = {
-        "cgroup oom: mem info block (page stats 2)": (
-            # 4.13 mm: per-cgroup memory reclaim stats (2262185c5b287f2758afda79c149b7cf6bee165c)
-            r"^\s+pgrefill (?P<cgroup_memory_pgrefill_bytes>\d+)\n"
-            r"^\s+pgscan (?P<cgroup_memory_pgscan_bytes>\d+)\n"
-            r"^\s+pgsteal (?P<cgroup_memory_pgsteal_bytes>\d+)\n"
-            r"^\s+pgactivate (?P<cgroup_memory_pgactivate_bytes>\d+)\n"
-            r"^\s+pgdeactivate (?P<cgroup_memory_pgdeactivate_bytes>\d+)\n"
-            r"^\s+pglazyfree (?P<cgroup_memory_pglazyfree_bytes>\d+)\n"
-            r"^\s+pglazyfreed (?P<cgroup_memory_pglazyfreed_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-    }
-
-    def __init__(self):
-        super().__init__()
-        self.EXTRACT_PATTERN.update(self.EXTRACT_PATTERN_OVERLAY_413)
-
 
 class KernelConfig_4_14(KernelConfig_4_13):
     # Supported changes:
@@ -2288,10 +2353,14 @@ class KernelConfig_4_15(KernelConfig_4_14):
 class KernelConfig_4_18(KernelConfig_4_15):
     # Supported changes:
     #  * update GFP flags
+    #  * "mm, oom: remove 3% bonus for CAP_SYS_ADMIN processes"
 
     name = "Configuration for Linux kernel 4.18 or later"
     release = (4, 18, "")
 
+    # 4.18 mm, oom: remove 3% bonus for CAP_SYS_ADMIN processes
+    oom_badness_root_bonus = False
+
     # NOTE: These flags are automatically extracted from the gfp.h file.
     #       Please do not change them manually!
     GFP_FLAGS = {
@@ -2460,27 +2529,11 @@ class KernelConfig_5_1(KernelConfig_4_19):
         "___GFP_NOLOCKDEP": {"value": 0x800000},
     }
 
-    EXTRACT_PATTERN_OVERLAY_51 = {
-        "cgroup oom: mem info block (anon_thp)": (
-            # 5.1 mm: memcontrol: expose THP events on a per-memcg basis (1ff9e6e1798c7670ea6a7680a1ad5582df2fa914)
-            r"^\s+anon_thp (?P<cgroup_memory_anon_thp_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-        "cgroup oom: mem info block (Transparent Huge Pages)": (
-            # 5.1 mm: memcontrol: expose THP events on a per-memcg basis (1ff9e6e1798c7670ea6a7680a1ad5582df2fa914)
-            r"^\s+thp_fault_alloc (?P<cgroup_memory_thp_fault_alloc_bytes>\d+)\n"
-            r"^\s+thp_collapse_alloc (?P<cgroup_memory_thp_collapse_alloc_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-    }
-
     def __init__(self):
         super().__init__()
         # pattern removed with kernel 5.1 "mm, oom: remove 'prefer children over parent' heuristic" (bbbe48029720d2c6b6733f78d02571a281511adb)
         del self.EXTRACT_PATTERN["global oom: kill process - pid, name and score"]
 
-        self.EXTRACT_PATTERN.update(self.EXTRACT_PATTERN_OVERLAY_51)
-
 
 class KernelConfig_5_3(KernelConfig_5_1):
     # Supported changes:
@@ -2497,12 +2550,6 @@ class KernelConfig_5_3(KernelConfig_5_1):
             r"failcnt (?P<cgroup_swap_failcnt>\d+)",
             OOMPatternMatchRule.CGROUP_V2_MANDATORY,
         ),
-        "cgroup oom: mem info block (workingset)": (
-            # 5.3 mm: memcontrol: dump memory.stat during cgroup OOM (c8713d0b23123759c9d86b0421243c2c309505d7)
-            r"^\s+workingset_refault (?P<cgroup_memory_workingset_refault_bytes>\d+)\n"
-            r"^\s+workingset_activate (?P<cgroup_memory_workingset_activate_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
     }
 
     def __init__(self):
@@ -2572,16 +2619,6 @@ class KernelConfig_5_8(KernelConfig_5_4):
             r"^ unevictable:(?P<unevictable_pages>\d+) dirty:(?P<dirty_pages>\d+) writeback:(?P<writeback_pages>\d+)",
             OOMPatternMatchRule.KERNEL_MANDATORY,
         ),
-        "cgroup oom: mem info block (workingset)": (
-            # 5.3 mm: memcontrol: dump memory.stat during cgroup OOM (c8713d0b23123759c9d86b0421243c2c309505d7)
-            r"^\s+workingset_refault (?P<cgroup_memory_workingset_refault_bytes>\d+)\n"
-            r"^\s+workingset_activate (?P<cgroup_memory_workingset_activate_bytes>\d+)\n"
-            # 5.8 mm, memcg: add workingset_restore in memory.stat (a6f5576bb195c3b7508e3e1c98d2dcf6691f96e8)
-            r"^\s+workingset_restore (?P<cgroup_memory_workingset_restore_bytes>\d+)\n"
-            # 4.12  mm: vmscan: fix IO/refault regression in cache workingset transition (2a2e48854d704214dac7546e87ae0e4daa0e61a0)
-            r"^\s+workingset_nodereclaim (?P<cgroup_memory_workingset_nodereclaim_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
     }
 
     def __init__(self):
@@ -2591,80 +2628,27 @@ class KernelConfig_5_8(KernelConfig_5_4):
 
 class KernelConfig_5_9(KernelConfig_5_8):
     # Supported changes:
-    #  * add/update cgroup pattern
+    #  * new cgroup memory.stat keys (handled by the generic memory.stat tokenizer)
 
     name = "Configuration for Linux kernel 5.9 or later"
     release = (5, 9, "")
 
-    EXTRACT_PATTERN_OVERLAY_59 = {
-        "cgroup oom: mem info block (workingset)": (
-            # 5.9 mm/workingset: prepare the workingset detection infrastructure for anon LRU (170b04b7ae49634df103810dad67b22cf8a99aa6)
-            r"^\s+workingset_refault_anon (?P<cgroup_memory_workingset_refault_anon_bytes>\d+)\n"
-            r"^\s+workingset_refault_file (?P<cgroup_memory_workingset_refault_file_bytes>\d+)\n"
-            r"^\s+workingset_activate_anon (?P<cgroup_memory_workingset_activate_anon_bytes>\d+)\n"
-            r"^\s+workingset_activate_file (?P<cgroup_memory_workingset_activate_file_bytes>\d+)\n"
-            # 5.9 mm: memcontrol: fix missing suffix of workingset_restore (8d3fe09d8d6645dcbbe2413cde58f51ceb6545a6)
-            r"^\s+workingset_restore_anon (?P<cgroup_memory_workingset_restore_anon_bytes>\d+)\n"
-            r"^\s+workingset_restore_file (?P<cgroup_memory_workingset_restore_file_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-        "cgroup oom: mem info block (percpu)": (
-            # 5.9 mm: memcg/percpu: per-memcg percpu memory statistics (772616b031f06e05846488b01dab46a7c832da13)
-            r"^\s+percpu (?P<cgroup_memory_percpu_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-    }
-
-    def __init__(self):
-        super().__init__()
-        self.EXTRACT_PATTERN.update(self.EXTRACT_PATTERN_OVERLAY_59)
-
 
 class KernelConfig_5_11(KernelConfig_5_9):
     # Supported changes:
-    #  * add/update cgroup pattern
+    #  * new cgroup memory.stat keys (handled by the generic memory.stat tokenizer)
 
     name = "Configuration for Linux kernel 5.11 or later"
     release = (5, 11, "")
 
-    EXTRACT_PATTERN_OVERLAY_511 = {
-        "cgroup oom: mem info block (pagetables)": (
-            # 5.11 mm: memcontrol: account pagetables per node (f0c0c115fb81940f4dba0644ac2a8a43b39c83f3)
-            r"^\s+pagetables (?P<cgroup_memory_pagetables_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-        "cgroup oom: mem info block (file_thp, shmem_thp)": (
-            # 5.11 mm: memcontrol: add file_thp, shmem_thp to memory.stat (b8eddff8886b173b0a0f21a3bb1a594cc6d974d1)
-            r"^\s+file_thp (?P<cgroup_memory_file_thp_bytes>\d+)\n"
-            r"^\s+shmem_thp (?P<cgroup_memory_shmem_thp_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-    }
-
-    def __init__(self):
-        super().__init__()
-        self.EXTRACT_PATTERN.update(self.EXTRACT_PATTERN_OVERLAY_511)
-
 
 class KernelConfig_5_12(KernelConfig_5_11):
     # Supported changes:
-    #  * add/update cgroup pattern
+    #  * new cgroup memory.stat keys (handled by the generic memory.stat tokenizer)
 
     name = "Configuration for Linux kernel 5.12 or later"
     release = (5, 12, "")
 
-    EXTRACT_PATTERN_OVERLAY_512 = {
-        "cgroup oom: mem info block (swapcached)": (
-            # 5.12 mm: memcg: add swapcache stat for memcg v2 (b6038942480e574c697ea1a80019bbe586c1d654)
-            r"^\s+swapcached (?P<cgroup_memory_swapcached_bytes>\d+)\n",
-            OOMPatternMatchRule.CGROUP_ALL_MANDATORY,
-        ),
-    }
-
-    def __init__(self):
-        super().__init__()
-        self.EXTRACT_PATTERN.update(self.EXTRACT_PATTERN_OVERLAY_512)
-
 
 class KernelConfig_5_14(KernelConfig_5_12):
     # Supported changes:
@@ -3770,11 +3754,476 @@ class OOMEntity:
         return self.next()
 
 
+class BuddyInfo:
+    """
+    Number of free memory chunks per zone, order and node
+
+    All numbers are stored in dense lists with the layout [zone][order][node].
+    Additionally, the suffix sums over the orders are stored in the same
+    layout. Therefore, the check for a free chunk at the requested or any
+    higher order is a single lookup.
+
+    The fragmentation index and the unusable free space index are
+    calculated like the kernel does for /sys/kernel/debug/extfrag.
+
+    Usage:
+     1. Add the free chunks of all zones and nodes with add_zone_usage()
+     2. Call build() to create the dense lists
+     3. Query the information
+
+    @see: OOMAnalyser._extract_buddyinfo()
+    """
+
+    zones: List[str] = []
+    """Names of all zones in order of their appearance"""
+
+    nodes: List[int] = []
+    """Numbers of all nodes sorted ascending"""
+
+    max_order: int = 0
+    """Number of orders (maximum order plus one)"""
+
+    _counts: List[int] = []
+    """Free chunks with the layout [zone][order][node]"""
+
+    _suffix_sums: List[int] = []
+    """Free chunks in the current and all higher orders with the layout [zone][order][node]"""
+
+    _total_free_kb: List[int] = []
+    """Total free memory in kB with the layout [zone][node]"""
+
+    _present: List[bool] = []
+    """True if the zone exists on the node with the layout [zone][node]"""
+
+    _unusable_index: List[int] = []
+    """Unusable free space index in thousandths with the layout [zone][order][node]"""
+
+    _fragmentation_index: List[int] = []
+    """Fragmentation index in thousandths with the layout [zone][order][node]"""
+
+    _usage: List[Tuple[str, int, int, List[int]]] = []
+    """Zone usage added before build() is called"""
+
+    def __init__(self):
+        self.zones = []
+        self.nodes = []
+        self.max_order = 0
+        self._counts = []
+        self._suffix_sums = []
+        self._total_free_kb = []
+        self._present = []
+        self._unusable_index = []
+        self._fragmentation_index = []
+        self._usage = []
+
+    def add_zone_usage(
+        self, zone: str, node: int, total_free_kb: int, counts: List[int]
+    ):
+        """
+        Add the free chunks of a single zone on a single node
+
+        @param zone: Zone name
+        @param node: Node number
+        @param total_free_kb: Total free memory of this zone and node in kB
+        @param counts: Number of free chunks starting with order 0
+        """
+        if zone not in self.zones:
+            self.zones.append(zone)
+        if node not in self.nodes:
+            self.nodes.append(node)
+        if len(counts) > self.max_order:
+            self.max_order = len(counts)
+        self._usage.append((zone, node, total_free_kb, counts))
+
+    def build(self):
+        """
+        Create the dense lists from the zone usage added before
+
+        The suffix sums and both fragmentation indices are calculated in a
+        single sweep from the highest to the lowest order. The number of
+        free blocks of order k or higher in units of order k is:
+        suitable(k) = free chunks(k) + 2 * suitable(k + 1)
+
+        The code is inspired by mm/vmstat.c:fill_contig_page_info(),
+        __fragmentation_index() and unusable_free_index().
+        """
+        self.nodes.sort()
+        num_nodes = len(self.nodes)
+        size = len(self.zones) * self.max_order * num_nodes
+        self._counts = [0 for i in range(size)]
+        self._suffix_sums = [0 for i in range(size)]
+        self._unusable_index = [0 for i in range(size)]
+        self._fragmentation_index = [0 for i in range(size)]
+        self._total_free_kb = [0 for i in range(len(self.zones) * num_nodes)]
+        self._present = [False for i in range(len(self.zones) * num_nodes)]
+
+        for zone, node, total_free_kb, counts in self._usage:
+            zone_index = self.zones.index(zone)
+            node_index = self.nodes.index(node)
+            self._total_free_kb[zone_index * num_nodes + node_index] = total_free_kb
+            self._present[zone_index * num_nodes + node_index] = True
+
+            free_pages = 0
+            free_blocks = 0
+            for order in range(len(counts)):
+                free_pages += counts[order] * 2**order
+                free_blocks += counts[order]
+
+            suffix_sum = 0
+            suitable = 0
+            for order in range(self.max_order - 1, -1, -1):
+                count = counts[order] if order < len(counts) else 0
+                suffix_sum += count
+                suitable = count + 2 * suitable
+                pos = self._pos(zone_index, order, node_index)
+                self._counts[pos] = count
+                self._suffix_sums[pos] = suffix_sum
+                self._unusable_index[pos] = self._calc_unusable_index(
+                    order, free_pages, suitable
+                )
+                self._fragmentation_index[pos] = self._calc_fragmentation_index(
+                    order, free_pages, free_blocks, suitable
+                )
+        self._usage = []
+
+    def _calc_unusable_index(self, order: int, free_pages: int, suitable: int) -> int:
+        """
+        Return the unusable free space index in thousandths
+
+        It's the fraction of free memory that is unusable for an allocation
+        of the given order. 0 means all free memory is usable and 1000 means
+        no free memory is usable.
+
+        @param order: Order of the allocation
+        @param free_pages: Free pages of all orders
+        @param suitable: Free blocks of the given or higher order in units of the given order
+        """
+        if free_pages == 0:
+            return 1000
+        return int((free_pages - suitable * 2**order) * 1000 / free_pages)
+
+    def _calc_fragmentation_index(
+        self, order: int, free_pages: int, free_blocks: int, suitable: int
+    ) -> int:
+        """
+        Return the fragmentation index in thousandths
+
+        @param order: Order of the allocation
+        @param free_pages: Free pages of all orders
+        @param free_blocks: Free blocks of all orders
+        @param suitable: Free blocks of the given or higher order in units of the given order
+        """
+        if not free_blocks:
+            return 0
+        if suitable:
+            return -1000
+        return 1000 - int((1000 + int(free_pages * 1000 / 2**order)) / free_blocks)
+
+    def _pos(self, zone_index: int, order: int, node_index: int) -> int:
+        """Return the position in the dense lists with the layout [zone][order][node]"""
+        return (zone_index * self.max_order + order) * len(self.nodes) + node_index
+
+    def _zone_node_index(self, zone: str, node: int) -> Optional[Tuple[int, int]]:
+        """Return the index of zone and node or None if the zone doesn't exist on this node"""
+        if zone not in self.zones or node not in self.nodes:
+            return None
+        zone_index = self.zones.index(zone)
+        node_index = self.nodes.index(node)
+        if not self._present[zone_index * len(self.nodes) + node_index]:
+            return None
+        return zone_index, node_index
+
+    def has_zone(self, zone: str) -> bool:
+        """Return True if the zone exists on any node"""
+        return zone in self.zones
+
+    def free_chunks(self, zone: str, order: int, node: int) -> Optional[int]:
+        """
+        Return the number of free chunks of a single order
+
+        Returns None, if buddyinfo doesn't contain information for the requested node or zone
+        """
+        index = self._zone_node_index(zone, node)
+        if index is None:
+            return None
+        if order >= self.max_order:
+            return 0
+        return self._counts[self._pos(index[0], order, index[1])]
+
+    def free_chunks_total(self, zone: str, order: int) -> int:
+        """Return the number of free chunks of a single order summed up over all nodes"""
+        total = 0
+        for node in self.nodes:
+            count = self.free_chunks(zone, order, node)
+            if count is not None:
+                total += count
+        return total
+
+    def has_free_chunk(self, zone: str, order: int, node: int) -> Optional[bool]:
+        """
+        Check for at least one free chunk in the current or any higher order
+
+        Returns None, if buddyinfo doesn't contain information for the requested node or zone
+        """
+        index = self._zone_node_index(zone, node)
+        if index is None:
+            return None
+        if order >= self.max_order:
+            return False
+        return self._suffix_sums[self._pos(index[0], order, index[1])] > 0
+
+    def unusable_free_index(self, zone: str, order: int, node: int) -> Optional[int]:
+        """
+        Return the unusable free space index in thousandths
+
+        0 means all free memory is usable for an allocation of this order and
+        1000 means no free memory is usable. Returns None, if buddyinfo
+        doesn't contain information for the requested node or zone.
+        """
+        index = self._zone_node_index(zone, node)
+        if index is None or order >= self.max_order:
+            return None
+        return self._unusable_index[self._pos(index[0], order, index[1])]
+
+    def fragmentation_index(self, zone: str, order: int, node: int) -> Optional[int]:
+        """
+        Return the fragmentation index in thousandths
+
+        -1000 means the allocation would succeed. Values near 0 mean an
+        allocation would fail due to lack of memory and values near 1000
+        mean an allocation would fail due to fragmentation. Returns None, if
+        buddyinfo doesn't contain information for the requested node or zone.
+        """
+        index = self._zone_node_index(zone, node)
+        if index is None or order >= self.max_order:
+            return None
+        return self._fragmentation_index[self._pos(index[0], order, index[1])]
+
+    def total_free_kb(self, zone: str, node: int) -> Optional[int]:
+        """
+        Return the total free memory of a zone on a node in kB
+
+        Returns None, if buddyinfo doesn't contain information for the requested node or zone
+        """
+        index = self._zone_node_index(zone, node)
+        if index is None:
+            return None
+        return self._total_free_kb[index[0] * len(self.nodes) + index[1]]
+
+
+class AllocationFeasibility:
+    """
+    Verdict of the memory allocation for every zone, order and node
+
+    The verdicts are calculated for the GFP mask of the trigger process in
+    the same way as OOMAnalyser._analyse_alloc_failure() does it for the
+    trigger process' zone, node and order. The verdicts are stored in a
+    dense list with the layout [zone][order][node].
+
+    The verdict is one of:
+     * OOMAllocationFailureReason.FAILED_BELOW_LOW_WATERMARK
+     * OOMAllocationFailureReason.FAILED_NO_FREE_CHUNKS
+     * OOMAllocationFailureReason.WOULD_SUCCEED
+     * None, if the information for this zone and node is incomplete
+
+    @see: OOMAnalyser._calc_alloc_feasibility()
+    """
+
+    zones: List[str] = []
+    """Names of all zones with watermark information"""
+
+    nodes: List[int] = []
+    """Numbers of all nodes sorted ascending"""
+
+    max_order: int = 0
+    """Number of orders (maximum order plus one)"""
+
+    _free_kb: List[Optional[int]] = []
+    """Free memory in kB with the layout [zone][node]"""
+
+    _threshold_kb: List[Optional[int]] = []
+    """Free memory required by the watermark check in kB with the layout [zone][node]"""
+
+    _verdicts: List[Optional[str]] = []
+    """Verdicts with the layout [zone][order][node]"""
+
+    def __init__(self, zones: List[str], nodes: List[int], max_order: int):
+        self.zones = zones
+        self.nodes = nodes
+        self.max_order = max_order
+        self._free_kb = [None for i in range(len(zones) * len(nodes))]
+        self._threshold_kb = [None for i in range(len(zones) * len(nodes))]
+        self._verdicts = [None for i in range(len(zones) * max_order * len(nodes))]
+
+    def set_zone_node(
+        self,
+        zone: str,
+        node: int,
+        free_kb: int,
+        threshold_kb: int,
+        buddyinfo: BuddyInfo,
+    ):
+        """
+        Calculate the verdicts for all orders of a single zone and node
+
+        @param zone: Zone name
+        @param node: Node number
+        @param free_kb: Free memory in kB
+        @param threshold_kb: Free memory required by the watermark check in kB
+        @param buddyinfo: Free chunks of all zones
+        """
+        zone_index = self.zones.index(zone)
+        node_index = self.nodes.index(node)
+        self._free_kb[zone_index * len(self.nodes) + node_index] = free_kb
+        self._threshold_kb[zone_index * len(self.nodes) + node_index] = threshold_kb
+
+        watermark_ok = free_kb > threshold_kb
+        for order in range(self.max_order):
+            if not watermark_ok:
+                verdict = OOMAllocationFailureReason.FAILED_BELOW_LOW_WATERMARK
+            else:
+                free_chunk = buddyinfo.has_free_chunk(zone, order, node)
+                if free_chunk is None:
+                    verdict = None
+                elif free_chunk:
+                    verdict = OOMAllocationFailureReason.WOULD_SUCCEED
+                else:
+                    verdict = OOMAllocationFailureReason.FAILED_NO_FREE_CHUNKS
+            pos = (zone_index * self.max_order + order) * len(self.nodes) + node_index
+            self._verdicts[pos] = verdict
+
+    def verdict(self, zone: str, order: int, node: int) -> Optional[str]:
+        """Return the verdict or None if the information is incomplete"""
+        if zone not in self.zones or node not in self.nodes:
+            return None
+        if order < 0 or order >= self.max_order:
+            return None
+        zone_index = self.zones.index(zone)
+        node_index = self.nodes.index(node)
+        return self._verdicts[
+            (zone_index * self.max_order + order) * len(self.nodes) + node_index
+        ]
+
+    def free_kb(self, zone: str, node: int) -> Optional[int]:
+        """Return the free memory in kB or None if the information is incomplete"""
+        if zone not in self.zones or node not in self.nodes:
+            return None
+        return self._free_kb[
+            self.zones.index(zone) * len(self.nodes) + self.nodes.index(node)
+        ]
+
+    def threshold_kb(self, zone: str, node: int) -> Optional[int]:
+        """
+        Return the free memory required by the watermark check in kB
+
+        Returns None, if the information is incomplete
+        """
+        if zone not in self.zones or node not in self.nodes:
+            return None
+        return self._threshold_kb[
+            self.zones.index(zone) * len(self.nodes) + self.nodes.index(node)
+        ]
+
+    def satisfiable(self, order: int) -> List[Tuple[str, int]]:
+        """Return zone and node of all combinations, which could satisfy a request of the given order"""
+        result = []
+        for zone in self.zones:
+            for node in self.nodes:
+                if (
+                    self.verdict(zone, order, node)
+                    == OOMAllocationFailureReason.WOULD_SUCCEED
+                ):
+                    result.append((zone, node))
+        return result
+
+
 class OOMResult:
     """Results of an OOM analysis"""
 
-    buddyinfo: dict = {}
-    """Information about free areas in all zones"""
+    alloc_feasibility: Optional[AllocationFeasibility] = None
+    """Verdict of the memory allocation for all zones, orders and nodes or None if it's not calculated"""
+
+    buddyinfo: Optional[BuddyInfo] = None
+    """Information about free areas in all zones or None if it's missing"""
+
+    node_meminfo: dict = {}
+    """
+    Memory information per NUMA node
+
+    Every node has a dictionary with the values of the "Node N" Mem-Info
+    line, the key "zones" with a dictionary of all per-zone values and the
+    key "hugepages" with a list of all hugepage pools.
+
+    @see: OOMAnalyser._extract_node_meminfo()
+    """
+
+    unreclaimable_slab: dict = {}
+    """
+    Unreclaimable slab caches as columns sorted by the total size descending
+
+    The keys "name", "used_kb" and "total_kb" contain lists of the same
+    length. All lists are empty if the OOM doesn't contain the table.
+
+    @see: OOMAnalyser._extract_unreclaimable_slab()
+    """
+
+    kill_candidates: List[dict] = []
+    """
+    Processes with the highest approximated badness score, highest score first
+
+    @see: OOMAnalyser._calc_oom_badness()
+    """
+
+    kill_ranking: dict = {}
+    """
+    Comparison of the killed process with the approximated kill candidates
+
+    Keys:
+     - "total_pages": memory size used to scale oom_score_adj
+     - "expected_pid": PID of the candidate with the highest badness score
+     - "expected_pid_without_adj": same, but with all oom_score_adj set to 0
+     - "killed_pid": PID of the killed process
+     - "killed_rank": rank of the killed process (1 = highest score) or None
+     - "killed_as_expected": True if the expected candidate has been killed
+     - "adj_changed_outcome": True if oom_score_adj changed the expected candidate
+
+    @see: OOMAnalyser._calc_oom_badness()
+    """
+
+    process_memory: List[dict] = []
+    """
+    Memory usage of all processes in the process table
+
+    Threads are listed separately in the process table, but share the memory
+    with the other threads of their thread group. Therefore, every entry
+    combines all rows with the same TGID.
+
+    @see: OOMAnalyser._calc_process_memory()
+    """
+
+    process_memory_by_name: List[dict] = []
+    """
+    Memory usage of all processes summed up per process name
+
+    @see: OOMAnalyser._calc_process_memory()
+    """
+
+    cgroup_memory_stat: dict = {}
+    """
+    All "key value" pairs of the cgroup memory.stat block
+
+    @see: OOMAnalyser._extract_cgroup_memory_stat()
+    """
+
+    zonelist_walk: List[dict] = []
+    """
+    Steps of the simulated walk through the zonelist for the failed allocation
+
+    Every step is a dictionary with the keys node, zone, free_kb,
+    threshold_kb and verdict.
+
+    @see: OOMAnalyser._simulate_zonelist_walk()
+    """
 
     details: dict = {}
     """Extracted result"""
@@ -3837,7 +4286,16 @@ class OOMResult:
     """Memory watermark information"""
 
     def __init__(self):
-        self.buddyinfo = {}
+        self.alloc_feasibility = None
+        self.buddyinfo = None
+        self.node_meminfo = {}
+        self.unreclaimable_slab = {"name": [], "used_kb": [], "total_kb": []}
+        self.cgroup_memory_stat = {}
+        self.process_memory = []
+        self.process_memory_by_name = []
+        self.kill_candidates = []
+        self.kill_ranking = {}
+        self.zonelist_walk = []
         self.details = (
             dict(self.default_values)
             if getattr(self, "default_values", None) is not None
@@ -3866,6 +4324,37 @@ class OOMResult:
 class OOMAnalyser:
     """Analyze an OOM object and calculate additional values"""
 
+    REC_NODE_MEMINFO_LINE = re.compile(
+        r"^Node (?P<node>\d+) (?:(?P<zone>DMA|DMA32|Normal|HighMem|Movable|Device) )?"
+        r"(?P<values>(?:[a-z_]+[=:?(]).*)$"
+    )
+    """
+    RE to match the per-node and per-zone Mem-Info lines and the hugepage lines
+
+    Source: mm/page_alloc.c:__show_free_areas() and hugetlb_show_meminfo_node()
+    """
+
+    KILL_CANDIDATES_TOP_N = 10
+    """
+    Number of processes with the highest badness score listed as kill candidates
+
+    @see: _calc_oom_badness()
+    """
+
+    PROCESS_MEMORY_TOP_N = 10
+    """
+    Number of the largest processes and process names listed in the summary
+
+    @see: _calc_process_memory()
+    """
+
+    UNRECLAIMABLE_SLAB_TOP_N = 10
+    """
+    Number of the largest unreclaimable slab caches listed in the summary
+
+    @see: _calc_unreclaimable_slab_summary()
+    """
+
     oom_entity = None
     """
     State of this OOM (unknown, incomplete, ...)
@@ -4200,6 +4689,9 @@ class OOMAnalyser:
 
         self._extract_page_size()
         self._extract_pstable()
+        self._extract_unreclaimable_slab()
+        if self.oom_result.oom_type in [OOMType.CGROUP_V1, OOMType.CGROUP_V2]:
+            self._extract_cgroup_memory_stat()
         if self.oom_result.oom_type in [
             OOMType.KERNEL_AUTOMATIC,
             OOMType.KERNEL_MANUAL,
@@ -4207,6 +4699,7 @@ class OOMAnalyser:
             self._extract_gpf_mask()
             self._extract_buddyinfo()
             self._extract_watermarks()
+            self._extract_node_meminfo()
 
     def _extract_page_size(self):
         """Extract page size from the first buddyinfo zone"""
@@ -4238,6 +4731,108 @@ class OOMAnalyser:
                 self.oom_result.details["_pstable"][pid] = {}
                 self.oom_result.details["_pstable"][pid].update(details)
 
+    def _extract_cgroup_memory_stat(self):
+        """
+        Extract all values of the cgroup memory.stat block in a single pass
+
+        The block follows the line "Memory cgroup stats for <path>:" and
+        contains one "key value" pair per line. The number and the order of the
+        keys changes between the kernel versions, therefore all keys are
+        captured without a kernel-specific pattern.
+
+        Before 5.3, cgroup v1 prints all values in KB in the same line as
+        "Memory cgroup stats for <path>:" followed by one line per child
+        cgroup. Only the values of the first line are captured.
+
+        The cgroup v1 keys "cache" and "rss" are stored as "file" and "anon".
+
+        This function fills:
+        * OOMResult.cgroup_memory_stat with [key] = int
+        * OOMResult.details["cgroup_memory_<key>_bytes"] = int
+        """
+        stat = {}
+        self.oom_result.cgroup_memory_stat = stat
+        kconfig = self.oom_result.kconfig
+        if not self.oom_entity.find_text(kconfig.cgroup_memory_stat_start):
+            return
+
+        items = []
+        self.oom_entity.goto_previous_line()
+        for line in self.oom_entity:
+            if line.startswith(kconfig.cgroup_memory_stat_start):
+                for item in line[len(kconfig.cgroup_memory_stat_start) :].split():
+                    match = kconfig.REC_CGROUP_MEMORY_STAT_V1_ITEM.match(item)
+                    if match:
+                        value = int(match.group("value")) * 1024
+                        items.append((match.group("key"), value))
+                if len(items) > 0:
+                    break
+                continue
+            match = kconfig.REC_CGROUP_MEMORY_STAT_LINE.match(line)
+            if not match:
+                break
+            items.append((match.group("key"), int(match.group("value"))))
+
+        for key, value in items:
+            key = kconfig.cgroup_memory_stat_v1_keys.get(key, key)
+            stat[key] = value
+            self.oom_result.details["cgroup_memory_{}_bytes".format(key)] = value
+
+        for key in kconfig.cgroup_memory_stat_mandatory:
+            if key not in stat:
+                error(
+                    'Failed to extract information from OOM text. The key "{}" '
+                    "is missing in the cgroup memory.stat block for kernel {} "
+                    "with kernel configuration {}.{}{}. This can lead to errors "
+                    "later on.".format(
+                        key,
+                        self.oom_result.kversion,
+                        kconfig.release[KernelRelease.MAJOR],
+                        kconfig.release[KernelRelease.MINOR],
+                        kconfig.release[KernelRelease.SUFFIX],
+                    )
+                )
+
+    def _extract_unreclaimable_slab(self):
+        """
+        Extract the table of unreclaimable slab caches
+
+        The kernel prints this table only if the unreclaimable slab memory is
+        larger than all user memory.
+
+        This function fills:
+        * OOMResult.unreclaimable_slab with ["name"|"used_kb"|"total_kb"] = List
+        """
+        slab = {"name": [], "used_kb": [], "total_kb": []}
+        self.oom_result.unreclaimable_slab = slab
+        if not self.oom_entity.find_text(
+            self.oom_result.kconfig.unreclaimable_slab_start
+        ):
+            return
+
+        caches = []
+        for line in self.oom_entity:
+            if line.startswith(self.oom_result.kconfig.unreclaimable_slab_start):
+                continue
+            if line.startswith("Name "):  # table heading
+                continue
+            match = self.oom_result.kconfig.REC_UNRECLAIMABLE_SLAB_LINE.match(line)
+            if not match:
+                break
+            caches.append(
+                (
+                    int(match.group("total_kb")),
+                    int(match.group("used_kb")),
+                    match.group("name"),
+                )
+            )
+
+        caches.sort(key=lambda cache: cache[0], reverse=True)
+        for total_kb, used_kb, name in caches:
+            slab["name"].append(name)
+            slab["used_kb"].append(used_kb)
+            slab["total_kb"].append(total_kb)
+
     def _extract_buddyinfo(self):
         """Extract information about free areas in all zones
 
@@ -4245,58 +4840,42 @@ class OOMAnalyser:
         mm/page_alloc.c:show_migration_types().
 
         This function fills:
-        * OOMResult.buddyinfo with [<zone>][<order>][<node>] = <number of free chunks>
-        * OOMResult.buddyinfo with [zone]["total_free_kb_per_node"][node] = int(total_free_kb_per_node)
+        * OOMResult.buddyinfo with the number of free chunks per zone, order and node
+        * BaseKernelConfig.MAX_ORDER with the number of orders
         """
-        self.oom_result.buddyinfo = {}
-        buddy_info = self.oom_result.buddyinfo
+        self.oom_result.buddyinfo = None
         if not self.oom_entity.find_pattern(
             self.oom_result.kconfig.REC_FREE_MEMORY_CHUNKS
         ):
             debug("Missing buddyinfo - skip extraction")
             return
-        max_order = 0
+        buddy_info = BuddyInfo()
 
         self.oom_entity.goto_previous_line()
         for line in self.oom_entity:
             match = self.oom_result.kconfig.REC_FREE_MEMORY_CHUNKS.match(line)
             if not match:
                 continue
-            node = int(match.group("node"))
-            zone = match.group("zone")
-
-            if zone not in buddy_info:
-                buddy_info[zone] = {}
-
-            if "total_free_kb_per_node" not in buddy_info[zone]:
-                buddy_info[zone]["total_free_kb_per_node"] = {}
-            buddy_info[zone]["total_free_kb_per_node"][node] = int(
-                match.group("total_free_kb_per_node")
-            )
 
-            order = -1  # to start with 0 after the first increment in for loop
+            counts = []
             for element in match.group("zone_usage").split(" "):
                 if element.startswith("("):  # skip migration types
                     continue
-                order += 1
-                if order not in buddy_info[zone]:
-                    buddy_info[zone][order] = {}
-                count = element.split("*")[0]
-                count.strip()
-
-                buddy_info[zone][order][node] = int(count)
-                if "free_chunks_total" not in buddy_info[zone][order]:
-                    buddy_info[zone][order]["free_chunks_total"] = 0
-                buddy_info[zone][order]["free_chunks_total"] += buddy_info[zone][order][
-                    node
-                ]
+                counts.append(int(element.split("*")[0]))
+
+            buddy_info.add_zone_usage(
+                match.group("zone"),
+                int(match.group("node")),
+                int(match.group("total_free_kb_per_node")),
+                counts,
+            )
 
-            # MAX_ORDER is actually the maximum order plus one. For example,
-            # a value of 11 means that the largest free memory block is 2^10 pages.
-            if order + 1 > max_order:
-                max_order = order + 1
+        buddy_info.build()
+        self.oom_result.buddyinfo = buddy_info
 
-        self.oom_result.kconfig.MAX_ORDER = max_order
+        # MAX_ORDER is actually the maximum order plus one. For example,
+        # a value of 11 means that the largest free memory block is 2^10 pages.
+        self.oom_result.kconfig.MAX_ORDER = buddy_info.max_order
 
     def _extract_watermarks(self):
         """
@@ -4339,6 +4918,78 @@ class OOMAnalyser:
                     int(v) for v in line.split()[1:]
                 ]
 
+    def _parse_meminfo_values(self, text: str) -> dict:
+        """
+        Convert Mem-Info values like "active_anon:884kB isolated(anon):0kB" into a dictionary
+
+        Keys are normalised:
+        * "isolated(anon)" becomes "isolated_anon"
+        * values in kB get the suffix "_kb", e.g. "active_anon_kb"
+        * "all_unreclaimable? no" becomes a boolean
+
+        Values separated with "=" as in the hugepage lines are supported too.
+        """
+        values = {}
+        text = text.replace(": ", ":").replace("? ", "?:")
+        for token in text.split(" "):
+            if ":" in token:
+                separator = ":"
+            elif "=" in token:
+                separator = "="
+            else:
+                continue
+            parts = token.split(separator)
+            key = parts[0].replace("(", "_").replace(")", "").replace("?", "")
+            value = parts[1]
+            if value in ["yes", "no"]:
+                values[key] = value == "yes"
+                continue
+            if value.endswith("kB") or value.endswith("KB"):
+                key += "_kb"
+                value = value[0 : len(value) - 2]
+            try:
+                values[key] = int(value)
+            except:
+                debug('Skip non-numeric Mem-Info value "{}"'.format(token))
+        return values
+
+    def _extract_node_meminfo(self):
+        """
+        Extract the per-node Mem-Info lines, per-zone lines and hugepage pools
+
+        All lines are processed in a single pass:
+        * "Node 0 active_anon:884kB ..." - values of the node
+        * "Node 0 DMA free:15872kB min:40kB ..." - values of a zone on this node
+        * "Node 0 hugepages_total=0 ... hugepages_size=2048kB" - a hugepage pool
+
+        This function fills:
+        * OOMResult.node_meminfo with [<node>][<key>] = int | bool
+        * OOMResult.node_meminfo with [<node>]["zones"][<zone>][<key>] = int | bool
+        * OOMResult.node_meminfo with [<node>]["hugepages"] = List(dict)
+        """
+        self.oom_result.node_meminfo = {}
+        node_meminfo = self.oom_result.node_meminfo
+        for line in self.oom_entity.lines:
+            match = self.REC_NODE_MEMINFO_LINE.match(line)
+            if not match:
+                continue
+            node = int(match.group("node"))
+            zone = match.group("zone")
+            text = match.group("values")
+            if node not in node_meminfo:
+                node_meminfo[node] = {"zones": {}, "hugepages": []}
+
+            if zone:
+                node_meminfo[node]["zones"][zone] = self._parse_meminfo_values(text)
+            elif text.startswith("hugepages_"):
+                node_meminfo[node]["hugepages"].append(self._parse_meminfo_values(text))
+            else:
+                values = self._parse_meminfo_values(text)
+                # __pragma__ ('jsiter')
+                for key in values:
+                    node_meminfo[node][key] = values[key]
+                # __pragma__ ('nojsiter')
+
     def _search_node_with_memory_shortage(self):
         """
         Search NUMA node with memory shortage: watermark "free" < "min".
@@ -4455,22 +5106,11 @@ class OOMAnalyser:
         @param start_with_order: Start checking with this order
         @param zone: Memory zone
         @param node: Node number
+        @see: BuddyInfo.has_free_chunk()
         """
-        if not self.oom_result.buddyinfo:
-            return None
-        buddyinfo = self.oom_result.buddyinfo
-        if zone not in buddyinfo:
+        if self.oom_result.buddyinfo is None:
             return None
-
-        for order in range(start_with_order, self.oom_result.kconfig.MAX_ORDER):
-            if order not in buddyinfo[zone]:
-                break
-            if node not in buddyinfo[zone][order]:
-                return None
-            free_chunks = buddyinfo[zone][order][node]
-            if free_chunks:
-                return True
-        return False
+        return self.oom_result.buddyinfo.has_free_chunk(zone, start_with_order, node)
 
     def _check_for_memory_fragmentation(self):
         """Check for heavy memory fragmentation. This means that the higher order has no free chunks.
@@ -4483,7 +5123,9 @@ class OOMAnalyser:
         """
         zone = self.oom_result.details["trigger_proc_mem_zone"]
         node = self.oom_result.details["trigger_proc_numa_node"]
-        if zone not in self.oom_result.buddyinfo:
+        if self.oom_result.buddyinfo is None or not self.oom_result.buddyinfo.has_zone(
+            zone
+        ):
             return
         free_chunks = self._check_free_chunks(
             self.oom_result.kconfig.PAGE_ALLOC_COSTLY_ORDER, zone, node
@@ -4496,18 +5138,196 @@ class OOMAnalyser:
             "kconfig.PAGE_ALLOC_COSTLY_ORDER"
         ] = self.oom_result.kconfig.PAGE_ALLOC_COSTLY_ORDER
 
+    def _watermark_threshold_kb(
+        self, zone: str, node: int, highest_zoneidx: int, gfp_flag_high: bool
+    ) -> Optional[int]:
+        """
+        Return the free memory required by the watermark check in kB
+
+        The code in this function is inspired by mm/page_alloc.c:__zone_watermark_ok()
+
+        @param zone: Memory zone
+        @param node: Node number
+        @param highest_zoneidx: Index of the highest zone usable by the request
+        @param gfp_flag_high: True for high-priority requests with __GFP_HIGH
+        @return: Required free memory or None if the watermark information is missing
+        """
+        watermark_info = self.oom_result.watermarks
+        if zone not in watermark_info or node not in watermark_info[zone]:
+            return None
+        if "lowmem_reserve" not in watermark_info[zone][node]:
+            return None
+        lowmem_reserve = watermark_info[zone][node]["lowmem_reserve"]
+        if highest_zoneidx >= len(lowmem_reserve):
+            return None
+        min_kb = watermark_info[zone][node]["low"]
+
+        # reduce the minimum watermark for high-priority calls
+        # ALLOC_HIGH == __GFP_HIGH
+        if gfp_flag_high:
+            min_kb -= int(min_kb / 2)
+
+        return min_kb + (
+            lowmem_reserve[highest_zoneidx] * self.oom_result.details["page_size_kb"]
+        )
+
+    def _trigger_proc_is_high_priority(self) -> bool:
+        """Return True if the GFP mask of the trigger process contains __GFP_HIGH"""
+        gfp_mask_decimal = self.oom_result.details["_trigger_proc_gfp_mask_decimal"]
+        gfp_flag_high = self.oom_result.kconfig.GFP_FLAGS["__GFP_HIGH"]["_value"]
+        return (gfp_mask_decimal & gfp_flag_high) == gfp_flag_high
+
+    def _calc_alloc_feasibility(self):
+        """
+        Calculate the verdict of the memory allocation for all zones, orders and nodes
+
+        The request of the trigger process is evaluated for every combination
+        of zone, order and node with the same GFP mask and the same checks as
+        in _analyse_alloc_failure(). The watermark check doesn't depend on the
+        order and is therefore calculated only once per zone and node.
+
+        This function fills:
+        * OOMResult.alloc_feasibility
+        """
+        self.oom_result.alloc_feasibility = None
+        buddyinfo = self.oom_result.buddyinfo
+        watermark_info = self.oom_result.watermarks
+        if buddyinfo is None or not watermark_info:
+            debug("Missing buddyinfo or watermarks - skip feasibility calculation")
+            return
+        if "trigger_proc_mem_zone" not in self.oom_result.details:
+            debug("Missing trigger_proc_mem_zone - skip feasibility calculation")
+            return
+
+        highest_zoneidx = self.oom_result.kconfig.ZONE_TYPES.index(
+            self.oom_result.details["trigger_proc_mem_zone"]
+        )
+        gfp_flag_high = self._trigger_proc_is_high_priority()
+
+        zones = []
+        nodes = []
+        # __pragma__ ('jsiter')
+        for zone in watermark_info:
+            zones.append(zone)
+            for node in watermark_info[zone]:
+                if int(node) not in nodes:
+                    nodes.append(int(node))
+        # __pragma__ ('nojsiter')
+        nodes.sort()
+
+        feasibility = AllocationFeasibility(zones, nodes, buddyinfo.max_order)
+        for zone in zones:
+            for node in nodes:
+                threshold_kb = self._watermark_threshold_kb(
+                    zone, node, highest_zoneidx, gfp_flag_high
+                )
+                if threshold_kb is None:
+                    continue
+                feasibility.set_zone_node(
+                    zone,
+                    node,
+                    watermark_info[zone][node]["free"],
+                    threshold_kb,
+                    buddyinfo,
+                )
+        self.oom_result.alloc_feasibility = feasibility
+
+    def _parse_nodemask(self, nodemask: str) -> Optional[List[int]]:
+        """
+        Convert a node list like "0-2,4" into a list of node numbers
+
+        @return: Sorted list of nodes or None if the nodemask is unset or invalid
+        """
+        if not nodemask or nodemask in ["(null)", NOT_FOUND]:
+            return None
+        nodes = []
+        for part in nodemask.split(","):
+            bounds = part.split("-")
+            try:
+                first = int(bounds[0])
+                last = int(bounds[len(bounds) - 1])
+            except:
+                debug('Invalid nodemask "{}"'.format(nodemask))
+                return None
+            for node in range(first, last + 1):
+                if node not in nodes:
+                    nodes.append(node)
+        nodes.sort()
+        return nodes
+
+    def _simulate_zonelist_walk(self):
+        """
+        Simulate the walk of the page allocator through the zonelist
+
+        The page allocator tries all zones of the zonelist from the highest
+        zone usable by the request down to the lowest zone on every node
+        allowed by the nodemask. The walk ends at the first zone which could
+        satisfy the request. Every step is checked with the verdicts
+        precalculated in _calc_alloc_feasibility().
+
+        The node distances are not part of the OOM message. Therefore, the
+        nodes are walked in ascending order instead of the order of their
+        distances to the local node.
+
+        The code in this function is inspired by
+        mm/page_alloc.c:get_page_from_freelist()
+
+        This function fills:
+        * OOMResult.zonelist_walk
+        """
+        self.oom_result.zonelist_walk = []
+        feasibility = self.oom_result.alloc_feasibility
+        if feasibility is None:
+            debug("Missing allocation verdicts - skip zonelist simulation")
+            return
+        order = self.oom_result.details.get("trigger_proc_order", -1)
+        if order < 0:
+            debug("OOM triggered manually - skip zonelist simulation")
+            return
+
+        highest_zoneidx = self.oom_result.kconfig.ZONE_TYPES.index(
+            self.oom_result.details["trigger_proc_mem_zone"]
+        )
+        nodes = self._parse_nodemask(
+            self.oom_result.details.get("trigger_proc_nodemask", "")
+        )
+        if nodes is None:
+            nodes = feasibility.nodes
+
+        for node in nodes:
+            for zoneidx in range(highest_zoneidx, -1, -1):
+                zone = self.oom_result.kconfig.ZONE_TYPES[zoneidx]
+                threshold_kb = feasibility.threshold_kb(zone, node)
+                if threshold_kb is None:
+                    # zone isn't populated on this node
+                    continue
+                verdict = feasibility.verdict(zone, order, node)
+                self.oom_result.zonelist_walk.append(
+                    {
+                        "node": node,
+                        "zone": zone,
+                        "free_kb": feasibility.free_kb(zone, node),
+                        "threshold_kb": threshold_kb,
+                        "verdict": verdict,
+                    }
+                )
+                if verdict == OOMAllocationFailureReason.WOULD_SUCCEED:
+                    return
+
     def _analyse_alloc_failure(self):
         """
         Analyze why the memory allocation could be failed.
 
         The code in this function is inspired by mm/page_alloc.c:__zone_watermark_ok()
+
+        @see: _calc_alloc_feasibility()
         """
         self.oom_result.mem_alloc_failure = OOMAllocationFailureReason.NOT_STARTED
 
         if self.oom_result.oom_type == OOMType.KERNEL_MANUAL:
             debug("OOM triggered manually - skip memory analysis")
             return
-        if not self.oom_result.buddyinfo:
+        if self.oom_result.buddyinfo is None:
             debug("Missing buddyinfo - skip memory analysis")
             return
         if ("trigger_proc_order" not in self.oom_result.details) or (
@@ -4523,7 +5343,6 @@ class OOMAnalyser:
 
         order = self.oom_result.details["trigger_proc_order"]
         zone = self.oom_result.details["trigger_proc_mem_zone"]
-        watermark_info = self.oom_result.watermarks
 
         # "high order" requests don't trigger OOM
         if int(order) > self.oom_result.kconfig.PAGE_ALLOC_COSTLY_ORDER:
@@ -4539,31 +5358,19 @@ class OOMAnalyser:
             debug("No NUMA node found - skip analysis of memory allocation failure")
             return
 
-        # the remaining code is similar to mm/page_alloc.c:__zone_watermark_ok()
-        # =======================================================================
-
-        # calculation in kB and not in pages
-        free_kb = watermark_info[zone][node]["free"]
-        highest_zoneidx = self.oom_result.kconfig.ZONE_TYPES.index(zone)
-        lowmem_reserve = watermark_info[zone][node]["lowmem_reserve"]
-        min_kb = watermark_info[zone][node]["low"]
-
-        # reduce the minimum watermark for high-priority calls
-        # ALLOC_HIGH == __GFP_HIGH
-        gfp_mask_decimal = self.oom_result.details["_trigger_proc_gfp_mask_decimal"]
-        gfp_flag_high = self.oom_result.kconfig.GFP_FLAGS["__GFP_HIGH"]["_value"]
-        if (gfp_mask_decimal & gfp_flag_high) == gfp_flag_high:
-            min_kb -= int(min_kb / 2)
-
         # check watermarks, if these are not met, then a high-order request also
         # cannot go ahead even if a suitable page happened to be free.
-        if free_kb <= (
-            min_kb
-            + (
-                lowmem_reserve[highest_zoneidx]
-                * self.oom_result.details["page_size_kb"]
-            )
-        ):
+        free_kb = self.oom_result.watermarks[zone][node]["free"]
+        threshold_kb = self._watermark_threshold_kb(
+            zone,
+            node,
+            self.oom_result.kconfig.ZONE_TYPES.index(zone),
+            self._trigger_proc_is_high_priority(),
+        )
+        if threshold_kb is None:
+            debug("Missing lowmem_reserve - skip analysis of memory allocation failure")
+            return
+        if free_kb <= threshold_kb:
             self.oom_result.mem_alloc_failure = (
                 OOMAllocationFailureReason.FAILED_BELOW_LOW_WATERMARK
             )
@@ -4593,6 +5400,203 @@ class OOMAnalyser:
         if kpid in self.oom_result.details["_pstable"]:
             self.oom_result.details["_pstable"][kpid]["notes"] = "killed process"
 
+    def _calc_process_memory(self):
+        """
+        Attribute the memory listed in the process table to processes and process names
+
+        All rows with the same TGID belong to the same process and share its
+        memory. Their values are only counted once. The total memory of a
+        process is the sum of RSS, swap entries and page tables like in the
+        kernel function oom_badness().
+
+        This function fills:
+        * OOMResult.process_memory
+        * OOMResult.process_memory_by_name
+        * OOMResult.details["_top_processes"] = List of the largest processes
+        * OOMResult.details["_top_process_names"] = List of the largest process names
+        """
+        page_size_kb = self.oom_result.details["page_size_kb"]
+        ram_kb = None
+        if isinstance(self.oom_result.details.get("ram_pages"), int):
+            ram_kb = self.oom_result.details["ram_pages"] * page_size_kb
+
+        def ram_percent(size_kb):
+            if not ram_kb:
+                return None
+            return int(100 * size_kb / ram_kb)
+
+        processes = {}
+        tgids = []
+        for pid in self.oom_result.details["_pstable_index"]:
+            row = self.oom_result.details["_pstable"][pid]
+            tgid = row["tgid"]
+            if tgid in processes:
+                process = processes[tgid]
+                process["threads"] += 1
+                if pid == tgid:
+                    process["name"] = row["name"]
+                continue
+
+            if "pgtables_bytes" in row:
+                pgtables_kb = int(row["pgtables_bytes"] / 1024)
+            else:
+                pgtables_kb = row["nr_ptes_pages"] * page_size_kb
+            process = {
+                "tgid": tgid,
+                "name": row["name"],
+                "threads": 1,
+                "rss_kb": row["rss_pages"] * page_size_kb,
+                "swap_kb": row["swapents_pages"] * page_size_kb,
+                "pgtables_kb": pgtables_kb,
+            }
+            process["total_kb"] = (
+                process["rss_kb"] + process["swap_kb"] + process["pgtables_kb"]
+            )
+            process["ram_percent"] = ram_percent(process["total_kb"])
+            processes[tgid] = process
+            tgids.append(tgid)
+
+        by_name = {}
+        names = []
+        for tgid in tgids:
+            process = processes[tgid]
+            name = process["name"]
+            if name not in by_name:
+                by_name[name] = {
+                    "name": name,
+                    "processes": 0,
+                    "threads": 0,
+                    "rss_kb": 0,
+                    "swap_kb": 0,
+                    "pgtables_kb": 0,
+                    "total_kb": 0,
+                }
+                names.append(name)
+            group = by_name[name]
+            group["processes"] += 1
+            for item in ["threads", "rss_kb", "swap_kb", "pgtables_kb", "total_kb"]:
+                group[item] += process[item]
+        names.sort()
+        for name in names:
+            by_name[name]["ram_percent"] = ram_percent(by_name[name]["total_kb"])
+
+        self.oom_result.process_memory = [processes[tgid] for tgid in tgids]
+        self.oom_result.process_memory_by_name = [by_name[name] for name in names]
+        self.oom_result.details["_top_processes"] = nlargest(
+            self.PROCESS_MEMORY_TOP_N,
+            self.oom_result.process_memory,
+            lambda process: process["total_kb"],
+        )
+        self.oom_result.details["_top_process_names"] = nlargest(
+            self.PROCESS_MEMORY_TOP_N,
+            self.oom_result.process_memory_by_name,
+            lambda group: group["total_kb"],
+        )
+
+    def _oom_badness_total_pages(self) -> Optional[int]:
+        """
+        Return the memory size in pages to scale oom_score_adj like the kernel
+
+        Kernel OOMs use RAM and swap space. Cgroup OOMs use the memory limit of
+        the cgroup, the swap limit is not considered.
+
+        @return: Number of pages or None if the size is unknown
+        """
+        details = self.oom_result.details
+        page_size_kb = details["page_size_kb"]
+        if self.oom_result.oom_type in [OOMType.CGROUP_V1, OOMType.CGROUP_V2]:
+            limit_kb = details.get("cgroup_memory_limit_kb")
+            if not isinstance(limit_kb, int):
+                return None
+            return int(limit_kb / page_size_kb)
+
+        ram_pages = details.get("ram_pages")
+        if not isinstance(ram_pages, int):
+            return None
+        swap_total_kb = details.get("system_swap_total_kb")
+        if not isinstance(swap_total_kb, int):
+            swap_total_kb = 0
+        return ram_pages + int(swap_total_kb / page_size_kb)
+
+    def _calc_oom_badness(self):
+        """
+        Approximate the badness score of all processes and rank the kill candidates
+
+        Like the kernel function oom_badness(), the score is the sum of RSS,
+        swap entries and page tables in pages plus oom_score_adj scaled to the
+        memory size. Processes with oom_score_adj -1000 are never killed, but
+        they are part of the ranking without oom_score_adj.
+
+        Only the highest scores are ranked (partial top-K), the rank of the
+        killed process is counted in a single pass.
+
+        This function fills:
+        * OOMResult.kill_candidates
+        * OOMResult.kill_ranking
+        """
+        total_pages = self._oom_badness_total_pages()
+        if total_pages is None:
+            return
+        kconfig = self.oom_result.kconfig
+        page_size_kb = self.oom_result.details["page_size_kb"]
+        adj_factor = int(total_pages / 1000)
+
+        processes = []
+        candidates = []
+        for pid in self.oom_result.details["_pstable_index"]:
+            row = self.oom_result.details["_pstable"][pid]
+            if "pgtables_bytes" in row:
+                pgtables_pages = int(row["pgtables_bytes"] / (page_size_kb * 1024))
+            else:
+                pgtables_pages = row["nr_ptes_pages"]
+            points = row["rss_pages"] + row["swapents_pages"] + pgtables_pages
+            if kconfig.oom_badness_root_bonus and row["uid"] == 0:
+                points -= int(points * 3 / 100)
+            process = {
+                "pid": pid,
+                "name": row["name"],
+                "points": points,
+                "oom_score_adj": row["oom_score_adj"],
+                "badness": points + row["oom_score_adj"] * adj_factor,
+            }
+            processes.append(process)
+            if row["oom_score_adj"] != kconfig.OOM_SCORE_ADJ_MIN:
+                candidates.append(process)
+
+        self.oom_result.kill_candidates = nlargest(
+            self.KILL_CANDIDATES_TOP_N, candidates, lambda c: c["badness"]
+        )
+        expected = self.oom_result.kill_candidates
+        expected_without_adj = nlargest(1, processes, lambda c: c["points"])
+
+        killed_pid = self.oom_result.details.get("killed_proc_pid")
+        killed = None
+        for candidate in candidates:
+            if candidate["pid"] == killed_pid:
+                killed = candidate
+                break
+        killed_rank = None
+        if killed is not None:
+            killed_rank = 1
+            for candidate in candidates:
+                if candidate["badness"] > killed["badness"]:
+                    killed_rank += 1
+
+        ranking = {
+            "total_pages": total_pages,
+            "expected_pid": expected[0]["pid"] if len(expected) else None,
+            "expected_pid_without_adj": expected_without_adj[0]["pid"]
+            if len(expected_without_adj)
+            else None,
+            "killed_pid": killed_pid,
+            "killed_rank": killed_rank,
+        }
+        ranking["killed_as_expected"] = killed_rank == 1
+        ranking["adj_changed_outcome"] = (
+            ranking["expected_pid"] != ranking["expected_pid_without_adj"]
+        )
+        self.oom_result.kill_ranking = ranking
+
     def _calc_trigger_process_values(self):
         """Calculate all values related to the trigger process"""
         self.oom_result.details["trigger_proc_requested_memory_pages"] = (
@@ -4675,17 +5679,11 @@ class OOMAnalyser:
                 "system_total_ramswap_kb"
             ] = self.oom_result.details["system_total_ram_kb"]
 
-        # TODO: Current RSS calculation based on process table is probably incorrect,
-        #       because it don't differentiates between processes and threads
-        total_rss_pages = 0
-        for pid in self.oom_result.details["_pstable"].keys():
-            # convert to int to satisfy Python for unit tests
-            total_rss_pages += int(
-                self.oom_result.details["_pstable"][pid]["rss_pages"]
-            )
-        self.oom_result.details["system_total_ram_used_kb"] = (
-            total_rss_pages * self.oom_result.details["page_size_kb"]
-        )
+        # threads are already combined with their process
+        total_rss_kb = 0
+        for process in self.oom_result.process_memory:
+            total_rss_kb += process["rss_kb"]
+        self.oom_result.details["system_total_ram_used_kb"] = total_rss_kb
 
         self.oom_result.details["system_total_used_percent"] = int(
             100
@@ -4755,6 +5753,8 @@ class OOMAnalyser:
         self._convert_numeric_results_to_integer()
         self._convert_pstable_values_to_integer()
         self._calc_pstable_values()
+        self._calc_process_memory()
+        self._calc_oom_badness()
 
         self._determinate_platform_and_distribution()
         self._calc_swap_values()
@@ -4769,8 +5769,51 @@ class OOMAnalyser:
             self._calc_trigger_process_values()
             self._calc_killed_process_values_kernel()
             self._search_node_with_memory_shortage()
+            self._calc_alloc_feasibility()
+            self._simulate_zonelist_walk()
             self._analyse_alloc_failure()
             self._check_for_memory_fragmentation()
+            self._calc_unreclaimable_slab_summary()
+
+    def _calc_unreclaimable_slab_summary(self):
+        """
+        Summarise the table of unreclaimable slab caches
+
+        This function fills:
+        * OOMResult.details["unreclaimable_slab_used_kb"] = int
+        * OOMResult.details["unreclaimable_slab_total_kb"] = int
+        * OOMResult.details["_unreclaimable_slab_top"] = List of dicts with
+          "name", "used_kb", "total_kb" and "percent" of the largest caches
+
+        The details are only set if the OOM contains the table.
+        """
+        slab = self.oom_result.unreclaimable_slab
+        count = len(slab["name"])
+        if not count:
+            return
+
+        used_kb = 0
+        total_kb = 0
+        for i in range(count):
+            used_kb += slab["used_kb"][i]
+            total_kb += slab["total_kb"][i]
+        self.oom_result.details["unreclaimable_slab_used_kb"] = used_kb
+        self.oom_result.details["unreclaimable_slab_total_kb"] = total_kb
+
+        # the columns are already sorted by the total size
+        top = []
+        for i in range(min(count, self.UNRECLAIMABLE_SLAB_TOP_N)):
+            top.append(
+                {
+                    "name": slab["name"][i],
+                    "used_kb": slab["used_kb"][i],
+                    "total_kb": slab["total_kb"][i],
+                    "percent": int(100 * slab["total_kb"][i] / total_kb)
+                    if total_kb
+                    else 0,
+                }
+            )
+        self.oom_result.details["_unreclaimable_slab_top"] = top
 
     def _set_oom_result_default_details(self):
         """Set default values for OOM results"""
@@ -0,0 +1,2090 @@
+#!/usr/bin/env python3
+
+# -*- coding: UTF-8 -*-
+#
+# Analyse OOM messages from many hosts outside the browser
+#
+# Copyright (c) 2025 Carsten Grohmann
+# License: MIT (see LICENSE.txt)
+# THIS PROGRAM COMES WITH NO WARRANTY
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import os
+import shelve
+import struct
+import zlib
+
+from types import SimpleNamespace
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import OOMAnalyser
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    411: "Length Required",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+"""Reason phrases for all HTTP status codes sent by the ingestion server"""
+
+ANALYSE_PATH = "/analyse"
+"""URL path to post OOM messages to"""
+
+
+def analyse_oom_text(text: str) -> Tuple[bool, OOMAnalyser.OOMResult]:
+    """
+    Analyse a single OOM message
+
+    This function runs in the worker processes. Every process has its own
+    copy of OOMAnalyser.AllKernelConfigs, therefore the kernel configurations
+    modified during the analysis are not shared between concurrent analyses.
+
+    @return: Success of the analysis and the analysis result
+    """
+    oom = OOMAnalyser.OOMEntity(text)
+    analyser = OOMAnalyser.OOMAnalyser(oom)
+    success = analyser.analyse()
+    return success, analyser.oom_result
+
+
+def oom_result_to_dict(oom_result: OOMAnalyser.OOMResult) -> Dict[str, Any]:
+    """Convert an analysis result into a JSON serialisable dictionary"""
+    details = oom_result.details
+    pstable = []
+    for pid in details.get("_pstable_index", []):
+        process = {"pid": pid}
+        process.update(details["_pstable"][pid])
+        pstable.append(process)
+
+    return {
+        "analyser_version": OOMAnalyser.VERSION,
+        "kernel_version": oom_result.kversion,
+        "kernel_config": "{}.{}{}".format(*oom_result.kconfig.release),
+        "oom_type": oom_result.oom_type,
+        "mem_alloc_failure": oom_result.mem_alloc_failure,
+        "mem_fragmented": oom_result.mem_fragmented,
+        "system_swap_active": oom_result.system_swap_active,
+        "details": {k: v for k, v in details.items() if not k.startswith("_")},
+        "pstable": pstable,
+        "buddyinfo": buddyinfo_to_dict(oom_result.buddyinfo),
+        "alloc_feasibility": alloc_feasibility_to_list(oom_result.alloc_feasibility),
+        "zonelist_walk": oom_result.zonelist_walk,
+        "node_meminfo": oom_result.node_meminfo,
+        "unreclaimable_slab": oom_result.unreclaimable_slab,
+        "cgroup_memory_stat": oom_result.cgroup_memory_stat,
+        "process_memory": oom_result.process_memory,
+        "process_memory_by_name": oom_result.process_memory_by_name,
+        "kill_candidates": oom_result.kill_candidates,
+        "kill_ranking": oom_result.kill_ranking,
+        "watermarks": oom_result.watermarks,
+    }
+
+
+ENCODING_MAGIC = b"OOMR"
+"""Magic bytes at the start of a binary encoded analysis result"""
+
+ENCODING_VERSION = 11
+"""Version of the binary encoding, increment it on every change of the layout or the schemas"""
+
+DETAILS_SCHEMA = (
+    "active_anon_pages",
+    "active_file_pages",
+    "bounce_pages",
+    "call_trace",
+    "cma_pages",
+    "dirty_pages",
+    "dist",
+    "free_cma_pages",
+    "free_pages",
+    "free_pcp_pages",
+    "hardware_info",
+    "highmem_pages",
+    "hwpoisoned_pages",
+    "inactive_anon_pages",
+    "inactive_file_pages",
+    "isolated_anon_pages",
+    "isolated_file_pages",
+    "kernel_version",
+    "killed_proc_anon_rss_kb",
+    "killed_proc_file_rss_kb",
+    "killed_proc_name",
+    "killed_proc_oom_score_adj",
+    "killed_proc_pgtables",
+    "killed_proc_pid",
+    "killed_proc_rss_percent",
+    "killed_proc_score",
+    "killed_proc_shmem_rss_kb",
+    "killed_proc_total_rss_kb",
+    "killed_proc_total_vm_kb",
+    "mapped_pages",
+    "mem_node_info",
+    "mem_watermarks",
+    "page_size_kb",
+    "pagecache_total_pages",
+    "pagetables_pages",
+    "platform",
+    "ram_pages",
+    "reserved_pages",
+    "shmem_pages",
+    "slab_reclaimable_pages",
+    "slab_unreclaimable_pages",
+    "system_swap_cache_kb",
+    "system_swap_free_kb",
+    "system_swap_total_kb",
+    "system_swap_used_kb",
+    "system_swap_used_percent",
+    "system_total_ram_kb",
+    "system_total_ram_used_kb",
+    "system_total_ramswap_kb",
+    "system_total_used_percent",
+    "trigger_proc_gfp_mask",
+    "trigger_proc_mem_zone",
+    "trigger_proc_name",
+    "trigger_proc_nodemask",
+    "trigger_proc_numa_node",
+    "trigger_proc_oomscore",
+    "trigger_proc_order",
+    "trigger_proc_pid",
+    "trigger_proc_requested_memory_kb",
+    "trigger_proc_requested_memory_pages",
+    "unevictable_pages",
+    "writeback_pages",
+)
+"""
+Details stored by position without their names in the binary encoding
+
+All other details are stored with their names.
+"""
+
+WATERMARK_FIELDS = ("free", "min", "low", "high")
+"""Scalar fields of a watermark entry"""
+
+MEMINFO_SCHEMA = (
+    "active_anon_kb",
+    "active_file_kb",
+    "all_unreclaimable",
+    "anon_thp_kb",
+    "boost_kb",
+    "bounce_kb",
+    "dirty_kb",
+    "free_cma_kb",
+    "free_kb",
+    "free_pcp_kb",
+    "high_kb",
+    "hugepages_free",
+    "hugepages_size_kb",
+    "hugepages_surp",
+    "hugepages_total",
+    "inactive_anon_kb",
+    "inactive_file_kb",
+    "isolated_anon_kb",
+    "isolated_file_kb",
+    "kernel_stack_kb",
+    "local_pcp_kb",
+    "low_kb",
+    "managed_kb",
+    "mapped_kb",
+    "min_kb",
+    "mlocked_kb",
+    "pages_scanned",
+    "pagetables_kb",
+    "present_kb",
+    "reserved_highatomic_kb",
+    "sec_pagetables_kb",
+    "shmem_kb",
+    "shmem_pmdmapped_kb",
+    "shmem_thp_kb",
+    "slab_reclaimable_kb",
+    "slab_unreclaimable_kb",
+    "unevictable_kb",
+    "unstable_kb",
+    "writeback_kb",
+    "writeback_tmp_kb",
+    "writepending_kb",
+)
+"""Known keys of the per-node, per-zone and hugepage values in OOMResult.node_meminfo"""
+
+CGROUP_MEMORY_STAT_SCHEMA = (
+    "active_anon",
+    "active_file",
+    "anon",
+    "anon_thp",
+    "file",
+    "file_dirty",
+    "file_mapped",
+    "file_thp",
+    "file_writeback",
+    "inactive_anon",
+    "inactive_file",
+    "kernel_stack",
+    "pagetables",
+    "percpu",
+    "pgactivate",
+    "pgdeactivate",
+    "pgfault",
+    "pglazyfree",
+    "pglazyfreed",
+    "pgmajfault",
+    "pgrefill",
+    "pgscan",
+    "pgsteal",
+    "shmem",
+    "shmem_thp",
+    "slab",
+    "slab_reclaimable",
+    "slab_unreclaimable",
+    "sock",
+    "swapcached",
+    "thp_collapse_alloc",
+    "thp_fault_alloc",
+    "unevictable",
+    "workingset_activate_anon",
+    "workingset_activate_file",
+    "workingset_nodereclaim",
+    "workingset_refault_anon",
+    "workingset_refault_file",
+    "workingset_restore_anon",
+    "workingset_restore_file",
+)
+"""Known keys of OOMResult.cgroup_memory_stat"""
+
+PROCESS_SUMMARY_SCHEMA = (
+    "badness",
+    "name",
+    "oom_score_adj",
+    "pgtables_kb",
+    "pid",
+    "points",
+    "processes",
+    "ram_percent",
+    "rss_kb",
+    "swap_kb",
+    "tgid",
+    "threads",
+    "total_kb",
+)
+"""
+Known columns of OOMResult.process_memory, OOMResult.process_memory_by_name
+and OOMResult.kill_candidates
+"""
+
+KILL_RANKING_SCHEMA = (
+    "adj_changed_outcome",
+    "expected_pid",
+    "expected_pid_without_adj",
+    "killed_as_expected",
+    "killed_pid",
+    "killed_rank",
+    "total_pages",
+)
+"""Known keys of OOMResult.kill_ranking"""
+
+ZONELIST_WALK_SCHEMA = ("free_kb", "node", "threshold_kb", "verdict", "zone")
+"""Known columns of OOMResult.zonelist_walk"""
+
+(
+    _TAG_NONE,
+    _TAG_FALSE,
+    _TAG_TRUE,
+    _TAG_INT,
+    _TAG_FLOAT,
+    _TAG_STR,
+    _TAG_JSON,
+    _TAG_ABSENT,
+) = range(8)
+_COLUMN_INT, _COLUMN_STR, _COLUMN_ANY = range(3)
+_MISSING = -(2**63)
+"""Placeholder for missing values in integer arrays"""
+_ABSENT = object()
+"""Placeholder for missing keys in decoded columns"""
+
+
+class _Encoder:
+    """
+    Write values into a buffer and collect all strings in a string table
+
+    Integers are written as variable-length integers (LEB128), signed
+    integers are zigzag encoded before.
+    """
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.strings = {}
+
+    def string_id(self, value: str) -> int:
+        if value not in self.strings:
+            self.strings[value] = len(self.strings)
+        return self.strings[value]
+
+    def pack(self, fmt: str, *values) -> None:
+        self.buf += struct.pack("<" + fmt, *values)
+
+    def uint(self, value: int) -> None:
+        while value > 0x7F:
+            self.buf.append(value & 0x7F | 0x80)
+            value >>= 7
+        self.buf.append(value)
+
+    def sint(self, value: int) -> None:
+        self.uint(value << 1 if value >= 0 else (-value << 1) - 1)
+
+    def key(self, key: str, schema: Tuple[str, ...]) -> None:
+        """Write the position of a known key or the string ID of an unknown key"""
+        if key in schema:
+            self.uint(schema.index(key))
+        else:
+            self.uint(len(schema) + self.string_id(key))
+
+    def ints(self, values: List[int]) -> None:
+        self.uint(len(values))
+        for value in values:
+            self.sint(value)
+
+    def strs(self, values: List[str]) -> None:
+        self.uint(len(values))
+        for value in values:
+            self.uint(self.string_id(value))
+
+    def value(self, value: Any) -> None:
+        if value is None:
+            self.pack("B", _TAG_NONE)
+        elif isinstance(value, bool):
+            self.pack("B", _TAG_TRUE if value else _TAG_FALSE)
+        elif isinstance(value, int):
+            self.pack("B", _TAG_INT)
+            self.sint(value)
+        elif isinstance(value, float):
+            self.pack("Bd", _TAG_FLOAT, value)
+        elif isinstance(value, (list, dict)):
+            self.pack("B", _TAG_JSON)
+            self.uint(self.string_id(json.dumps(value)))
+        else:
+            self.pack("B", _TAG_STR)
+            self.uint(self.string_id(str(value)))
+
+    def result(self) -> bytes:
+        table = _Encoder()
+        table.uint(len(self.strings))
+        for value in self.strings:
+            data = value.encode("utf-8")
+            table.uint(len(data))
+            table.buf += data
+        header = bytearray(ENCODING_MAGIC)
+        header += struct.pack("<B", ENCODING_VERSION)
+        return bytes(header + zlib.compress(bytes(table.buf + self.buf)))
+
+
+class _Decoder:
+    """Read values written by _Encoder"""
+
+    def __init__(self, data: bytes):
+        if data[:4] != ENCODING_MAGIC:
+            raise ValueError("Data is not an encoded analysis result")
+        version = data[4]
+        if version != ENCODING_VERSION:
+            raise ValueError(
+                "Unsupported encoding version {} (expect: {})".format(
+                    version, ENCODING_VERSION
+                )
+            )
+        try:
+            self.data = memoryview(zlib.decompress(data[5:]))
+        except zlib.error as e:
+            raise ValueError("Corrupt encoded analysis result: {}".format(e))
+        self.offset = 0
+        self.strings = []
+        for _ in range(self.uint()):
+            length = self.uint()
+            self.strings.append(
+                str(self.data[self.offset : self.offset + length], "utf-8")
+            )
+            self.offset += length
+
+    def unpack(self, fmt: str) -> tuple:
+        fmt = "<" + fmt
+        values = struct.unpack_from(fmt, self.data, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return values
+
+    def uint(self) -> int:
+        result = 0
+        shift = 0
+        while True:
+            byte = self.data[self.offset]
+            self.offset += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def sint(self) -> int:
+        value = self.uint()
+        return -((value + 1) >> 1) if value & 1 else value >> 1
+
+    def key(self, schema: Tuple[str, ...]) -> str:
+        index = self.uint()
+        if index < len(schema):
+            return schema[index]
+        return self.strings[index - len(schema)]
+
+    def ints(self) -> List[int]:
+        return [self.sint() for _ in range(self.uint())]
+
+    def strs(self) -> List[str]:
+        return [self.strings[self.uint()] for _ in range(self.uint())]
+
+    def value(self) -> Any:
+        (tag,) = self.unpack("B")
+        if tag == _TAG_NONE:
+            return None
+        if tag in (_TAG_FALSE, _TAG_TRUE):
+            return tag == _TAG_TRUE
+        if tag == _TAG_INT:
+            return self.sint()
+        if tag == _TAG_FLOAT:
+            return self.unpack("d")[0]
+        if tag == _TAG_JSON:
+            return json.loads(self.strings[self.uint()])
+        return self.strings[self.uint()]
+
+
+def _encode_details(enc: _Encoder, details: Dict[str, Any]) -> None:
+    """Encode the scalar details - schema fields first, followed by all others"""
+    present = [key in details for key in DETAILS_SCHEMA]
+    bitmap = sum(1 << i for i, p in enumerate(present) if p)
+    enc.uint(bitmap)
+    for key, p in zip(DETAILS_SCHEMA, present):
+        if p:
+            enc.value(details[key])
+
+    others = [
+        key
+        for key in details
+        if key not in DETAILS_SCHEMA and key not in ("_pstable", "_pstable_index")
+    ]
+    enc.uint(len(others))
+    for key in others:
+        enc.uint(enc.string_id(key))
+        enc.value(details[key])
+
+
+def _decode_details(dec: _Decoder) -> Dict[str, Any]:
+    details = {}
+    bitmap = dec.uint()
+    for i, key in enumerate(DETAILS_SCHEMA):
+        if bitmap & (1 << i):
+            details[key] = dec.value()
+    for _ in range(dec.uint()):
+        key = dec.strings[dec.uint()]
+        details[key] = dec.value()
+    return details
+
+
+def _encode_mapping(
+    enc: _Encoder, mapping: Dict[str, Any], schema: Tuple[str, ...]
+) -> None:
+    """Encode a flat dictionary in its order, known keys are stored by position"""
+    enc.uint(len(mapping))
+    for key, value in mapping.items():
+        enc.key(key, schema)
+        enc.value(value)
+
+
+def _decode_mapping(dec: _Decoder, schema: Tuple[str, ...]) -> Dict[str, Any]:
+    mapping = {}
+    for _ in range(dec.uint()):
+        key = dec.key(schema)
+        mapping[key] = dec.value()
+    return mapping
+
+
+def _encode_columns(
+    enc: _Encoder, rows: List[Dict[str, Any]], schema: Tuple[str, ...] = ()
+) -> None:
+    """
+    Encode a list of dictionaries column by column
+
+    Columns with integers or strings only are stored as arrays. Known
+    columns are stored by position.
+    """
+    columns = []
+    for row in rows:
+        for name in row:
+            if name not in columns:
+                columns.append(name)
+
+    enc.uint(len(rows))
+    enc.uint(len(columns))
+    for name in columns:
+        enc.key(name, schema)
+        if all(name in row and type(row[name]) is int for row in rows):
+            enc.pack("B", _COLUMN_INT)
+            enc.ints([row[name] for row in rows])
+        elif all(name in row and isinstance(row[name], str) for row in rows):
+            enc.pack("B", _COLUMN_STR)
+            enc.strs([row[name] for row in rows])
+        else:
+            enc.pack("B", _COLUMN_ANY)
+            for row in rows:
+                if name in row:
+                    enc.value(row[name])
+                else:
+                    enc.pack("B", _TAG_ABSENT)
+
+
+def _decode_columns(
+    dec: _Decoder, schema: Tuple[str, ...] = ()
+) -> List[Dict[str, Any]]:
+    rows = [{} for _ in range(dec.uint())]
+    for _ in range(dec.uint()):
+        name = dec.key(schema)
+        (kind,) = dec.unpack("B")
+        if kind == _COLUMN_INT:
+            values = dec.ints()
+        elif kind == _COLUMN_STR:
+            values = dec.strs()
+        else:
+            values = []
+            for _ in rows:
+                if dec.data[dec.offset] == _TAG_ABSENT:
+                    dec.offset += 1
+                    values.append(_ABSENT)
+                else:
+                    values.append(dec.value())
+        for row, value in zip(rows, values):
+            if value is not _ABSENT:
+                row[name] = value
+    return rows
+
+
+def _encode_pstable(enc: _Encoder, details: Dict[str, Any]) -> None:
+    """Encode the process table column by column"""
+    pids = details.get("_pstable_index", [])
+    enc.ints(pids)
+    _encode_columns(enc, [details["_pstable"][pid] for pid in pids])
+
+
+def _decode_pstable(dec: _Decoder, details: Dict[str, Any]) -> None:
+    pids = dec.ints()
+    rows = _decode_columns(dec)
+    if pids:
+        details["_pstable_index"] = pids
+        details["_pstable"] = dict(zip(pids, rows))
+
+
+def _encode_buddyinfo(enc: _Encoder, buddyinfo: Optional[OOMAnalyser.BuddyInfo]):
+    """
+    Encode the buddyinfo
+
+    Layout:
+     - presence byte, 0 for a missing buddyinfo without further data
+     - zone names, node numbers and the number of orders
+     - total free memory in kB per [zone][node], _MISSING for zone/node
+       pairs without data
+     - free chunks per [zone][node][order], zone/node pairs without data
+       are skipped
+    """
+    if buddyinfo is None:
+        enc.pack("B", 0)
+        return
+    enc.pack("B", 1)
+    enc.strs(buddyinfo.zones)
+    enc.ints(buddyinfo.nodes)
+    enc.uint(buddyinfo.max_order)
+    total_free_kb = []
+    counts = []
+    for zone in buddyinfo.zones:
+        for node in buddyinfo.nodes:
+            kb = buddyinfo.total_free_kb(zone, node)
+            total_free_kb.append(_MISSING if kb is None else kb)
+            if kb is not None:
+                counts.extend(
+                    buddyinfo.free_chunks(zone, order, node)
+                    for order in range(buddyinfo.max_order)
+                )
+    enc.ints(total_free_kb)
+    enc.ints(counts)
+
+
+def _decode_buddyinfo(dec: _Decoder) -> Optional[OOMAnalyser.BuddyInfo]:
+    (present,) = dec.unpack("B")
+    if not present:
+        return None
+    zones = dec.strs()
+    nodes = dec.ints()
+    max_order = dec.uint()
+    total_free_kb = iter(dec.ints())
+    counts = dec.ints()
+    buddyinfo = OOMAnalyser.BuddyInfo()
+    pos = 0
+    for zone in zones:
+        for node in nodes:
+            kb = next(total_free_kb)
+            if kb == _MISSING:
+                continue
+            buddyinfo.add_zone_usage(zone, node, kb, counts[pos : pos + max_order])
+            pos += max_order
+    buddyinfo.build()
+    return buddyinfo
+
+
+def buddyinfo_to_dict(buddyinfo: Optional[OOMAnalyser.BuddyInfo]) -> Dict[str, Any]:
+    """
+    Convert the buddyinfo into a JSON serialisable dictionary
+
+    @return: Dictionary with [zone]["free_chunks"][node] = list of free chunks per order,
+             [zone]["total_free_kb"][node] = total free memory in kB and the
+             fragmentation indices per order in the same layout as the free chunks
+    """
+    if buddyinfo is None:
+        return {}
+    result = {}
+    for zone in buddyinfo.zones:
+        result[zone] = {
+            "free_chunks": {},
+            "fragmentation_index": {},
+            "total_free_kb": {},
+            "unusable_free_index": {},
+        }
+        for node in buddyinfo.nodes:
+            kb = buddyinfo.total_free_kb(zone, node)
+            if kb is None:
+                continue
+            result[zone]["total_free_kb"][node] = kb
+            orders = range(buddyinfo.max_order)
+            result[zone]["free_chunks"][node] = [
+                buddyinfo.free_chunks(zone, order, node) for order in orders
+            ]
+            result[zone]["unusable_free_index"][node] = [
+                buddyinfo.unusable_free_index(zone, order, node) for order in orders
+            ]
+            result[zone]["fragmentation_index"][node] = [
+                buddyinfo.fragmentation_index(zone, order, node) for order in orders
+            ]
+    return result
+
+
+def _encode_watermarks(enc: _Encoder, watermarks: Dict) -> None:
+    entries = [(zone, node) for zone in watermarks for node in watermarks[zone]]
+    enc.uint(len(entries))
+    for zone, node in entries:
+        wmark = watermarks[zone][node]
+        enc.uint(enc.string_id(zone))
+        enc.sint(node)
+        enc.ints([wmark.get(field, _MISSING) for field in WATERMARK_FIELDS])
+        enc.ints(wmark.get("lowmem_reserve", []))
+
+
+def _decode_watermarks(dec: _Decoder) -> Dict:
+    watermarks = {}
+    for _ in range(dec.uint()):
+        zone = dec.strings[dec.uint()]
+        node = dec.sint()
+        values = dec.ints()
+        wmark = {f: v for f, v in zip(WATERMARK_FIELDS, values) if v != _MISSING}
+        reserve = dec.ints()
+        if reserve:
+            wmark["lowmem_reserve"] = reserve
+        watermarks.setdefault(zone, {})[node] = wmark
+    return watermarks
+
+
+def _encode_node_meminfo(enc: _Encoder, node_meminfo: Dict) -> None:
+    """Encode the per-node values, their zones and hugepage pools"""
+    enc.uint(len(node_meminfo))
+    for node, meminfo in node_meminfo.items():
+        enc.sint(node)
+        _encode_mapping(
+            enc,
+            {
+                key: value
+                for key, value in meminfo.items()
+                if key not in ("zones", "hugepages")
+            },
+            MEMINFO_SCHEMA,
+        )
+        zones = meminfo.get("zones", {})
+        enc.uint(len(zones))
+        for zone, values in zones.items():
+            enc.uint(enc.string_id(zone))
+            _encode_mapping(enc, values, MEMINFO_SCHEMA)
+        _encode_columns(enc, meminfo.get("hugepages", []), MEMINFO_SCHEMA)
+
+
+def _decode_node_meminfo(dec: _Decoder) -> Dict:
+    node_meminfo = {}
+    for _ in range(dec.uint()):
+        node = dec.sint()
+        values = _decode_mapping(dec, MEMINFO_SCHEMA)
+        zones = {}
+        for _ in range(dec.uint()):
+            zone = dec.strings[dec.uint()]
+            zones[zone] = _decode_mapping(dec, MEMINFO_SCHEMA)
+        meminfo = {"zones": zones, "hugepages": _decode_columns(dec, MEMINFO_SCHEMA)}
+        meminfo.update(values)
+        node_meminfo[node] = meminfo
+    return node_meminfo
+
+
+def _encode_unreclaimable_slab(enc: _Encoder, slab: Dict[str, List]) -> None:
+    enc.strs(slab.get("name", []))
+    enc.ints(slab.get("used_kb", []))
+    enc.ints(slab.get("total_kb", []))
+
+
+def _decode_unreclaimable_slab(dec: _Decoder) -> Dict[str, List]:
+    return {"name": dec.strs(), "used_kb": dec.ints(), "total_kb": dec.ints()}
+
+
+def _encode_alloc_feasibility(
+    enc: _Encoder, feasibility: Optional[OOMAnalyser.AllocationFeasibility]
+) -> None:
+    """
+    Encode the free memory and the watermark threshold per [zone][node]
+
+    The verdicts aren't stored. They are calculated again from the buddyinfo
+    while decoding.
+    """
+    if feasibility is None:
+        enc.pack("B", 0)
+        return
+    enc.pack("B", 1)
+    enc.strs(feasibility.zones)
+    enc.ints(feasibility.nodes)
+    enc.uint(feasibility.max_order)
+    free_kb = []
+    threshold_kb = []
+    for zone in feasibility.zones:
+        for node in feasibility.nodes:
+            threshold = feasibility.threshold_kb(zone, node)
+            free_kb.append(
+                _MISSING if threshold is None else feasibility.free_kb(zone, node)
+            )
+            threshold_kb.append(_MISSING if threshold is None else threshold)
+    enc.ints(free_kb)
+    enc.ints(threshold_kb)
+
+
+def _decode_alloc_feasibility(
+    dec: _Decoder, buddyinfo: Optional[OOMAnalyser.BuddyInfo]
+) -> Optional[OOMAnalyser.AllocationFeasibility]:
+    (present,) = dec.unpack("B")
+    if not present:
+        return None
+    zones = dec.strs()
+    nodes = dec.ints()
+    max_order = dec.uint()
+    free_kb = iter(dec.ints())
+    threshold_kb = iter(dec.ints())
+    feasibility = OOMAnalyser.AllocationFeasibility(zones, nodes, max_order)
+    for zone in zones:
+        for node in nodes:
+            free = next(free_kb)
+            threshold = next(threshold_kb)
+            if threshold != _MISSING:
+                feasibility.set_zone_node(zone, node, free, threshold, buddyinfo)
+    return feasibility
+
+
+def encode_oom_result(oom_result: OOMAnalyser.OOMResult) -> bytes:
+    """
+    Encode an analysis result into a compact versioned binary format
+
+    Layout:
+     - magic and encoding version, followed by the zlib compressed data
+     - string table
+     - result attributes
+     - details: schema fields by position, other details with names,
+       lists and dictionaries as JSON
+     - process table: one array per column
+     - buddyinfo: free chunks per [zone][node][order] without missing
+       zone/node pairs
+     - watermarks
+     - node Mem-Info
+     - unreclaimable slab caches
+     - cgroup memory.stat
+     - process memory per process and per name: one array per column
+     - kill candidates: one array per column, followed by the kill ranking
+     - allocation feasibility without the verdicts
+     - zonelist walk: one array per column
+
+    All strings are stored once in the string table and referenced by their
+    index. Known keys are stored by their position in the schemas. Integers
+    are stored as variable-length integers. The original OOM text is
+    included.
+
+    @see: decode_oom_result(), DETAILS_SCHEMA
+    """
+    enc = _Encoder()
+    for value in (
+        oom_result.kversion,
+        oom_result.kconfig.name,
+        oom_result.oom_type,
+        oom_result.mem_alloc_failure,
+        oom_result.mem_fragmented,
+        oom_result.system_swap_active,
+        oom_result.oom_text,
+        oom_result.error_msg,
+    ):
+        enc.value(value)
+    _encode_details(enc, oom_result.details)
+    _encode_pstable(enc, oom_result.details)
+    _encode_buddyinfo(enc, oom_result.buddyinfo)
+    _encode_watermarks(enc, oom_result.watermarks)
+    _encode_node_meminfo(enc, oom_result.node_meminfo)
+    _encode_unreclaimable_slab(enc, oom_result.unreclaimable_slab)
+    _encode_mapping(enc, oom_result.cgroup_memory_stat, CGROUP_MEMORY_STAT_SCHEMA)
+    _encode_columns(enc, oom_result.process_memory, PROCESS_SUMMARY_SCHEMA)
+    _encode_columns(enc, oom_result.process_memory_by_name, PROCESS_SUMMARY_SCHEMA)
+    _encode_columns(enc, oom_result.kill_candidates, PROCESS_SUMMARY_SCHEMA)
+    _encode_mapping(enc, oom_result.kill_ranking, KILL_RANKING_SCHEMA)
+    _encode_alloc_feasibility(enc, oom_result.alloc_feasibility)
+    _encode_columns(enc, oom_result.zonelist_walk, ZONELIST_WALK_SCHEMA)
+    return enc.result()
+
+
+def decode_oom_result(data: bytes) -> OOMAnalyser.OOMResult:
+    """
+    Decode an analysis result encoded by encode_oom_result()
+
+    The kernel configuration is looked up by its name. The OOM entity is
+    not restored.
+
+    @raise ValueError: Unknown data format or encoding version
+    """
+    dec = _Decoder(data)
+    oom_result = OOMAnalyser.OOMResult()
+    oom_result.kversion = dec.value()
+    kconfig_name = dec.value()
+    for kconfig in OOMAnalyser.AllKernelConfigs:
+        if kconfig.name == kconfig_name:
+            oom_result.kconfig = kconfig
+            break
+    oom_result.oom_type = dec.value()
+    oom_result.mem_alloc_failure = dec.value()
+    oom_result.mem_fragmented = dec.value()
+    oom_result.system_swap_active = dec.value()
+    oom_result.oom_text = dec.value()
+    oom_result.error_msg = dec.value()
+    oom_result.details = _decode_details(dec)
+    _decode_pstable(dec, oom_result.details)
+    oom_result.buddyinfo = _decode_buddyinfo(dec)
+    oom_result.watermarks = _decode_watermarks(dec)
+    oom_result.node_meminfo = _decode_node_meminfo(dec)
+    oom_result.unreclaimable_slab = _decode_unreclaimable_slab(dec)
+    oom_result.cgroup_memory_stat = _decode_mapping(dec, CGROUP_MEMORY_STAT_SCHEMA)
+    oom_result.process_memory = _decode_columns(dec, PROCESS_SUMMARY_SCHEMA)
+    oom_result.process_memory_by_name = _decode_columns(dec, PROCESS_SUMMARY_SCHEMA)
+    oom_result.kill_candidates = _decode_columns(dec, PROCESS_SUMMARY_SCHEMA)
+    oom_result.kill_ranking = _decode_mapping(dec, KILL_RANKING_SCHEMA)
+    oom_result.alloc_feasibility = _decode_alloc_feasibility(dec, oom_result.buddyinfo)
+    oom_result.zonelist_walk = _decode_columns(dec, ZONELIST_WALK_SCHEMA)
+    return oom_result
+
+
+def write_oom_results(fh: BinaryIO, oom_results: Iterable[OOMAnalyser.OOMResult]):
+    """Append encoded analysis results with a length prefix to a binary file"""
+    for oom_result in oom_results:
+        data = encode_oom_result(oom_result)
+        fh.write(struct.pack("<I", len(data)))
+        fh.write(data)
+
+
+def read_oom_results(fh: BinaryIO) -> Iterator[OOMAnalyser.OOMResult]:
+    """Return all analysis results written by write_oom_results()"""
+    while True:
+        prefix = fh.read(4)
+        if not prefix:
+            break
+        (length,) = struct.unpack("<I", prefix)
+        yield decode_oom_result(fh.read(length))
+
+
+def oom_text_key(text: str) -> str:
+    """
+    Return the cache key of an OOM message
+
+    The key is the SHA-256 hash of the normalised OOM text after stripping
+    all line prefixes like timestamps and host names. Therefore, the same
+    OOM collected from syslog, journal or a support bundle gets the same key.
+    """
+    oom = OOMAnalyser.OOMEntity(text)
+    return hashlib.sha256(oom.text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache for analysis results
+
+    The results are stored in a LRU-bounded in-memory layer. Optionally,
+    all results are also stored in a shelve file to reuse them after a
+    restart. Entries of the shelve file are not evicted.
+
+    The fleet report caches only the small summaries of the results.
+
+    @see: oom_text_key(), analyse_and_summarise()
+    """
+
+    def __init__(self, max_entries: int = 1024, filename: Optional[str] = None):
+        """
+        @param max_entries: Maximum number of results kept in memory
+        @param filename: Name of the shelve file or None to cache in memory only
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lru = collections.OrderedDict()
+        self._shelf = shelve.open(filename) if filename else None
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def get(self, key: str) -> Optional[Tuple[bool, Any]]:
+        """Return the cached result or None"""
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            self.hits += 1
+            return self._lru[key]
+
+        if self._shelf is not None and key in self._shelf:
+            value = self._shelf[key]
+            self._store_in_memory(key, value)
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Tuple[bool, Any]) -> None:
+        """Store an analysis result"""
+        self._store_in_memory(key, value)
+        if self._shelf is not None:
+            self._shelf[key] = value
+
+    def close(self) -> None:
+        """Write pending changes and close the shelve file"""
+        if self._shelf is not None:
+            self._shelf.close()
+            self._shelf = None
+
+    def _store_in_memory(self, key: str, value: Tuple[bool, Any]) -> None:
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+
+AGGREGATION_DIMENSIONS = (
+    "kernel_version",
+    "dist",
+    "platform",
+    "oom_type",
+    "killed_proc_name",
+    "trigger_proc_gfp_mask",
+    "mem_alloc_failure",
+)
+"""Attributes of an OOM to group the fleet report by"""
+
+
+def summarise_oom_result(
+    oom_result: OOMAnalyser.OOMResult, source: str = ""
+) -> Dict[str, Any]:
+    """
+    Return the small subset of an analysis result needed for the fleet report
+
+    Only this summary is transferred from the worker processes and kept
+    until it's added to the aggregation. The complete OOMResult object is
+    released right after the analysis.
+
+    @param oom_result: Analysis result
+    @param source: Origin of the OOM like the file name
+    @see: analyse_and_summarise(), FleetAggregator.add()
+    """
+    details = oom_result.details
+    return {
+        "kernel_version": oom_result.kversion,
+        "dist": details.get("dist"),
+        "platform": details.get("platform"),
+        "oom_type": oom_result.oom_type,
+        "killed_proc_name": details.get("killed_proc_name"),
+        "killed_proc_pid": details.get("killed_proc_pid"),
+        "killed_proc_total_rss_kb": details.get("killed_proc_total_rss_kb"),
+        "trigger_proc_gfp_mask": details.get("trigger_proc_gfp_mask"),
+        "mem_alloc_failure": oom_result.mem_alloc_failure,
+        "cgroup_path": details.get("cgroup_path"),
+        "cgroup_memory_usage_kb": details.get("cgroup_memory_usage_kb"),
+        "cgroup_memory_limit_kb": details.get("cgroup_memory_limit_kb"),
+        "source": source,
+    }
+
+
+def analyse_and_summarise(text: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """
+    Analyse a single OOM message and return its summary
+
+    This function runs in the worker processes. The summary doesn't contain
+    the source of the OOM, therefore identical OOMs share the same summary.
+
+    @return: Success of the analysis and the summary or None on failure
+    @see: summarise_oom_result()
+    """
+    success, oom_result = analyse_oom_text(text)
+    if not success:
+        return False, None
+    return True, summarise_oom_result(oom_result)
+
+
+class QuantileSketch:
+    """
+    Approximate percentiles of non-negative values in constant memory
+
+    The values are counted in logarithmic buckets. All values in a bucket
+    differ by less than the given relative error. Therefore, the number of
+    buckets only depends on the value range, not on the number of values.
+    """
+
+    def __init__(self, relative_error: float = 0.01):
+        """
+        @param relative_error: Maximum relative error of the returned percentiles
+        """
+        self._gamma = (1 + relative_error) / (1 - relative_error)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets = {}
+        self._zeros = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        """Add a single value"""
+        self.count += 1
+        if value <= 0:
+            self._zeros += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Return the approximated percentile or None if no value was added
+
+        @param p: Percentile between 0 and 100
+        """
+        if not self.count:
+            return None
+        rank = p / 100 * (self.count - 1)
+        seen = self._zeros
+        if rank < seen:
+            return 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if rank < seen:
+                return 2 * self._gamma**index / (self._gamma + 1)
+        return 2 * self._gamma ** max(self._buckets) / (self._gamma + 1)
+
+
+class GroupStats:
+    """Streaming statistics of a single group in the fleet report"""
+
+    PERCENTILES = (50, 90, 99)
+    """Percentiles of killed_proc_total_rss_kb shown in the report"""
+
+    def __init__(self, top: int = 5):
+        """
+        @param top: Number of top offenders to keep
+        """
+        self.count = 0
+        self.rss_kb = QuantileSketch()
+        self.rss_kb_max = 0
+        self._top = top
+        self._offenders = []
+        self._seq = 0
+
+    def add(self, summary: Dict[str, Any]) -> None:
+        """Add the summary of a single OOM"""
+        self.count += 1
+        rss_kb = summary["killed_proc_total_rss_kb"]
+        if rss_kb is None:
+            return
+        self.rss_kb.add(rss_kb)
+        self.rss_kb_max = max(self.rss_kb_max, rss_kb)
+
+        # Min-heap of the largest killed processes. The sequence number
+        # avoids comparing the dictionaries for identical sizes.
+        self._seq += 1
+        offender = (
+            rss_kb,
+            self._seq,
+            {
+                "killed_proc_name": summary["killed_proc_name"],
+                "killed_proc_pid": summary["killed_proc_pid"],
+                "killed_proc_total_rss_kb": rss_kb,
+                "source": summary["source"],
+            },
+        )
+        if len(self._offenders) < self._top:
+            heapq.heappush(self._offenders, offender)
+        elif offender[0] > self._offenders[0][0]:
+            heapq.heapreplace(self._offenders, offender)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the statistics as JSON serialisable dictionary"""
+        percentiles = {}
+        for p in self.PERCENTILES:
+            value = self.rss_kb.percentile(p)
+            if value is not None:
+                # the bucket midpoint may exceed the largest value
+                value = min(round(value), self.rss_kb_max)
+            percentiles["p{}".format(p)] = value
+        return {
+            "count": self.count,
+            "killed_proc_total_rss_kb": dict(percentiles, max=self.rss_kb_max),
+            "top_offenders": [
+                o[2] for o in sorted(self._offenders, key=lambda o: (-o[0], o[1]))
+            ],
+        }
+
+
+class CgroupTrie:
+    """
+    Hierarchy of the cgroups of many cgroup OOMs
+
+    Every node represents a cgroup path prefix like "/kubepods/burstable" and
+    aggregates all OOMs in this cgroup and below. Adding an OOM visits only
+    the nodes along its path.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.peak_usage_ratio = None
+        self.peak_source = None
+        self.children = {}
+
+    @staticmethod
+    def split_path(path: str) -> List[str]:
+        """Return the components of a cgroup path without empty components"""
+        return [component for component in path.split("/") if component]
+
+    def add(
+        self, path: str, usage_ratio: Optional[float] = None, source: str = ""
+    ) -> None:
+        """
+        Add a single cgroup OOM
+
+        @param path: Cgroup path like "/kubepods/burstable/pod<uid>/<container>"
+        @param usage_ratio: Memory usage divided by the memory limit of the cgroup
+        @param source: Origin of the OOM like the file name
+        """
+        node = self
+        node._update(usage_ratio, source)
+        for component in self.split_path(path):
+            child = node.children.get(component)
+            if child is None:
+                child = node.children[component] = CgroupTrie()
+            node = child
+            node._update(usage_ratio, source)
+
+    def _update(self, usage_ratio: Optional[float], source: str) -> None:
+        """Count an OOM and track the peak usage ratio of this node"""
+        self.count += 1
+        if usage_ratio is not None and (
+            self.peak_usage_ratio is None or usage_ratio > self.peak_usage_ratio
+        ):
+            self.peak_usage_ratio = usage_ratio
+            self.peak_source = source
+
+    def find(self, prefix: str) -> Optional["CgroupTrie"]:
+        """
+        Return the node of the given cgroup path prefix or None if unknown
+
+        @param prefix: Cgroup path like "/kubepods/burstable"
+        """
+        node = self
+        for component in self.split_path(prefix):
+            node = node.children.get(component)
+            if node is None:
+                return None
+        return node
+
+    def to_dict(self, max_depth: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Return this node and its children as JSON serialisable dictionary
+
+        The children are sorted by their number of OOMs.
+
+        @param max_depth: Number of child levels to include, unlimited if None
+        """
+        result = {
+            "count": self.count,
+            "peak_usage_ratio": self.peak_usage_ratio,
+            "peak_source": self.peak_source,
+        }
+        if max_depth is None or max_depth > 0:
+            depth = None if max_depth is None else max_depth - 1
+            result["children"] = {
+                name: child.to_dict(depth)
+                for name, child in sorted(
+                    self.children.items(), key=lambda i: (-i[1].count, i[0])
+                )
+            }
+        return result
+
+
+def cgroup_usage_ratio(summary: Dict[str, Any]) -> Optional[float]:
+    """
+    Return the memory usage of the cgroup divided by its limit
+
+    @param summary: Summary of a single OOM
+    @return: Ratio or None if the cgroup has no usable limit
+    @see: summarise_oom_result()
+    """
+    usage = summary.get("cgroup_memory_usage_kb")
+    limit = summary.get("cgroup_memory_limit_kb")
+    if not isinstance(usage, int) or not isinstance(limit, int) or limit <= 0:
+        return None
+    return usage / limit
+
+
+class FleetAggregator:
+    """
+    Group analysis results of many OOMs by their attributes
+
+    This is a streaming reduction: every group keeps only a counter, a
+    quantile sketch and a bounded list of top offenders. Therefore, the
+    memory usage doesn't grow with the number of added OOMs.
+
+    @see: AGGREGATION_DIMENSIONS
+    @see: summarise_oom_result()
+    """
+
+    def __init__(
+        self, dimensions: Iterable[str] = AGGREGATION_DIMENSIONS, top: int = 5
+    ):
+        """
+        @param dimensions: Attributes to group the OOMs by
+        @param top: Number of top offenders per group
+        """
+        self.dimensions = tuple(dimensions)
+        self.top = top
+        self.total = 0
+        self.failed = 0
+        self._groups = {dimension: {} for dimension in self.dimensions}
+        self.cgroups = CgroupTrie()
+
+    def add(self, summary: Dict[str, Any]) -> None:
+        """Add the summary of a successfully analysed OOM"""
+        self.total += 1
+        if isinstance(summary.get("cgroup_path"), str):
+            self.cgroups.add(
+                summary["cgroup_path"], cgroup_usage_ratio(summary), summary["source"]
+            )
+        for dimension in self.dimensions:
+            value = summary[dimension]
+            value = "<unknown>" if value is None else str(value)
+            groups = self._groups[dimension]
+            if value not in groups:
+                groups[value] = GroupStats(self.top)
+            groups[value].add(summary)
+
+    def add_failed(self) -> None:
+        """Count an OOM that couldn't be analysed"""
+        self.failed += 1
+
+    def report(
+        self, cgroup_prefix: str = "/", cgroup_depth: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Return the aggregated statistics sorted by group size
+
+        @param cgroup_prefix: Report only the cgroup hierarchy below this path
+        @param cgroup_depth: Number of cgroup levels to report, unlimited if None
+        """
+        groups = {}
+        for dimension in self.dimensions:
+            groups[dimension] = {
+                value: stats.to_dict()
+                for value, stats in sorted(
+                    self._groups[dimension].items(), key=lambda i: (-i[1].count, i[0])
+                )
+            }
+        cgroups = self.cgroups.find(cgroup_prefix)
+        return {
+            "analyser_version": OOMAnalyser.VERSION,
+            "total": self.total,
+            "failed": self.failed,
+            "groups": groups,
+            "cgroups": None if cgroups is None else cgroups.to_dict(cgroup_depth),
+        }
+
+
+def split_oom_blocks(lines: Iterable[str], max_lines: int = 10000) -> Iterator[str]:
+    """
+    Split a log file into single OOM messages
+
+    An OOM message starts with the line containing "invoked oom-killer:" and
+    ends with the line containing "Killed process". Lines of other messages
+    in between are removed later by OOMAnalyser.OOMEntity.
+
+    @param lines: Lines of the log file
+    @param max_lines: Drop incomplete blocks after this number of lines
+    """
+    block = None
+    for line in lines:
+        if "invoked oom-killer:" in line:
+            block = [line]
+        elif block is not None:
+            block.append(line)
+            if "Killed process" in line:
+                yield "".join(block)
+                block = None
+            elif len(block) > max_lines:
+                block = None
+
+
+def read_oom_blocks(filenames: List[str]) -> Iterator[Tuple[str, str]]:
+    """Return source and text of all OOM messages in the given files"""
+    for filename in filenames:
+        with open(filename, encoding="utf-8", errors="replace") as fh:
+            for index, text in enumerate(split_oom_blocks(fh)):
+                yield "{}#{}".format(filename, index + 1), text
+
+
+def _analyse_with_cache(
+    executor: concurrent.futures.Executor,
+    texts: List[str],
+    cache: ResultCache,
+    summarise: bool,
+) -> List[Tuple[bool, Any]]:
+    """
+    Return the analysis results or summaries of the given OOM messages
+
+    The cache keys are calculated in the worker processes. Only OOM messages
+    unknown to the cache are analysed, identical messages only once.
+    Failed analyses aren't cached. Summaries are cached with the prefix
+    "summary:" to keep them apart from complete results in a shared cache
+    file.
+    """
+    func = analyse_and_summarise if summarise else analyse_oom_text
+    prefix = "summary:" if summarise else ""
+    keys = [prefix + key for key in executor.map(oom_text_key, texts, chunksize=16)]
+    results = {}
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key in results or key in missing:
+            continue
+        cached = cache.get(key)
+        if cached is None:
+            missing[key] = text
+        else:
+            results[key] = cached
+
+    for key, result in zip(missing, executor.map(func, missing.values(), chunksize=16)):
+        results[key] = result
+        if result[0]:
+            cache.put(key, result)
+    return [results[key] for key in keys]
+
+
+def analyse_files(
+    filenames: List[str],
+    workers: Optional[int],
+    cache: Optional[ResultCache] = None,
+    summarise: bool = False,
+) -> Iterator[Tuple[str, bool, Any]]:
+    """
+    Analyse all OOM messages in the given files in a pool of worker processes
+
+    @param filenames: Log files containing OOM messages
+    @param workers: Number of worker processes, defaults to the number of CPUs
+    @param cache: Cache for analysis results or None to disable caching
+    @param summarise: Return the summaries of the results without the source
+                      instead of the complete results
+    @return: Source, success and result or summary of each OOM message in the order of the OOM messages
+    @see: analyse_and_summarise()
+    """
+    func = analyse_and_summarise if summarise else analyse_oom_text
+    jobs = read_oom_blocks(filenames)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        # Submit the jobs in batches, because Executor.map() consumes the
+        # whole input at once.
+        while True:
+            batch = list(itertools.islice(jobs, 1024))
+            if not batch:
+                break
+            texts = [text for _, text in batch]
+            if cache is None:
+                results = executor.map(func, texts, chunksize=16)
+            else:
+                results = _analyse_with_cache(executor, texts, cache, summarise)
+            for (source, _), (success, result) in zip(batch, results):
+                yield source, success, result
+
+
+def open_result_cache(cfg: SimpleNamespace) -> Optional[ResultCache]:
+    """Return the result cache configured on the command line or None"""
+    if not cfg.cache_size:
+        return None
+    return ResultCache(cfg.cache_size, cfg.cache_file)
+
+
+def report(cfg: SimpleNamespace) -> Dict[str, Any]:
+    """Analyse all OOM messages in the given files and return the fleet report"""
+    aggregator = FleetAggregator(top=cfg.top)
+    cache = open_result_cache(cfg)
+    try:
+        for source, success, summary in analyse_files(
+            cfg.files, cfg.workers, cache, summarise=True
+        ):
+            if success:
+                aggregator.add(dict(summary, source=source))
+            else:
+                aggregator.add_failed()
+    finally:
+        if cache:
+            cache.close()
+    return aggregator.report(cfg.cgroup_prefix, cfg.cgroup_depth)
+
+
+PARQUET_STRING_DETAILS = {
+    "call_trace",
+    "dist",
+    "hardware_info",
+    "kernel_version",
+    "killed_proc_name",
+    "killed_proc_oom_score_adj",
+    "killed_proc_pgtables",
+    "mem_node_info",
+    "mem_watermarks",
+    "platform",
+    "trigger_proc_gfp_mask",
+    "trigger_proc_mem_zone",
+    "trigger_proc_name",
+    "trigger_proc_nodemask",
+}
+"""Details from DETAILS_SCHEMA exported as strings"""
+
+PARQUET_FLOAT_DETAILS = {
+    "trigger_proc_requested_memory_kb",
+    "trigger_proc_requested_memory_pages",
+}
+"""
+Details from DETAILS_SCHEMA exported as floats, all others are exported as
+integers. Values that can't be converted like "<not found>" are exported as
+null.
+"""
+
+PARQUET_PROCESS_COLUMNS = (
+    ("pid", "int64"),
+    ("uid", "int64"),
+    ("tgid", "int64"),
+    ("total_vm_pages", "int64"),
+    ("rss_pages", "int64"),
+    ("nr_ptes_pages", "int64"),
+    ("pgtables_bytes", "int64"),
+    ("swapents_pages", "int64"),
+    ("oom_score_adj", "int64"),
+    ("name", "string"),
+    ("notes", "string"),
+)
+"""Columns of the exported process table"""
+
+
+class ParquetExporter:
+    """
+    Export analysis results into two Parquet files
+
+    ooms.parquet contains one row per OOM with the result attributes and all
+    details from DETAILS_SCHEMA. processes.parquet contains one row per
+    process of the process tables. Both are linked by the column oom_id.
+
+    The rows are buffered and written as row groups. Therefore, only the
+    rows of the current row group of each file are kept in memory.
+
+    This class requires the optional package pyarrow.
+    """
+
+    def __init__(self, directory: str, row_group_size: int = 10000):
+        """
+        @param directory: Existing directory to write the Parquet files into
+        @param row_group_size: Number of rows per row group of each file
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError(
+                "The Parquet export requires the Python package pyarrow"
+            ) from None
+        self._pa = pyarrow
+
+        self.row_group_size = row_group_size
+        self.count = 0
+
+        oom_types = [
+            ("oom_id", "int64"),
+            ("source", "string"),
+            ("kernel_config", "string"),
+            ("oom_type", "string"),
+            ("mem_alloc_failure", "string"),
+            ("mem_fragmented", "bool"),
+            ("system_swap_active", "bool"),
+        ]
+        for key in DETAILS_SCHEMA:
+            if key in PARQUET_STRING_DETAILS:
+                oom_types.append((key, "string"))
+            elif key in PARQUET_FLOAT_DETAILS:
+                oom_types.append((key, "float64"))
+            else:
+                oom_types.append((key, "int64"))
+        process_types = [("oom_id", "int64")] + list(PARQUET_PROCESS_COLUMNS)
+
+        self._tables = {}
+        for name, types in (("ooms", oom_types), ("processes", process_types)):
+            schema = pyarrow.schema(
+                [(column, pyarrow.type_for_alias(t)) for column, t in types]
+            )
+            writer = pyarrow.parquet.ParquetWriter(
+                os.path.join(directory, "{}.parquet".format(name)), schema
+            )
+            self._tables[name] = (schema, writer, {column: [] for column, _ in types})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, oom_result: OOMAnalyser.OOMResult, source: str = "") -> int:
+        """
+        Add a successfully analysed OOM
+
+        @return: ID of the OOM in both tables
+        """
+        oom_id = self.count
+        self.count += 1
+        details = oom_result.details
+
+        _, _, columns = self._tables["ooms"]
+        row = {
+            "oom_id": oom_id,
+            "source": source,
+            "kernel_config": oom_result.kconfig.name,
+            "oom_type": oom_result.oom_type,
+            "mem_alloc_failure": oom_result.mem_alloc_failure,
+            "mem_fragmented": oom_result.mem_fragmented,
+            "system_swap_active": oom_result.system_swap_active,
+        }
+        for key in DETAILS_SCHEMA:
+            row[key] = self._convert(key, details.get(key))
+        for column, values in columns.items():
+            values.append(row[column])
+
+        _, _, columns = self._tables["processes"]
+        for pid in details.get("_pstable_index", []):
+            process = details["_pstable"][pid]
+            columns["oom_id"].append(oom_id)
+            for column, _ in PARQUET_PROCESS_COLUMNS:
+                value = pid if column == "pid" else process.get(column)
+                columns[column].append(value)
+
+        # Each table is flushed by its own row count, because a single OOM
+        # adds hundreds of rows to processes.parquet.
+        for name in self._tables:
+            self._flush_table(name, only_full_groups=True)
+        return oom_id
+
+    def flush(self) -> None:
+        """Write all buffered rows as new row groups"""
+        for name in self._tables:
+            self._flush_table(name)
+
+    def _flush_table(self, name: str, only_full_groups: bool = False) -> None:
+        """
+        Write the buffered rows of a table as row groups of row_group_size rows
+
+        @param name: Name of the table
+        @param only_full_groups: Keep the remaining rows of an incomplete row
+                                 group buffered
+        """
+        schema, writer, columns = self._tables[name]
+        count = len(columns["oom_id"])
+        if only_full_groups:
+            count -= count % self.row_group_size
+        if not count:
+            return
+        table = self._pa.Table.from_pydict(
+            {column: values[:count] for column, values in columns.items()},
+            schema=schema,
+        )
+        writer.write_table(table, row_group_size=self.row_group_size)
+        for values in columns.values():
+            del values[:count]
+
+    def close(self) -> None:
+        """Write all buffered rows and close the Parquet files"""
+        if not self._tables:
+            return
+        self.flush()
+        for _, writer, _ in self._tables.values():
+            writer.close()
+        self._tables = {}
+
+    @staticmethod
+    def _convert(key: str, value: Any) -> Any:
+        """Convert a value to the type of its column or None if that's not possible"""
+        if value is None:
+            return None
+        if key in PARQUET_STRING_DETAILS:
+            return str(value)
+        try:
+            if key in PARQUET_FLOAT_DETAILS:
+                return float(value)
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+
+def export(cfg: SimpleNamespace) -> Tuple[int, int]:
+    """
+    Analyse all OOM messages in the given files and export them as Parquet files
+
+    @return: Number of exported and failed OOMs
+    """
+    failed = 0
+    cache = open_result_cache(cfg)
+    try:
+        with ParquetExporter(cfg.output_dir, cfg.row_group_size) as exporter:
+            for source, success, oom_result in analyse_files(
+                cfg.files, cfg.workers, cache
+            ):
+                if success:
+                    exporter.add(oom_result, source)
+                else:
+                    failed += 1
+            return exporter.count, failed
+    finally:
+        if cache:
+            cache.close()
+
+
+def alloc_feasibility_to_list(
+    feasibility: Optional[OOMAnalyser.AllocationFeasibility],
+) -> List[Dict[str, Any]]:
+    """Convert the allocation verdicts into a JSON serialisable list with one entry per zone and node"""
+    if feasibility is None:
+        return []
+    result = []
+    for zone in feasibility.zones:
+        for node in feasibility.nodes:
+            if feasibility.threshold_kb(zone, node) is None:
+                continue
+            result.append(
+                {
+                    "zone": zone,
+                    "node": node,
+                    "free_kb": feasibility.free_kb(zone, node),
+                    "threshold_kb": feasibility.threshold_kb(zone, node),
+                    "verdicts": [
+                        feasibility.verdict(zone, order, node)
+                        for order in range(feasibility.max_order)
+                    ],
+                }
+            )
+    return result
+
+
+class HTTPError(Exception):
+    """Abort the processing of a request with the given HTTP status code"""
+
+    def __init__(self, status: int, msg: str):
+        super().__init__(msg)
+        self.status = status
+        self.msg = msg
+
+
+class AnalysisServer:
+    """
+    Asyncio based HTTP server to analyse OOM messages
+
+    Clients post the raw OOM message to ANALYSE_PATH and receive the
+    analysis result as JSON. Each connection handles a single request.
+
+    The analysis runs in a pool of worker processes. The number of
+    requests waiting for or running in this pool is limited by
+    max_pending. Further requests are rejected with "503 Service
+    Unavailable" until a slot becomes free again. Request bodies larger
+    than max_request_size are rejected with "413 Payload Too Large"
+    without reading them.
+
+    Results of already analysed OOM messages are taken from the optional
+    result cache. The cache key is calculated in the event loop, therefore
+    cache hits don't use the worker pool and aren't limited by max_pending.
+    Failed analyses aren't cached.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_request_size: int = 1024 * 1024,
+        max_pending: int = 64,
+        timeout: float = 30.0,
+        cache: Optional[ResultCache] = None,
+    ):
+        """
+        @param workers: Number of worker processes, defaults to the number of CPUs
+        @param max_request_size: Maximum size of a request body in bytes
+        @param max_pending: Maximum number of requests queued for or running in the worker pool
+        @param timeout: Seconds to wait for a complete request
+        @param cache: Cache for analysis results or None to disable caching
+        """
+        self.workers = workers
+        self.max_request_size = max_request_size
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.cache = cache
+        self.pending = 0
+        self._executor = None
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """
+        Start the worker pool and listen for connections
+
+        @return: Port number the server listens on
+        """
+        # Use fresh worker processes and start them before accepting
+        # connections. Forked workers would inherit the sockets of already
+        # accepted connections and keep them open after the response is sent.
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        await asyncio.get_running_loop().run_in_executor(self._executor, int)
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        logging.info("Listen on %s:%d", host, port)
+        return port
+
+    async def stop(self) -> None:
+        """Stop listening and shut down the worker pool"""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def serve_forever(self) -> None:
+        """Process connections until the task is cancelled"""
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> str:
+        """Read and validate a request and return its body as text"""
+        request_line = await reader.readline()
+        try:
+            method, path, _ = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if path != ANALYSE_PATH:
+            raise HTTPError(404, "Unknown path {}".format(path))
+        if method != "POST":
+            raise HTTPError(405, "Only POST requests are supported")
+        if "content-length" not in headers:
+            raise HTTPError(411, "Missing Content-Length header")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length header")
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length header")
+        if length > self.max_request_size:
+            raise HTTPError(
+                413,
+                "Request body exceeds the limit of {} bytes".format(
+                    self.max_request_size
+                ),
+            )
+
+        body = await reader.readexactly(length)
+        return body.decode("utf-8", errors="replace")
+
+    async def _analyse(self, text: str) -> Tuple[int, Dict[str, Any]]:
+        """Run the analysis in the worker pool and return status and response"""
+        key = None
+        cached = None
+        if self.cache is not None:
+            # Hashing a request body is cheap. Calculating the key in the
+            # worker pool would bypass the limit of pending requests.
+            key = oom_text_key(text)
+            cached = self.cache.get(key)
+
+        if cached is not None:
+            success, oom_result = cached
+        else:
+            success, oom_result = await self._analyse_in_pool(text)
+            if key is not None and not oom_result.error_msg:
+                self.cache.put(key, (success, oom_result))
+
+        if not success:
+            return 422, {"error": oom_result.error_msg}
+        return 200, oom_result_to_dict(oom_result)
+
+    async def _analyse_in_pool(self, text: str) -> Tuple[bool, OOMAnalyser.OOMResult]:
+        """Run the analysis in the worker pool"""
+        if self.pending >= self.max_pending:
+            raise HTTPError(503, "Too many pending requests - try again later")
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            success, oom_result = await loop.run_in_executor(
+                self._executor, analyse_oom_text, text
+            )
+        finally:
+            self.pending -= 1
+        return success, oom_result
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Process a single request"""
+        try:
+            text = await asyncio.wait_for(self._read_request(reader), self.timeout)
+            status, response = await self._analyse(text)
+        except HTTPError as e:
+            status, response = e.status, {"error": e.msg}
+        except asyncio.TimeoutError:
+            status, response = 408, {"error": "Incomplete request"}
+        except asyncio.IncompleteReadError:
+            status, response = 400, {"error": "Request body shorter than announced"}
+        except Exception as e:
+            logging.exception("Failed to process request")
+            status, response = 500, {"error": str(e)}
+
+        body = json.dumps(response).encode("utf-8")
+        writer.write(
+            "HTTP/1.1 {} {}\r\n"
+            "Content-Type: application/json\r\n"
+            "Content-Length: {}\r\n"
+            "Connection: close\r\n"
+            "\r\n".format(status, HTTP_REASONS[status], len(body)).encode("latin-1")
+        )
+        writer.write(body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            logging.debug("Client closed the connection before the response was sent")
+        writer.close()
+
+
+async def serve(cfg: SimpleNamespace) -> None:
+    """Run the ingestion server until it is interrupted"""
+    cache = open_result_cache(cfg)
+    server = AnalysisServer(
+        workers=cfg.workers,
+        max_request_size=cfg.max_request_size,
+        max_pending=cfg.max_pending,
+        cache=cache,
+    )
+    await server.start(cfg.host, cfg.port)
+    try:
+        await server.serve_forever()
+    finally:
+        if cache:
+            cache.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    cfg = SimpleNamespace()
+
+    parser = argparse.ArgumentParser(
+        description="Analyse OOM messages from many hosts outside the browser",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--version",
+        action="version",
+        version="batch_analyser.py version 0.1 - Copyright (c) 2025 Carsten Grohmann",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_serve = subparsers.add_parser(
+        "serve",
+        help="Accept OOM messages via HTTP POST and return the analysis as JSON",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser_serve.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on",
+    )
+    parser_serve.add_argument(
+        "--port",
+        default=8081,
+        type=int,
+        help="Port to listen on",
+    )
+    parser_serve.add_argument(
+        "--workers",
+        default=None,
+        type=int,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    parser_serve.add_argument(
+        "--max-request-size",
+        default=1024 * 1024,
+        type=int,
+        help="Maximum size of a single OOM message in bytes",
+    )
+    parser_serve.add_argument(
+        "--max-pending",
+        default=64,
+        type=int,
+        help="Maximum number of requests waiting for a worker",
+    )
+    parser_serve.add_argument(
+        "--cache-size",
+        default=1024,
+        type=int,
+        help="Maximum number of analysis results cached in memory (0 disables the cache)",
+    )
+    parser_serve.add_argument(
+        "--cache-file",
+        default=None,
+        help="Shelve file to keep analysis results across restarts",
+    )
+
+    parser_report = subparsers.add_parser(
+        "report",
+        help="Analyse all OOM messages in log files and print a fleet report as JSON",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser_report.add_argument(
+        "files",
+        nargs="+",
+        help="Log files containing OOM messages",
+    )
+    parser_report.add_argument(
+        "--workers",
+        default=None,
+        type=int,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    parser_report.add_argument(
+        "--cache-size",
+        default=1024,
+        type=int,
+        help="Maximum number of analysis results cached in memory (0 disables the cache)",
+    )
+    parser_report.add_argument(
+        "--cache-file",
+        default=None,
+        help="Shelve file to reuse analysis results of previous runs",
+    )
+    parser_report.add_argument(
+        "--top",
+        default=5,
+        type=int,
+        help="Number of top offenders per group",
+    )
+    parser_report.add_argument(
+        "--cgroup-prefix",
+        default="/",
+        help="Report only the cgroup hierarchy below this cgroup path",
+    )
+    parser_report.add_argument(
+        "--cgroup-depth",
+        default=None,
+        type=int,
+        help="Number of cgroup levels to report (default: all)",
+    )
+
+    parser_export = subparsers.add_parser(
+        "export",
+        help="Analyse all OOM messages in log files and export them as Parquet files",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser_export.add_argument(
+        "files",
+        nargs="+",
+        help="Log files containing OOM messages",
+    )
+    parser_export.add_argument(
+        "--output-dir",
+        default=".",
+        help="Directory to write ooms.parquet and processes.parquet into",
+    )
+    parser_export.add_argument(
+        "--row-group-size",
+        default=10000,
+        type=int,
+        help="Number of rows per Parquet row group",
+    )
+    parser_export.add_argument(
+        "--workers",
+        default=None,
+        type=int,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    parser_export.add_argument(
+        "--cache-size",
+        default=1024,
+        type=int,
+        help="Maximum number of analysis results cached in memory (0 disables the cache)",
+    )
+    parser_export.add_argument(
+        "--cache-file",
+        default=None,
+        help="Shelve file to reuse analysis results of previous runs",
+    )
+    parser.parse_args(namespace=cfg)
+
+    if cfg.command == "serve":
+        try:
+            asyncio.run(serve(cfg))
+        except KeyboardInterrupt:
+            pass
+    elif cfg.command == "report":
+        print(json.dumps(report(cfg), indent=2))
+    elif cfg.command == "export":
+        exported, failed = export(cfg)
+        logging.info("Exported %d OOMs, %d OOMs failed", exported, failed)
+
+    logging.info("Script is done")
@@ -10,6 +10,8 @@
 # THIS PROGRAM COMES WITH NO WARRANTY
 
 import argparse
+import ast
+import concurrent.futures
 import json
 import logging
 import os.path
@@ -18,7 +20,7 @@ import sys
 
 from collections import OrderedDict
 from types import SimpleNamespace
-from typing import Dict, Iterable, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import git
 
@@ -45,96 +47,125 @@ REC_EXCLUDE = re.compile(
 
 # Examples:
 #   #define ___GFP_DMA	  0x01u
-#   #define ___GFP_DMA32  0x04u
-REC_NUMERIC = re.compile(
-    r"^#define (?P<constant>_{0,3}GFP[_A-Z\d]+)\s+(?P<value>0x\d+)u"
+#   #define ___GFP_DMA    BIT(___GFP_DMA_BIT)
+REC_PLAIN = re.compile(r"^(?:(?:0[xX][0-9a-fA-F]+|\d+)[uUlL]*|BIT\(.+\))$")
+"""Regex to detect plain integer GFP bitmasks"""
+
+REC_GFP_NAME = re.compile(r"^_{0,3}GFP_[_A-Z\d]+(?<!_BIT)$")
+"""Regex to match the names of GFP flags, but not the bit numbers of an enum"""
+
+REC_DEFINE = re.compile(
+    r"^[ \t]*#[ \t]*define[ \t]+(?P<name>\w+)(?P<parameters>\([^)]*\))?(?P<body>.*)$",
+    re.MULTILINE,
+)
+"""Regex to extract macro definitions, function-like macros have parameters"""
+
+REC_ENUM = re.compile(r"\benum\s*\w*\s*\{(?P<body>[^}]*)\}")
+"""Regex to extract the body of an enum"""
+
+REC_C_TOKEN = re.compile(
+    r"\s*(?:(?P<number>0[xX][0-9a-fA-F]+|\d+)[uUlL]*"
+    r"|(?P<name>[A-Za-z_]\w*)"
+    r"|(?P<operator><<|>>|[-+|&^~()]))"
 )
-"""Regex extract to GFP constants"""
+"""Regex to split a C constant expression into tokens"""
 
 REC_PAGE_ALLOC_COSTLY_ORDER = re.compile(
     r"^#define[ \t]+PAGE_ALLOC_COSTLY_ORDER[ \t]+(?P<order>\d+)", re.MULTILINE
 )
 """Regex to extract PAGE_ALLOC_COSTLY_ORDER"""
 
-REC_TAG_MAJOR_MINOR_VERSION = re.compile(r"^v(?P<major>\d+)\.(?P<minor>\d+)(\.\d+)?$")
-"""Regex to extract major and minor version number from kernel tag"""
+REC_MAX_ORDER = re.compile(
+    r"^#define[ \t]+(?P<name>MAX_PAGE_ORDER|MAX_ORDER)[ \t]+(?P<order>\d+)",
+    re.MULTILINE,
+)
+"""Regex to extract the default value of MAX_ORDER or MAX_PAGE_ORDER"""
+
+# Since kernel 6.4 MAX_ORDER is the largest order and not the number of orders
+# anymore. It's introduced with commit 23baf831a32c04f9a968812511540b1b3e648bf5:
+# mm, treewide: redefine MAX_ORDER sanely
+REC_MAX_ORDER_INCLUSIVE = re.compile(
+    r"^#define[ \t]+MAX_ORDER_NR_PAGES[ \t]+\(1 << MAX_ORDER\)", re.MULTILINE
+)
+"""Regex to detect an inclusive MAX_ORDER"""
 
+REC_ZONE_TYPE_ENUM = re.compile(
+    r"^enum zone_type \{(?P<body>.*?)^\};", re.MULTILINE | re.DOTALL
+)
+"""Regex to extract the body of enum zone_type"""
 
-def extract_gfp_lines(lines: Iterable[str]) -> List[str]:
-    """Extract all lines with GFP flag definitions"""
-    content = []
-    ifdef_lines = []
-    ifdef_type = "notset"
-    line_with_backslash = ""
+REC_C_COMMENT_OR_STRING = re.compile(
+    r'"(?:\\.|[^"\\\n])*"|/\*.*?\*/|//[^\n]*', re.DOTALL
+)
+"""Regex to find C comments and string literals"""
 
-    for i, line in enumerate(lines):
-        if REC_EXCLUDE.search(line):
-            continue
-        line = line.rstrip()
-        line = line.replace(r"\t", " ")
-        line = line.replace(r"~\s+", " ~")
-        if line_with_backslash:
-            if line.endswith("\\"):
-                line_with_backslash += line[:-1]  # remove tailing /
-            else:
-                content.append(f"{line_with_backslash}{line}")
-                line_with_backslash = ""
-            continue
-        if line.startswith("#if"):
-            ifdef_type = "single_if"
-            ifdef_lines.append(f"{i} {line}")
-        elif line.startswith("#else"):
-            ifdef_type = "if_else"
-            ifdef_lines.append(f"{i} {line}")
-        elif line.startswith("#endif"):
-            ifdef_lines.append(f"{i} {line}")
-            # ignore empty #if, #else and #endif
-            if (
-                (ifdef_type == "notset" and len(ifdef_lines) == 1)
-                or (ifdef_type == "single_if" and len(ifdef_lines) == 2)
-                or (ifdef_type == "if_else" and len(ifdef_lines) == 3)
-            ):
-                ifdef_lines.clear()
-            else:
-                content.extend(ifdef_lines)
-            ifdef_type = "notset"
-        elif line.startswith("#define") and "GFP" in line:
-            if line.endswith("\\"):
-                line_with_backslash = line[:-1]  # remove tailing /
-            else:
-                content.append(line)
+REC_PRINTK_CALL = re.compile(
+    r"\b(?P<function>printk|pr_info|pr_cont|pr_warn|pr_err|pr_notice|pr_emerg)\s*\("
+)
+"""Regex to find calls of printk() and its pr_*() variants"""
 
-    return content
+REC_PRINTK_STRING = re.compile(
+    r'\s*(?:(?P<level>KERN_[A-Z]+)\s*)?"(?P<string>(?:\\.|[^"\\\n])*)"'
+)
+"""Regex to extract a single string literal of a printk format"""
 
+REC_PRINTK_CONVERSION = re.compile(
+    r"%(?P<flags>[-+ #0]*)(?P<width>\d+|\*)?(?:\.(?:\d+|\*))?"
+    r"(?:hh|h|ll|l|z|t|j)?(?P<conversion>p[A-Za-z]*|[diouxXcs%])"
+)
+"""Regex to find the conversion specifications of a printk format"""
 
-def extract_numeric_constants(inlist: List[str]) -> Dict[str, str]:
-    """Process all lines and extract flags with numeric values"""
-    d = {}
-    for i in inlist:
-        match = REC_NUMERIC.search(i)
-        if match:
-            name = match.group("constant")
-            value = match.group("value")
-            if name in d and d[name] != value:
-                logging.error(
-                    "Duplicate entry found for %s current: %s, new %s",
-                    name,
-                    d[name],
-                    value,
-                )
-            else:
-                d[name] = value
-    return d
+REC_PRINTK_FIELD_NAME = re.compile(r"(?P<name>[A-Za-z][\w-]*)[:=]\s*$")
+"""Regex to extract the name of a value from the text before it, e.g. "anon-rss:" """
 
+REC_TAG_MAJOR_MINOR_VERSION = re.compile(r"^v(?P<major>\d+)\.(?P<minor>\d+)(\.\d+)?$")
+"""Regex to extract major and minor version number from kernel tag"""
 
-def convert_numerics(flags):
-    """Convert numeric flags to decimal"""
-    for k in flags:
-        try:
-            flags[k] = int(flags[k], 16)
-        except ValueError:
-            logging.error('Non-hexadecimal value "%s" for flag %s', flags[k], k)
-    return flags
+TAG_SCHEMES = {
+    "upstream": SimpleNamespace(
+        regex=REC_TAG_MAJOR_MINOR_VERSION,
+        suffix="",
+        vendor="",
+    ),
+    # e.g. kernel-3.10.0-1160.el7 or kernel-3.10.0-1160.2.1.el7
+    "rhel": SimpleNamespace(
+        regex=re.compile(
+            r"^kernel-(?P<version>(?P<major>\d+)\.(?P<minor>\d+)\.\d+-[\d.]+?)"
+            r"\.el(?P<el>\d+)(?:_\d+)?$"
+        ),
+        suffix=".el{el}.",
+        vendor="RHEL",
+    ),
+    # e.g. v5.15.0-200.131.27
+    "uek": SimpleNamespace(
+        regex=re.compile(
+            r"^v(?P<version>(?P<major>\d+)\.(?P<minor>\d+)\.\d+-\d+(?:\.\d+)*)"
+            r"(?:\.el\d+uek)?$"
+        ),
+        suffix="uek",
+        vendor="Oracle UEK",
+    ),
+    # e.g. Ubuntu-5.15.0-91.101 or Ubuntu-hwe-5.15-5.15.0-91.101
+    "ubuntu": SimpleNamespace(
+        regex=re.compile(
+            r"^Ubuntu-(?:[a-z][\w.-]*?-)?"
+            r"(?P<version>(?P<major>\d+)\.(?P<minor>\d+)\.\d+-(?P<abi>\d+)\.\d+)$"
+        ),
+        suffix="-generic",
+        vendor="Ubuntu",
+    ),
+}
+"""
+Presets for the tag names of upstream and vendor kernel repositories
+
+The regex needs the named groups "major" and "minor". The optional group
+"version" limits the version numbers used to sort the tags. The release
+suffix may contain the named groups of the regex, e.g. "{el}". It has to
+be part of the kernel version string shown in the OOM message.
+"""
+
+tag_scheme = TAG_SCHEMES["upstream"]
+"""Tag scheme of the processed repository"""
 
 
 def sort_by_value(d: Dict[str, str]) -> Dict[str, str]:
@@ -149,37 +180,6 @@ def sort_by_key(d: Dict[str, str]) -> Dict[str, str]:
     return sorted_dict
 
 
-def extract_compound_constants(inlist: List[str]) -> Dict[str, str]:
-    """Process all lines and extract flags with compound"""
-    d = {}
-    for i in inlist:
-        match = REC_COMPOUND.search(i)
-        if match:
-            name = match.group("constant")
-            value = re.sub(r"[\s)]+", "", match.group("value"))
-            if name in d and d[name] != value:
-                logging.error(
-                    "Duplicate entry found for %s current: %s, new %s",
-                    name,
-                    d[name],
-                    value,
-                )
-            else:
-                d[name] = value
-    return d
-
-
-def check_existence(compound, numeric):
-    """Check that all flags exists"""
-    for k in compound:
-        flags = re.split(r"[\s|&]", compound[k])
-        for flag in flags:
-            if flag.startswith("~"):
-                flag = flag[1:]
-            if not ((flag in compound) or (flag in numeric)):
-                logging.error("Undefined flag %s in %s->%s", flag, k, flags)
-
-
 def filter_gfp_plain_bitmasks(d: Dict[str, str]) -> Dict[str, str]:
     """Return plain integer GFP bitmasks"""
     res = {key: value for key, value in d.items() if key.startswith("___G")}
@@ -198,6 +198,13 @@ def filter_gfp_useful_combinations(d: Dict[str, str]) -> Dict[str, str]:
     return res
 
 
+def format_gfp_value(value: int) -> str:
+    """Return the hexadecimal representation of an evaluated GFP flag"""
+    if value < 0:
+        return "-0x%02x" % -value
+    return "0x%02x" % value
+
+
 def format_gfp_flags(d: Dict[str, Union[str, int]]) -> Dict[str, str]:
     """Return flags with formatted values of given flags"""
     res = {}
@@ -212,83 +219,842 @@ def format_gfp_flags(d: Dict[str, Union[str, int]]) -> Dict[str, str]:
     return res
 
 
-def format_block_gfp_flags(desc: str, flags: Dict[str, str]) -> str:
-    """Generate a block with the given flags"""
+def format_block_gfp_flags(
+    desc: str, flags: Dict[str, str], values: Optional[Dict[str, int]] = None
+) -> str:
+    """
+    Generate a block with the given flags
+
+    @param values: Evaluated values of the compound flags, written as "_value"
+    """
     res = f"""\
         #
         #
         # {desc}:
 """
+    values = values or {}
     for n in flags:
-        res += f'        "{n}": {{"value": {flags[n]}}},\n'
+        if flags[n].startswith('"') and n in values:
+            res += (
+                f'        "{n}": {{"value": {flags[n]}, '
+                f'"_value": {format_gfp_value(values[n])}}},\n'
+            )
+        else:
+            res += f'        "{n}": {{"value": {flags[n]}}},\n'
     wo_tailing_newline = res.rstrip()
     return wo_tailing_newline
 
 
-def extract_gfp_flags(gfp_filename: str) -> Dict[str, Dict[str, Union[str, int]]]:
-    """Extract GFP flags from given file"""
-    with open(gfp_filename) as f:
-        flags_unfiltered = extract_gfp_lines(f)
+class ExpressionError(Exception):
+    """Invalid C constant expression or undefined symbol"""
+
+
+def tokenize_expression(expression: str) -> List[Tuple[str, Union[str, int]]]:
+    """
+    Split a C constant expression into tokens
+
+    @return: List of tuples with the kind of token ("number", "name" or
+             "operator") and its value
+    """
+    tokens = []
+    expression = expression.strip()
+    pos = 0
+    while pos < len(expression):
+        match = REC_C_TOKEN.match(expression, pos)
+        if not match:
+            raise ExpressionError(f'Unexpected character in "{expression}"')
+        pos = match.end()
+        if match.group("number"):
+            number = match.group("number")
+            if number.lower().startswith("0x"):
+                tokens.append(("number", int(number, 16)))
+            elif number.startswith("0") and len(number) > 1:
+                tokens.append(("number", int(number, 8)))
+            else:
+                tokens.append(("number", int(number)))
+        elif match.group("name"):
+            tokens.append(("name", match.group("name")))
+        else:
+            tokens.append(("operator", match.group("operator")))
+    return tokens
+
+
+class ConstantExpression:
+    """
+    Recursive descent parser for the constant expressions of the GFP headers
+
+    The grammar follows the operator precedence of C:
+
+        or_expr    := xor_expr ("|" xor_expr)*
+        xor_expr   := and_expr ("^" and_expr)*
+        and_expr   := shift_expr ("&" shift_expr)*
+        shift_expr := sum (("<<" | ">>") sum)*
+        sum        := unary (("+" | "-") unary)*
+        unary      := ("~" | "-") unary | "(" cast ")" unary | primary
+        primary    := number | "BIT" "(" or_expr ")" | name | "(" or_expr ")"
+
+    Casts like "(__force gfp_t)" are skipped. The bitwise complement works
+    on Python integers, as OOMAnalyser._gfp_flag2decimal() does.
+    """
+
+    CAST_TYPES = ["__force", "gfp_t", "unsigned", "int", "long"]
+    """Type names allowed in casts"""
+
+    def __init__(self, expression: str, resolve: Callable[[str], int]):
+        """
+        @param expression: C constant expression
+        @param resolve: Function to return the value of a symbol
+        """
+        self.expression = expression
+        self.tokens = tokenize_expression(expression)
+        self.pos = 0
+        self.resolve = resolve
+
+    def evaluate(self) -> int:
+        """Return the value of the expression"""
+        value = self._or_expr()
+        if self.pos != len(self.tokens):
+            self._fail("Unexpected token")
+        return value
+
+    def _fail(self, msg: str):
+        raise ExpressionError(f'{msg} in "{self.expression}"')
+
+    def _peek(self) -> Tuple[Optional[str], Union[str, int, None]]:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None, None
+
+    def _accept(self, *operators: str) -> Optional[str]:
+        kind, value = self._peek()
+        if kind == "operator" and value in operators:
+            self.pos += 1
+            return value
+        return None
+
+    def _expect(self, operator: str) -> None:
+        if not self._accept(operator):
+            self._fail(f'Missing "{operator}"')
+
+    def _or_expr(self) -> int:
+        value = self._xor_expr()
+        while self._accept("|"):
+            value |= self._xor_expr()
+        return value
+
+    def _xor_expr(self) -> int:
+        value = self._and_expr()
+        while self._accept("^"):
+            value ^= self._and_expr()
+        return value
+
+    def _and_expr(self) -> int:
+        value = self._shift_expr()
+        while self._accept("&"):
+            value &= self._shift_expr()
+        return value
+
+    def _shift_expr(self) -> int:
+        value = self._sum()
+        while True:
+            operator = self._accept("<<", ">>")
+            if not operator:
+                return value
+            if operator == "<<":
+                value <<= self._sum()
+            else:
+                value >>= self._sum()
+
+    def _sum(self) -> int:
+        value = self._unary()
+        while True:
+            operator = self._accept("+", "-")
+            if not operator:
+                return value
+            if operator == "+":
+                value += self._unary()
+            else:
+                value -= self._unary()
+
+    def _is_cast(self) -> bool:
+        """Return True if a cast starts at the current "(" """
+        pos = self.pos + 1
+        while pos < len(self.tokens) and self.tokens[pos][0] == "name":
+            if self.tokens[pos][1] not in self.CAST_TYPES:
+                return False
+            pos += 1
+        return (
+            pos > self.pos + 1
+            and pos < len(self.tokens)
+            and self.tokens[pos] == ("operator", ")")
+        )
+
+    def _unary(self) -> int:
+        if self._accept("~"):
+            return ~self._unary()
+        if self._accept("-"):
+            return -self._unary()
+        if self._peek() == ("operator", "(") and self._is_cast():
+            self.pos += 1
+            while self._peek()[0] == "name":
+                self.pos += 1
+            self._expect(")")
+            return self._unary()
+        return self._primary()
+
+    def _primary(self) -> int:
+        kind, value = self._peek()
+        if kind == "number":
+            self.pos += 1
+            return value
+        if kind == "name":
+            self.pos += 1
+            if value == "BIT":
+                self._expect("(")
+                bit = self._or_expr()
+                self._expect(")")
+                return 1 << bit
+            if self._peek() == ("operator", "("):
+                self._fail(f"Unsupported macro {value}()")
+            return self.resolve(value)
+        if self._accept("("):
+            value = self._or_expr()
+            self._expect(")")
+            return value
+        self._fail("Unexpected end")
+
+
+class SymbolTable:
+    """Evaluate macros and enum constants on demand"""
+
+    def __init__(self, definitions: Dict[str, str]):
+        """
+        @param definitions: Expressions of all macros and enum constants
+        """
+        self.definitions = definitions
+        self.values = {}
+        self._active = set()
+
+    def value(self, name: str) -> int:
+        """Return the value of a symbol"""
+        if name in self.values:
+            return self.values[name]
+        if name not in self.definitions:
+            raise ExpressionError(f"Undefined symbol {name}")
+        if name in self._active:
+            raise ExpressionError(f"Recursive definition of {name}")
+        self._active.add(name)
+        try:
+            value = ConstantExpression(self.definitions[name], self.value).evaluate()
+        finally:
+            self._active.discard(name)
+        self.values[name] = value
+        return value
+
+
+def extract_definitions(content: str) -> Dict[str, str]:
+    """
+    Extract the expressions of all object-like macros and enum constants
 
-    numeric = extract_numeric_constants(flags_unfiltered)
-    numeric = convert_numerics(numeric)
+    Both branches of an #ifdef are part of the content. The first definition
+    is used, that's the branch with the enabled feature.
 
-    compound = extract_compound_constants(flags_unfiltered)
-    check_existence(compound, numeric)
+    @param content: C source code
+    @return: Expression per symbol
+    """
+    content = strip_c_comments(content).replace("\\\n", " ")
+    definitions = {}
+
+    for match in REC_ENUM.finditer(content):
+        body = re.sub(r"^[ \t]*#.*$", "", match.group("body"), flags=re.MULTILINE)
+        previous = None
+        for enumerator in body.split(","):
+            name, _, value = enumerator.partition("=")
+            name = name.strip()
+            if not name:
+                continue
+            if value.strip():
+                expression = value.strip()
+            elif previous:
+                expression = f"{previous} + 1"
+            else:
+                expression = "0"
+            definitions.setdefault(name, expression)
+            previous = name
+
+    for match in REC_DEFINE.finditer(content):
+        if match.group("parameters") is not None:  # skip function-like macros
+            continue
+        name = match.group("name")
+        body = match.group("body").strip()
+        if name in definitions:
+            if definitions[name] != body:
+                logging.debug("Ignore alternative definition %s %s", name, body)
+            continue
+        definitions[name] = body
+    return definitions
+
+
+def extract_gfp_flags(content: str) -> Dict[str, Dict[str, Union[str, int]]]:
+    """
+    Extract GFP flags from the given content of the GFP header file
+
+    The compound flags keep their expressions for the documentation, the
+    evaluated values of all flags are stored in "values".
+    """
+    definitions = extract_definitions(content)
+    symbols = SymbolTable(definitions)
+
+    flags = {}
+    values = {}
+    for name, body in definitions.items():
+        line = f"#define {name} {body}"
+        if not REC_GFP_NAME.match(name) or REC_EXCLUDE.search(line):
+            continue
+        try:
+            values[name] = symbols.value(name)
+        except ExpressionError as e:
+            logging.error("Failed to evaluate flag %s: %s", name, e)
+        match = REC_COMPOUND.match(line)
+        if match:
+            flags[name] = re.sub(r"[\s)]+", "", match.group("value"))
+        elif name.startswith("___G") and REC_PLAIN.match(body) and name in values:
+            flags[name] = values[name]
 
-    flags_merged = {**numeric, **compound}
-    useful = filter_gfp_useful_combinations(flags_merged)
+    useful = filter_gfp_useful_combinations(flags)
     useful = sort_by_key(useful)
     useful = format_gfp_flags(useful)
 
-    modifier = filter_gfp_modifier(flags_merged)
+    modifier = filter_gfp_modifier(flags)
     modifier = sort_by_key(modifier)
     modifier = format_gfp_flags(modifier)
 
-    plain = filter_gfp_plain_bitmasks(flags_merged)
+    plain = filter_gfp_plain_bitmasks(flags)
     plain = sort_by_value(plain)
     plain = format_gfp_flags(plain)
 
-    return {"useful": useful, "modifier": modifier, "plain": plain}
+    return {
+        "useful": useful,
+        "modifier": modifier,
+        "plain": plain,
+        "values": {name: values[name] for name in flags if name in values},
+    }
+
+
+GFP_FLAG_BLOCKS = ["useful", "modifier", "plain"]
+"""Blocks with the definitions of the GFP flags"""
+
+
+def same_gfp_flags(
+    flags1: Dict[str, Dict[str, Any]], flags2: Dict[str, Dict[str, Any]]
+) -> bool:
+    """
+    Return True if both GFP flags have the same definitions
+
+    The evaluated values are ignored. They aren't part of older kernel
+    configurations.
+    """
+    return all(flags1[block] == flags2[block] for block in GFP_FLAG_BLOCKS)
+
+
+def find_blob(tree: git.Tree, path: str) -> Optional[git.Blob]:
+    """
+    Return the blob of a file in the given git tree
+
+    The file is looked up in the git object database, the working copy isn't
+    touched.
+
+    @return: Blob object or None if the file doesn't exist in this tree
+    """
+    try:
+        return tree / path
+    except KeyError:
+        return None
 
 
-def search_gfp_file(repo_dir: str) -> Optional[str]:
-    """Return of the file with the CFP definitions"""
+def search_gfp_file(tree: git.Tree) -> Optional[str]:
+    """Return the path of the file with the CFP definitions in the given git tree"""
     for gfp_filename in [
         # introduced in kernel 6.0 with commit cb5a065b4ea9c062a18143c8a14e831179687f54:
         # mm: Split <linux/gfp_types.h> out of <linux/gfp.h>
-        os.path.join(repo_dir, "include/linux/gfp_types.h"),
-        os.path.join(repo_dir, "include/linux/gfp.h"),
+        "include/linux/gfp_types.h",
+        "include/linux/gfp.h",
     ]:
-        full = os.path.join(gfp_filename)
-        if os.path.exists(full):
-            return full
+        if find_blob(tree, gfp_filename):
+            return gfp_filename
     return None
 
 
-def extract_page_alloc_costly_order(repo_dir: str) -> Optional[int]:
-    """Extract PAGE_ALLOC_COSTLY_ORDER from mmzone.h"""
-    mmzone_h = os.path.join(repo_dir, "include/linux/mmzone.h")
-    with open(mmzone_h) as f:
-        content = f.read()
-        match = REC_PAGE_ALLOC_COSTLY_ORDER.search(content)
-        if match:
-            return int(match.group("order"))
-    logging.error("Missing PAGE_ALLOC_COSTLY_ORDER definition in %s", mmzone_h)
+MMZONE_H = "include/linux/mmzone.h"
+"""Path of the header file with PAGE_ALLOC_COSTLY_ORDER"""
+
+
+def extract_page_alloc_costly_order(content: str) -> Optional[int]:
+    """Extract PAGE_ALLOC_COSTLY_ORDER from the given content of mmzone.h"""
+    match = REC_PAGE_ALLOC_COSTLY_ORDER.search(content)
+    if match:
+        return int(match.group("order"))
+    logging.error("Missing PAGE_ALLOC_COSTLY_ORDER definition in %s", MMZONE_H)
+    return None
+
+
+def extract_max_order(content: str) -> Optional[int]:
+    """
+    Extract the default number of page orders from the given content of mmzone.h
+
+    The result uses the semantic of BaseKernelConfig.MAX_ORDER, it's the
+    maximum order plus one.
+    """
+    match = REC_MAX_ORDER.search(content)
+    if not match:
+        logging.error("Missing MAX_ORDER definition in %s", MMZONE_H)
+        return None
+    order = int(match.group("order"))
+    if match.group("name") == "MAX_PAGE_ORDER" or REC_MAX_ORDER_INCLUSIVE.search(
+        content
+    ):
+        order += 1
+    return order
+
+
+ZONE_NAMES = {
+    "ZONE_DMA": "DMA",
+    "ZONE_DMA32": "DMA32",
+    "ZONE_NORMAL": "Normal",
+    "ZONE_HIGHMEM": "HighMem",
+    "ZONE_MOVABLE": "Movable",
+    "ZONE_DEVICE": "Device",
+}
+"""Zone names as shown in the OOM messages (see zone_names[] in the kernel)"""
+
+
+def strip_c_comments(content: str) -> str:
+    """Remove all C comments but keep string literals"""
+
+    def replace(match):
+        if match.group(0).startswith('"'):
+            return match.group(0)
+        return " "
+
+    return REC_C_COMMENT_OR_STRING.sub(replace, content)
+
+
+def extract_zone_types(content: str) -> Optional[List[str]]:
+    """
+    Extract the names of all memory zones from enum zone_type in the given
+    content of mmzone.h
+
+    Zones, that depend on the kernel configuration, are part of the list too.
+    """
+    match = REC_ZONE_TYPE_ENUM.search(strip_c_comments(content))
+    if not match:
+        logging.error("Missing enum zone_type in %s", MMZONE_H)
+        return None
+    zones = []
+    for line in match.group("body").splitlines():
+        line = line.strip().rstrip(",")
+        if not line.startswith("ZONE_"):  # skip #ifdef and __MAX_NR_ZONES
+            continue
+        if line not in ZONE_NAMES:
+            logging.warning("Unknown zone %s in %s", line, MMZONE_H)
+        zones.append(ZONE_NAMES.get(line, line[5:].capitalize()))
+    return zones
+
+
+def find_function_body(content: str, name: str) -> Optional[str]:
+    """
+    Return the body of a C function definition without the outer braces
+
+    @param content: C source code without comments
+    @param name: Function name
+    @return: Function body or None if the function isn't defined
+    """
+    rec = re.compile(
+        rf"^[A-Za-z_][\w \t*]*\b{re.escape(name)}\s*\([^;{{}}]*\)\s*\{{", re.MULTILINE
+    )
+    match = rec.search(content)
+    if not match:
+        return None
+    start = match.end()
+    depth = 1
+    pos = start
+    while pos < len(content):
+        char = content[pos]
+        if char == '"':  # skip string literals with braces inside
+            string = REC_C_COMMENT_OR_STRING.match(content, pos)
+            pos = string.end() if string else pos + 1
+            continue
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return content[start:pos]
+        pos += 1
     return None
 
 
+def unescape_c_string(string: str) -> str:
+    """Convert the common escape sequences of a C string literal"""
+    return re.sub(
+        r"\\(.)",
+        lambda m: {"n": "\n", "t": "\t"}.get(m.group(1), m.group(1)),
+        string,
+    )
+
+
+KERN_CONT = "\001c"
+"""Kernel marker for continuation lines, it's kept at the start of the printk formats"""
+
+
+def extract_printk_formats(content: str, functions: List[str]) -> Dict[str, List[str]]:
+    """
+    Extract the format strings of all printk() calls of the given functions
+
+    Adjacent string literals are concatenated and the KERN_* log levels are
+    removed. Only continuations (pr_cont() or KERN_CONT) start with
+    KERN_CONT, as they don't start a new line. Calls without a literal
+    format string are skipped.
+
+    @param content: C source code
+    @param functions: Names of the functions to search
+    @return: Format strings per function, missing functions are not part of it
+    """
+    content = strip_c_comments(content)
+    res = {}
+    for name in functions:
+        body = find_function_body(content, name)
+        if body is None:
+            continue
+        formats = []
+        for call in REC_PRINTK_CALL.finditer(body):
+            pos = call.end()
+            fmt = ""
+            continuation = call.group("function") == "pr_cont"
+            while True:
+                match = REC_PRINTK_STRING.match(body, pos)
+                if not match:
+                    break
+                continuation |= match.group("level") == "KERN_CONT"
+                fmt += unescape_c_string(match.group("string"))
+                pos = match.end()
+            if fmt:
+                formats.append(KERN_CONT + fmt if continuation else fmt)
+        res[name] = formats
+    return res
+
+
+def extract_show_free_areas_formats(content: str) -> Dict[str, List[str]]:
+    """Extract the printk formats of __show_free_areas() and show_node()"""
+    return extract_printk_formats(
+        content, ["show_node", "__show_free_areas", "show_free_areas"]
+    )
+
+
+def extract_dump_tasks_formats(content: str) -> Dict[str, List[str]]:
+    """Extract the printk formats of dump_tasks() and dump_task()"""
+    return extract_printk_formats(content, ["dump_tasks", "dump_task"])
+
+
+def extract_oom_kill_process_formats(content: str) -> Dict[str, List[str]]:
+    """Extract the printk formats of __oom_kill_process() and oom_kill_process()"""
+    return extract_printk_formats(content, ["__oom_kill_process", "oom_kill_process"])
+
+
+PRINTK_CONVERSION_PATTERNS = {
+    "d": r"-?\d+",
+    "i": r"-?\d+",
+    "u": r"\d+",
+    "o": r"[0-7]+",
+    "x": r"[0-9a-f]+",
+    "X": r"[0-9A-F]+",
+    "c": r".",
+    "s": r".+?",
+    "p": r"\S+",
+}
+"""Regex patterns for the printk conversion specifiers"""
+
+
+def escape_printk_literal(literal: str) -> str:
+    """
+    Convert the literal text of a printk format into a regex
+
+    Line breaks start a new line in multiline mode, runs of spaces are
+    matched by "\\s+".
+    """
+    res = ""
+    for part in re.split(r"( {2,})", literal):
+        if part.startswith("  "):
+            res += r"\s+"
+            continue
+        for char in part:
+            if char == "\n":
+                res += r"\n^"
+            elif char == '"':
+                res += '\\"'
+            elif char in ".^$*+?{}[]\\|()":
+                res += "\\" + char
+            else:
+                res += char
+    return res
+
+
+def printk_format_to_regex(
+    fmt: str, names: Optional[List[str]] = None, prefix: str = ""
+) -> str:
+    """
+    Translate a printk format into a regex with named groups
+
+    Without explicit names, the group names are taken from the text before
+    each value, e.g. "anon-rss:%lukB" results in "anon_rss_kb". Values
+    without such a text are named "field<N>".
+
+    @param fmt: printk format
+    @param names: Group names for all conversions in the given order
+    @param prefix: Prefix of all group names
+    @return: Regex pattern
+    """
+    if fmt.startswith(KERN_CONT):  # continuation of the current line
+        fmt = fmt[len(KERN_CONT) :]
+        pattern = ""
+    else:
+        pattern = "^"
+    used_names = []
+    pos = 0
+    number = -1
+    for match in REC_PRINTK_CONVERSION.finditer(fmt):
+        literal = fmt[pos : match.start()]
+        pattern += escape_printk_literal(literal)
+        pos = match.end()
+        conversion = match.group("conversion")
+        if conversion == "%":
+            pattern += "%"
+            continue
+
+        number += 1
+        if names and number < len(names):
+            name = names[number]
+        else:
+            name_match = REC_PRINTK_FIELD_NAME.search(literal)
+            if name_match:
+                name = name_match.group("name").replace("-", "_").lower()
+                if fmt[pos:].startswith("kB"):
+                    name += "_kb"
+            else:
+                name = f"field{number + 1}"
+        name = prefix + name
+        if name in used_names:
+            name = f"{name}_{used_names.count(name) + 1}"
+        used_names.append(name)
+
+        value = PRINTK_CONVERSION_PATTERNS[conversion[0]]
+        if conversion in "xX" and "#" in match.group("flags"):
+            value = "0x" + value
+        if match.group("width") and not pattern.endswith(r"\s+"):
+            pattern += r"\s*"
+        pattern += f"(?P<{name}>{value})"
+
+    literal = fmt[pos:]
+    if literal.endswith("\n"):
+        pattern += escape_printk_literal(literal[:-1]) + r"\s*$"
+    else:
+        pattern += escape_printk_literal(literal)
+    return pattern
+
+
+def has_printk_text(fmt: str) -> bool:
+    """Return True if the printk format contains words besides values and units"""
+    return re.search(r"[A-Za-z]{3,}", REC_PRINTK_CONVERSION.sub("", fmt)) is not None
+
+
+def process_table_names(header: str) -> List[str]:
+    """
+    Return the group names for the process table based on the header line
+    of dump_tasks()
+
+    The names are equal to BaseKernelConfig.pstable_items. Memory values are
+    in pages, except the values with a unit in their name.
+    """
+    names = []
+    for column in re.findall(r"\w+", header):
+        if column not in ["pid", "uid", "tgid", "oom_score_adj", "name"] and not (
+            column.endswith("_bytes")
+        ):
+            column += "_pages"
+        names.append(column)
+    return names
+
+
+PRINTK_KINDS = ["show_free_areas", "dump_tasks", "oom_kill_process"]
+"""Kinds of kernel details with printk formats"""
+
+PRINTK_GROUP_PREFIX = {"__oom_kill_process": "killed_proc_"}
+"""Prefix of the generated group names per function"""
+
+SOURCE_FILES = {
+    "zone_types": [MMZONE_H],
+    "max_order": [MMZONE_H],
+    # __show_free_areas() moved to mm/show_mem.c in kernel 6.2
+    "show_free_areas": ["mm/show_mem.c", "mm/page_alloc.c"],
+    "dump_tasks": ["mm/oom_kill.c"],
+    "oom_kill_process": ["mm/oom_kill.c"],
+}
+"""Source files of further kernel details, the first existing file is used"""
+
+BLOB_PARSERS = {
+    "gfp_flags": extract_gfp_flags,
+    "page_order": extract_page_alloc_costly_order,
+    "zone_types": extract_zone_types,
+    "max_order": extract_max_order,
+    "show_free_areas": extract_show_free_areas_formats,
+    "dump_tasks": extract_dump_tasks_formats,
+    "oom_kill_process": extract_oom_kill_process_formats,
+}
+"""Functions to parse the content of a header file by the kind of the content"""
+
+DETAIL_KINDS = [
+    "zone_types",
+    "max_order",
+    "show_free_areas",
+    "dump_tasks",
+    "oom_kill_process",
+]
+"""Kinds of further kernel details, that are recorded on every change"""
+
+BLOB_CACHE_VERSION = 3
+"""Version of the blob cache, increment it on every change of the parsers or their results"""
+
+
+def query_tag_blobs(tag: git.TagReference) -> SimpleNamespace:
+    """
+    Return the blob SHAs of all header files of the given tag
+
+    Identical files share the same blob SHA across tags. Therefore, the SHA
+    is sufficient to detect unchanged files without reading them.
+    """
+    tree = tag.commit.tree
+    blobs = SimpleNamespace(gfp_filename=None, gfp_flags=None, page_order=None)
+    for kind, filenames in SOURCE_FILES.items():
+        setattr(blobs, kind, None)
+        for filename in filenames:
+            blob = find_blob(tree, filename)
+            if blob:
+                setattr(blobs, kind, blob.hexsha)
+                break
+        else:
+            logging.error("Missing %s in tag %s", " or ".join(filenames), tag.name)
+    gfp_file = search_gfp_file(tree)
+    if gfp_file:
+        blobs.gfp_filename = os.path.basename(gfp_file)
+        blobs.gfp_flags = find_blob(tree, gfp_file).hexsha
+    mmzone_blob = find_blob(tree, MMZONE_H)
+    if mmzone_blob:
+        blobs.page_order = mmzone_blob.hexsha
+    else:
+        logging.error("Missing %s in tag %s", MMZONE_H, tag.name)
+    return blobs
+
+
+def load_blob_cache(filename: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Load the cache of parsed header files keyed by kind and blob SHA
+
+    An outdated or unreadable cache file is ignored.
+    """
+    empty = {kind: {} for kind in BLOB_PARSERS}
+    if not filename or not os.path.exists(filename):
+        return empty
+    try:
+        with open(filename) as f:
+            cache = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning("Ignore unreadable blob cache %s: %s", filename, e)
+        return empty
+    if cache.get("version") != BLOB_CACHE_VERSION:
+        logging.info("Ignore blob cache %s with outdated version", filename)
+        return empty
+    for kind in BLOB_PARSERS:
+        empty[kind].update(cache.get(kind, {}))
+    return empty
+
+
+def save_blob_cache(filename: Optional[str], cache: Dict[str, Dict[str, Any]]) -> None:
+    """Write the cache of parsed header files"""
+    if not filename:
+        return
+    with open(filename, "w") as f:
+        json.dump(dict(cache, version=BLOB_CACHE_VERSION), f)
+
+
+worker_repo = None
+"""Repository object of the current worker process"""
+
+
+def init_worker(repo_dir: str) -> None:
+    """Open the repository once per worker process"""
+    global worker_repo
+    worker_repo = git.Repo(repo_dir)
+
+
+def parse_blob(job: Tuple[str, str]) -> Any:
+    """
+    Read and parse a single header file
+
+    This function runs in the worker processes and is independent of all
+    other header files. The comparison between the tags takes place in the
+    main process.
+
+    @param job: Kind of the content (a key of BLOB_PARSERS) and blob SHA
+    """
+    kind, hexsha = job
+    logging.info("Parse %s from blob %s", kind, hexsha)
+    data = worker_repo.odb.stream(bytes.fromhex(hexsha)).read()
+    return BLOB_PARSERS[kind](data.decode("utf-8", errors="replace"))
+
+
+def tag_release(tag: git.TagReference) -> Tuple[int, int, str]:
+    """Return the release tuple (major, minor, suffix) of the given kernel tag"""
+    match = tag_scheme.regex.match(tag.name)
+    suffix = tag_scheme.suffix.format(**match.groupdict())
+    return int(match.group("major")), int(match.group("minor")), suffix
+
+
+def tag_sort_key(match: re.Match) -> Tuple[int, ...]:
+    """Return all version numbers of a matched tag name to sort the tags"""
+    version = match.groupdict().get("version") or match.group(0)
+    return tuple(int(number) for number in re.findall(r"\d+", version))
+
+
+def config_name(release: Tuple[int, int, str]) -> str:
+    """Return the class name of a kernel configuration, e.g. KernelConfig_3_10_EL7"""
+    major, minor, suffix = release
+    name = f"KernelConfig_{major}_{minor}"
+    suffix = re.sub(r"\W+", "_", suffix).strip("_").upper()
+    if suffix:
+        name += f"_{suffix}"
+    return name
+
+
+def has_changes(changes: SimpleNamespace) -> bool:
+    """Return True if at least one kernel detail has changed"""
+    return any(
+        getattr(changes, kind) for kind in ["gfp_flags", "page_order"] + DETAIL_KINDS
+    )
+
+
 def query_all_tags(
     minimum_major: int = 1, minimum_minor: int = 1
 ) -> List[git.TagReference]:
     """
     Return a sorted list of kernel tags with the given minimum major
     and minor version number.
+
+    Only tags that match the current tag scheme are returned.
     """
     sorted_tags = []
 
     for tag in repo.tags:
-        match = REC_TAG_MAJOR_MINOR_VERSION.match(tag.name)
+        match = tag_scheme.regex.match(tag.name)
         if not match:
             logging.debug(
                 "Could not extract major and minor version number from tag %s", tag.name
@@ -296,28 +1062,388 @@ def query_all_tags(
             continue
         version_major = int(match.group("major"))
         version_minor = int(match.group("minor"))
-        assert version_minor < 100
         if version_major < minimum_major or (
             version_major == minimum_major and version_minor < minimum_minor
         ):
             continue
-        sorted_tags.append((version_major * 100 + version_minor, tag))
+        sorted_tags.append((tag_sort_key(match), tag))
 
     sorted_tags = [x[1] for x in sorted(sorted_tags, key=lambda item: item[0])]
 
     return sorted_tags
 
 
-def prepare_repo(tag: git.TagReference) -> None:
-    """Checkout repo with the requested tag"""
-    logging.info("Checkout working copy for tag %s", tag.name)
-    repo.git.checkout(tag.name, force=True)
+def gfp_flags_from_kernel_config(
+    gfp_flags: Dict[str, Dict[str, Union[str, int]]]
+) -> Dict[str, Dict[str, str]]:
+    """
+    Convert the GFP_FLAGS of a kernel configuration into the format returned
+    by extract_gfp_flags()
+    """
+    flags = {key: value["value"] for key, value in gfp_flags.items()}
+    useful = sort_by_key(filter_gfp_useful_combinations(flags))
+    modifier = sort_by_key(filter_gfp_modifier(flags))
+    plain = sort_by_value(filter_gfp_plain_bitmasks(flags))
+
+    # The compound values are already formatted in OOMAnalyser.py
+    def format_values(d):
+        return {
+            key: "0x%02x" % value if isinstance(value, int) else f'"{value}"'
+            for key, value in d.items()
+        }
+
+    return {
+        "useful": format_values(useful),
+        "modifier": format_values(modifier),
+        "plain": format_values(plain),
+        "values": {
+            key: value["_value"]
+            for key, value in gfp_flags.items()
+            if "_value" in value
+        },
+    }
+
+
+def read_newest_kernel_config(
+    filename: str, suffixes: Iterable[str] = ("",)
+) -> Optional[SimpleNamespace]:
+    """
+    Return the newest kernel configuration of OOMAnalyser.py with one of the
+    given release suffixes
+
+    The file is parsed, but not executed. Attributes not defined in a class
+    are looked up along its base classes.
+
+    @param filename: Path of OOMAnalyser.py
+    @param suffixes: Release suffixes, "" for upstream kernels
+    @return: Name, release, GFP flags and PAGE_ALLOC_COSTLY_ORDER of the
+             newest configuration or None if no configuration was found
+    """
+    with open(filename) as f:
+        tree = ast.parse(f.read(), filename)
+
+    classes = {}
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        attributes = {}
+        for stmt in node.body:
+            if (
+                isinstance(stmt, ast.Assign)
+                and len(stmt.targets) == 1
+                and isinstance(stmt.targets[0], ast.Name)
+                and stmt.targets[0].id
+                in ["release", "GFP_FLAGS", "PAGE_ALLOC_COSTLY_ORDER"]
+            ):
+                attributes[stmt.targets[0].id] = ast.literal_eval(stmt.value)
+        bases = [base.id for base in node.bases if isinstance(base, ast.Name)]
+        classes[node.name] = (bases, attributes)
+
+    def lookup(name, attribute):
+        while name in classes:
+            bases, attributes = classes[name]
+            if attribute in attributes:
+                return attributes[attribute]
+            if not bases:
+                break
+            name = bases[0]
+        return None
+
+    # Vendor specific configurations like KernelConfig_3_10_EL7 have a
+    # release suffix and are not part of the upstream history.
+    candidates = [
+        name
+        for name in classes
+        if name.startswith("KernelConfig_")
+        and "release" in classes[name][1]
+        and classes[name][1]["release"][2] in suffixes
+    ]
+    if not candidates:
+        return None
+    newest = max(candidates, key=lambda name: classes[name][1]["release"][:2])
+    gfp_flags = lookup(newest, "GFP_FLAGS")
+    return SimpleNamespace(
+        name=newest,
+        release=classes[newest][1]["release"],
+        gfp_flags=gfp_flags_from_kernel_config(gfp_flags) if gfp_flags else None,
+        page_order=lookup(newest, "PAGE_ALLOC_COSTLY_ORDER"),
+    )
+
+
+def gfp_flags_to_kernel_config(
+    gfp_flags: Dict[str, Dict[str, str]]
+) -> Dict[str, Dict[str, Union[str, int]]]:
+    """
+    Convert the result of extract_gfp_flags() into the GFP_FLAGS format of
+    a kernel configuration
+
+    This is the opposite of gfp_flags_from_kernel_config().
+    """
+    res = {}
+    values = gfp_flags.get("values", {})
+    for block in GFP_FLAG_BLOCKS:
+        for key, value in gfp_flags[block].items():
+            if value.startswith('"'):
+                res[key] = {"value": value[1:-1]}
+                if key in values:
+                    res[key]["_value"] = values[key]
+            else:
+                res[key] = {"value": int(value, 16)}
+    return res
+
+
+KERNEL_DATABASE_VERSION = 3
+"""Version of the kernel details database, increment it on every change of its structure"""
+
+
+def load_kernel_database(filename: str) -> Optional[Dict[str, Any]]:
+    """
+    Load an existing kernel details database
+
+    @return: Database or None if the file is unreadable or has a different version
+    """
+    try:
+        with open(filename) as f:
+            database = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.error("Unreadable kernel details database %s: %s", filename, e)
+        return None
+    if database.get("version") != KERNEL_DATABASE_VERSION:
+        logging.error("Kernel details database %s has a different version", filename)
+        return None
+    return database
+
+
+def save_kernel_database(filename: str, database: Dict[str, Any]) -> None:
+    """Write the kernel details database"""
+    logging.info("Write kernel details database %s", filename)
+    with open(filename, "w") as f:
+        json.dump(database, f, indent=1)
+        f.write("\n")
+
+
+def kernel_database_entry(
+    tag: git.TagReference,
+    gfp_filename: str,
+    current: SimpleNamespace,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Return the key and the entry of a release in the kernel details database
+
+    The entry contains the complete GFP table, PAGE_ALLOC_COSTLY_ORDER, zone
+    types, MAX_ORDER and printk formats valid since this release. The
+    attribute names are equal to the attributes of the kernel configurations.
+
+    @param current: Resolved kernel details of this release
+    """
+    major, minor, suffix = tag_release(tag)
+    printk_formats = {}
+    for kind in PRINTK_KINDS:
+        printk_formats.update(getattr(current, kind) or {})
+    entry = {
+        "tag": tag.name,
+        "release": [major, minor, suffix],
+        "gfp_filename": gfp_filename,
+        "GFP_FLAGS": gfp_flags_to_kernel_config(current.gfp_flags),
+        "PAGE_ALLOC_COSTLY_ORDER": current.page_order,
+        "ZONE_TYPES": current.zone_types,
+        "MAX_ORDER": current.max_order,
+        "PRINTK_FORMATS": printk_formats,
+    }
+    return f"{major}.{minor}{suffix}", entry
+
+
+def resolve_gfp_values(gfp_flags: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Return the evaluated values of all GFP flags
+
+    @param gfp_flags: Result of extract_gfp_flags()
+    """
+    res = {}
+    for block in GFP_FLAG_BLOCKS:
+        for key, value in gfp_flags[block].items():
+            if key in gfp_flags["values"]:
+                res[key] = gfp_flags["values"][key]
+            elif not value.startswith('"'):
+                res[key] = int(value, 16)
+    return res
+
+
+def diff_gfp_flags(
+    old_flags: Dict[str, Dict[str, Any]], new_flags: Dict[str, Dict[str, Any]]
+) -> SimpleNamespace:
+    """
+    Compare the resolved GFP flags of two releases
+
+    @param old_flags: Result of extract_gfp_flags() for the older release
+    @param new_flags: Result of extract_gfp_flags() for the newer release
+    @return: Added and removed flags with their values and renumbered flags
+             with both values
+    """
+    old_values = resolve_gfp_values(old_flags)
+    new_values = resolve_gfp_values(new_flags)
+    return SimpleNamespace(
+        added={
+            key: new_values[key] for key in sorted(new_values) if key not in old_values
+        },
+        removed={
+            key: old_values[key] for key in sorted(old_values) if key not in new_values
+        },
+        renumbered={
+            key: (old_values[key], new_values[key])
+            for key in sorted(old_values)
+            if key in new_values and old_values[key] != new_values[key]
+        },
+    )
+
+
+def format_gfp_diff(old_name: str, new_name: str, diff: SimpleNamespace) -> str:
+    """Return a human-readable report of the differences between GFP flags"""
+    res = f"Differences in the GFP flags between {old_name} and {new_name}:\n"
+    if not (diff.added or diff.removed or diff.renumbered):
+        res += (
+            "  none - the resolved GFP flags are identical, a new kernel "
+            "configuration isn't needed for them\n"
+        )
+        return res
+    for title, flags in [("Added", diff.added), ("Removed", diff.removed)]:
+        if flags:
+            res += f"\n{title} flags:\n"
+            for key, value in flags.items():
+                res += f"  {key:<32} {format_gfp_value(value)}\n"
+    if diff.renumbered:
+        res += "\nRenumbered flags:\n"
+        for key, (old_value, new_value) in diff.renumbered.items():
+            res += (
+                f"  {key:<32} {format_gfp_value(old_value)} -> "
+                f"{format_gfp_value(new_value)}\n"
+            )
+    return res
+
+
+def query_gfp_blob(repo: git.Repo, name: str) -> Optional[str]:
+    """
+    Return the blob SHA of the GFP header file of a tag or any other revision
+    """
+    try:
+        tree = repo.commit(name).tree
+    except (git.BadName, ValueError) as e:
+        logging.error("Unknown tag or revision %s: %s", name, e)
+        return None
+    gfp_file = search_gfp_file(tree)
+    if not gfp_file:
+        logging.error(
+            "Missing GFP header file, neither gfp.h nor gfp_types.h exists in %s",
+            name,
+        )
+        return None
+    return find_blob(tree, gfp_file).hexsha
+
+
+def diff_releases(repo: git.Repo, old_name: str, new_name: str) -> bool:
+    """
+    Print the differences between the GFP flags of two tags
+
+    The parse results are taken from the blob cache. Only unknown header
+    files are parsed and added to the cache.
+
+    @return: False, if a tag or header file is missing
+    """
+    hexshas = [query_gfp_blob(repo, name) for name in (old_name, new_name)]
+    if None in hexshas:
+        return False
+
+    blob_cache = load_blob_cache(cfg.cache_file)
+    init_worker(cfg.repo_dir)
+    missing = {hexsha for hexsha in hexshas if hexsha not in blob_cache["gfp_flags"]}
+    for hexsha in sorted(missing):
+        blob_cache["gfp_flags"][hexsha] = parse_blob(("gfp_flags", hexsha))
+    if missing:
+        save_blob_cache(cfg.cache_file, blob_cache)
+
+    old_flags, new_flags = (blob_cache["gfp_flags"][hexsha] for hexsha in hexshas)
+    diff = diff_gfp_flags(old_flags, new_flags)
+    sys.stdout.write(format_gfp_diff(old_name, new_name, diff))
+    return True
+
+
+def format_printk_comment(fmt: str) -> str:
+    """Return the printk format for a Python comment"""
+    if fmt.startswith(KERN_CONT):
+        return f"KERN_CONT {json.dumps(fmt[len(KERN_CONT):])}"
+    return json.dumps(fmt)
+
+
+def format_regex(pattern: str, indent: str) -> str:
+    """Format a regex pattern as raw string literals with one line per text line"""
+    lines = []
+    for i, part in enumerate(pattern.split(r"\n^")):
+        if i:
+            lines.append(f'{indent}r"\\n"')
+            part = "^" + part
+        lines.append(f'{indent}r"{part}"')
+    return "\n".join(lines)
+
+
+def format_process_line(formats: Dict[str, List[str]]) -> str:
+    """
+    Generate REC_PROCESS_LINE from the printk formats of dump_tasks() and
+    dump_task()
+
+    @return: Python code or an empty string if the formats are incomplete
+    """
+    header = [fmt for fmt in formats.get("dump_tasks", []) if "pid" in fmt]
+    lines = [fmt for fmt in formats.get("dump_task", []) if "%" in fmt]
+    if not (header and lines):
+        logging.warning("Incomplete printk formats of dump_tasks() and dump_task()")
+        return ""
+    names = process_table_names(header[0])
+    pattern = printk_format_to_regex(lines[0], names)
+    return f"""\
+
+    # NOTE: This pattern is automatically generated from the printk format of
+    #       dump_task() in mm/oom_kill.c. Please do not change it manually!
+    # {format_printk_comment(header[0])}
+    REC_PROCESS_LINE = re.compile(
+{format_regex(pattern, " " * 8)}
+    )
+"""
+
+
+def format_pattern_overlay(formats: Dict[str, List[str]]) -> str:
+    """
+    Generate EXTRACT_PATTERN_OVERLAY entries from the given printk formats
 
+    Only formats with text besides the values are used. The group names
+    have to be reviewed before the patterns replace an existing pattern.
 
-def cleanup_repo() -> None:
-    """Discard any changes in repo and switch back to master branch"""
-    logging.info("Discard any changes in repo and switch back to master branch")
-    repo.heads.master.checkout(force=True)
+    @param formats: printk formats per function
+    @return: Python code or an empty string if there is no usable format
+    """
+    entries = ""
+    for function, function_formats in formats.items():
+        usable = [fmt for fmt in function_formats if has_printk_text(fmt)]
+        for number, fmt in enumerate(usable, 1):
+            pattern = printk_format_to_regex(
+                fmt, prefix=PRINTK_GROUP_PREFIX.get(function, "")
+            )
+            entries += f"""\
+        # Source: {function}()
+        # {format_printk_comment(fmt)}
+        "{function}() format {number}": (
+{format_regex(pattern, " " * 12)},
+            OOMPatternMatchRule.ALL_OPTIONAL,
+        ),
+"""
+    if not entries:
+        return ""
+    return f"""\
+
+    # NOTE: These patterns are automatically generated from the printk formats.
+    #       Please review the group names before use!
+    EXTRACT_PATTERN_OVERLAY = {{
+{entries}    }}
+"""
 
 
 def write_gfp_oom_template(
@@ -325,25 +1451,50 @@ def write_gfp_oom_template(
     tag: git.TagReference,
     changes: SimpleNamespace,
     gfp_filename: str,
-):
-    """Write prepared GFP flags to a template file"""
+    parent: str = "KernelConfig_XX_YY",
+    current: Optional[SimpleNamespace] = None,
+    name: Optional[str] = None,
+) -> str:
+    """
+    Write prepared GFP flags to a template file
+
+    @param parent: Name of the base class of the new configuration
+    @param current: Resolved kernel details of this release
+    @param name: Name of the new configuration (default: based on the release)
+    @return: Name of the new configuration
+    """
     output_file = os.path.join(cfg.output_dir, f"gfp_{tag.name}")
     logging.info("Write output file for tag %s: %s", tag.name, output_file)
 
-    match = REC_TAG_MAJOR_MINOR_VERSION.match(tag.name)
-    major = match.group("major")
-    minor = match.group("minor")
+    major, minor, suffix = tag_release(tag)
 
     of = open(output_file, "wt")
 
     # write header
-    of.write(f"class KernelConfig_{major}_{minor}(KernelConfig_XX_YY):\n")
+    if not name:
+        name = config_name((major, minor, suffix))
+    of.write(f"class {name}({parent}):\n")
     of.write("    # Supported changes:\n")
     if changes.gfp_flags:
         of.write("    #  * update GFP flags\n")
+    if changes.zone_types:
+        of.write("    #  * update zone types\n")
+    if changes.max_order:
+        of.write("    #  * update MAX_ORDER\n")
+    for kind in PRINTK_KINDS:
+        for function in getattr(changes, kind) or {}:
+            of.write(f"    #  * printk formats of {function}() have changed\n")
     of.write("\n")
-    of.write(f'    name = "Configuration for Linux kernel {major}.{minor} or later"\n')
-    of.write(f'    release = ({major}, {minor}, "")\n')
+    if tag_scheme.vendor:
+        of.write(
+            f'    name = "Configuration for {tag_scheme.vendor} specific Linux kernel '
+            f'{major}.{minor} or later"\n'
+        )
+    else:
+        of.write(
+            f'    name = "Configuration for Linux kernel {major}.{minor} or later"\n'
+        )
+    of.write(f'    release = ({major}, {minor}, "{suffix}")\n')
     of.write("\n")
     if changes.gfp_flags:
         of.write(
@@ -351,9 +1502,9 @@ def write_gfp_oom_template(
     # NOTE: These flags are automatically extracted from the {gfp_filename} file.
     #       Please do not change them manually!
     GFP_FLAGS = {{
-{format_block_gfp_flags("Useful GFP flag combinations", changes.gfp_flags["useful"])}
-{format_block_gfp_flags("Modifier, mobility and placement hints", changes.gfp_flags["modifier"])}
-{format_block_gfp_flags("Plain integer GFP bitmasks (for internal use only)", changes.gfp_flags["plain"])}
+{format_block_gfp_flags("Useful GFP flag combinations", changes.gfp_flags["useful"], changes.gfp_flags["values"])}
+{format_block_gfp_flags("Modifier, mobility and placement hints", changes.gfp_flags["modifier"], changes.gfp_flags["values"])}
+{format_block_gfp_flags("Plain integer GFP bitmasks (for internal use only)", changes.gfp_flags["plain"], changes.gfp_flags["values"])}
     }}
 """
         )
@@ -366,6 +1517,40 @@ def write_gfp_oom_template(
     PAGE_ALLOC_COSTLY_ORDER = {changes.page_order}
 """
         )
+    if changes.zone_types:
+        of.write(
+            f"""\
+
+    # NOTE: These zones are automatically extracted from {MMZONE_H}.
+    #       Please do not change them manually!
+    ZONE_TYPES = {json.dumps(changes.zone_types)}
+"""
+        )
+    if changes.max_order:
+        of.write(
+            f"""\
+
+    # NOTE: This value is automatically extracted from {MMZONE_H}.
+    #       Please do not change it manually!
+    MAX_ORDER = {changes.max_order}
+"""
+        )
+
+    changed_formats = {}
+    for kind in PRINTK_KINDS:
+        changed_formats.update(getattr(changes, kind) or {})
+    if current and ("dump_task" in changed_formats or "dump_tasks" in changed_formats):
+        of.write(format_process_line(current.dump_tasks))
+    overlay = format_pattern_overlay(
+        {
+            function: formats
+            for function, formats in changed_formats.items()
+            if function not in ["dump_task", "dump_tasks", "show_node"]
+        }
+    )
+    if overlay:
+        of.write(overlay)
+    return name
 
 
 if __name__ == "__main__":
@@ -416,6 +1601,59 @@ if __name__ == "__main__":
         type=int,
         help="Record changes in PAGE_ALLOC_COSTLY_ORDER if they differ from the default",
     )
+    parser.add_argument(
+        "--workers",
+        default=None,
+        type=int,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--cache-file",
+        default=None,
+        help="JSON file to keep parsed header files across runs "
+        "(default: blob_cache.json in the output directory)",
+    )
+    parser.add_argument(
+        "--database",
+        default=None,
+        metavar="JSON_FILE",
+        help="Write the GFP flags and PAGE_ALLOC_COSTLY_ORDER of all releases "
+        "with changes additionally to a single versioned JSON file",
+    )
+    parser.add_argument(
+        "--incremental",
+        default=None,
+        metavar="OOMANALYSER_PY",
+        help="Process only the tags after the newest kernel configuration in "
+        "the given OOMAnalyser.py and ignore --major and --minor",
+    )
+    parser.add_argument(
+        "--tag-scheme",
+        default="upstream",
+        choices=sorted(TAG_SCHEMES),
+        help="Preset for the tag names and release suffixes of upstream or "
+        "vendor kernel repositories",
+    )
+    parser.add_argument(
+        "--tag-regex",
+        default=None,
+        help="Regex for the tag names with the named groups major and minor, "
+        "overwrites the regex of the tag scheme",
+    )
+    parser.add_argument(
+        "--tag-suffix",
+        default=None,
+        help="Release suffix, it may contain the named groups of the tag "
+        "regex, e.g. {el}. Overwrites the suffix of the tag scheme",
+    )
+    parser.add_argument(
+        "--diff",
+        default=None,
+        metavar=("OLD_TAG", "NEW_TAG"),
+        nargs=2,
+        help="Print added, removed and renumbered GFP flags between two tags "
+        "instead of writing kernel configurations",
+    )
     parser.add_argument(
         "--version",
         action="version",
@@ -434,32 +1672,112 @@ if __name__ == "__main__":
         logging.error("Repository %s does not exists", cfg.repo_dir)
         sys.exit(1)
 
+    tag_scheme = SimpleNamespace(**vars(TAG_SCHEMES[cfg.tag_scheme]))
+    if cfg.tag_regex:
+        try:
+            tag_scheme.regex = re.compile(cfg.tag_regex)
+        except re.error as e:
+            logging.error("Invalid tag regex %s: %s", cfg.tag_regex, e)
+            sys.exit(1)
+        if not {"major", "minor"} <= set(tag_scheme.regex.groupindex):
+            logging.error('Tag regex needs the named groups "major" and "minor"')
+            sys.exit(1)
+        if cfg.tag_scheme == "upstream":
+            tag_scheme.vendor = "vendor"
+    if cfg.tag_suffix is not None:
+        tag_scheme.suffix = cfg.tag_suffix
+
+    # The header files are read from the git objects of each tag. Therefore,
+    # the working copy stays untouched and bare repositories work as well.
     repo = git.Repo(cfg.repo_dir)
-    if repo.bare:
-        logging.error("Repository in %s is a bare repository - abort", cfg.repo_dir)
-        cleanup_repo()
-        sys.exit(1)
+
+    if cfg.cache_file is None:
+        cfg.cache_file = os.path.join(cfg.output_dir, "blob_cache.json")
+
+    if cfg.diff:
+        sys.exit(0 if diff_releases(repo, *cfg.diff) else 1)
+
+    last_modified_tag = SimpleNamespace(
+        gfp_flags=None,
+        gfp_source="",
+        gfp_blob=None,
+        page_order=None,
+        page_order_source="",
+        **{kind: None for kind in DETAIL_KINDS},
+    )
+    parent = "KernelConfig_XX_YY"
+
+    if cfg.incremental:
+        # Start with the newest configuration to emit only newer changes
+        suffixes = {tag_release(tag)[2] for tag in query_all_tags()} or {""}
+        baseline = read_newest_kernel_config(cfg.incremental, suffixes)
+        if not baseline:
+            logging.error("No kernel configuration found in %s", cfg.incremental)
+            sys.exit(1)
+        logging.info("Continue after %s", baseline.name)
+        cfg.minimum_major_version = baseline.release[0]
+        cfg.minimum_minor_version = baseline.release[1] + 1
+        if baseline.release[2]:
+            # Vendor kernels change within a release, all builds are checked
+            cfg.minimum_minor_version = baseline.release[1]
+        last_modified_tag.gfp_flags = baseline.gfp_flags
+        last_modified_tag.gfp_source = baseline.name
+        last_modified_tag.page_order = baseline.page_order
+        last_modified_tag.page_order_source = baseline.name
+        parent = baseline.name
 
     all_tags = query_all_tags(cfg.minimum_major_version, cfg.minimum_minor_version)
     if not all_tags:
         logging.error("No tags found for repository in %s", cfg.repo_dir)
-        cleanup_repo()
         sys.exit(1)
 
+    # The zone types, MAX_ORDER and printk formats aren't read from
+    # OOMAnalyser.py. They are taken from the tag of the baseline release.
+    seed_blobs = []
+    if cfg.incremental:
+        seed_blobs = [
+            query_tag_blobs(tag)
+            for tag in query_all_tags(*baseline.release[:2])
+            if tag_release(tag)[:2] == baseline.release[:2]
+        ][:1]
+
     logging.info("Start processing %d tags ...", len(all_tags))
 
     details = OrderedDict()
-    last_modified_tag = SimpleNamespace(
-        gfp_flags=None, page_order=None, gfp_filename=""
+
+    # Most header files are identical in many tags. Therefore, only blobs
+    # unknown to the cache are parsed - independently in parallel.
+    blob_cache = load_blob_cache(cfg.cache_file)
+    all_tag_blobs = [query_tag_blobs(tag) for tag in all_tags]
+    jobs = sorted(
+        {
+            (kind, getattr(tag_blobs, kind))
+            for tag_blobs in all_tag_blobs + seed_blobs
+            for kind in BLOB_PARSERS
+            if getattr(tag_blobs, kind)
+            and getattr(tag_blobs, kind) not in blob_cache[kind]
+        }
     )
+    logging.info("Parse %d new header files ...", len(jobs))
+    if jobs:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=cfg.workers, initializer=init_worker, initargs=(cfg.repo_dir,)
+        ) as executor:
+            for (kind, hexsha), value in zip(jobs, executor.map(parse_blob, jobs)):
+                blob_cache[kind][hexsha] = value
+        save_blob_cache(cfg.cache_file, blob_cache)
+
+    for tag_blobs in seed_blobs:
+        for kind in DETAIL_KINDS:
+            setattr(
+                last_modified_tag, kind, blob_cache[kind].get(getattr(tag_blobs, kind))
+            )
 
-    for tag in all_tags:
-        logging.info("Process tag %s", tag.name)
-        prepare_repo(tag)
+    for tag, tag_blobs in zip(all_tags, all_tag_blobs):
+        logging.info("Check tag %s", tag.name)
 
         # process GFP flags
-        gfp_file = search_gfp_file(cfg.repo_dir)
-        if not gfp_file:
+        if not tag_blobs.gfp_filename:
             logging.error(
                 "Missing GFP header file, neither gfp.h nor gfp_types.h exists. Skip tag %s",
                 tag.name,
@@ -468,34 +1786,38 @@ if __name__ == "__main__":
         details[tag] = SimpleNamespace(
             gfp_flags=None,
             page_order=None,
-            gfp_filename=os.path.basename(gfp_file),
+            gfp_filename=tag_blobs.gfp_filename,
+            **{kind: None for kind in DETAIL_KINDS},
         )
-        current_value = extract_gfp_flags(gfp_file)
-        current_json = json.dumps(current_value, sort_keys=True)
         logging.info("Check for differences in GFP flags ...")
 
+        current_flags = blob_cache["gfp_flags"][tag_blobs.gfp_flags]
         if last_modified_tag.gfp_flags is None:  # set current, if never set before
             logging.info("New GFP flags found")
-            details[tag].gfp_flags = current_value
-            details[tag].gfp_flags_json = current_json
-            last_modified_tag.gfp_flags = tag
+            details[tag].gfp_flags = current_flags
+            last_modified_tag.gfp_flags = current_flags
+            last_modified_tag.gfp_source = tag.name
         else:  # already set - check for updates
-            last_json = details[last_modified_tag.gfp_flags].gfp_flags_json
-            if last_json == current_json:
+            # The GFP flags of the previous tag are equal to the flags of the
+            # last modified tag. Identical blobs don't need to be compared.
+            if last_modified_tag.gfp_blob == tag_blobs.gfp_flags or same_gfp_flags(
+                last_modified_tag.gfp_flags, current_flags
+            ):
                 logging.info(
                     "No differences in GFP flags to last tag %s found - ignore it",
-                    last_modified_tag.gfp_flags.name,
+                    last_modified_tag.gfp_source,
                 )
                 details[tag].gfp_flags = None
             else:
                 logging.info("New GFP flags found")
-                details[tag].gfp_flags = current_value
-                details[tag].gfp_flags_json = current_json
-                last_modified_tag.gfp_flags = tag
+                details[tag].gfp_flags = current_flags
+                last_modified_tag.gfp_flags = current_flags
+                last_modified_tag.gfp_source = tag.name
+        last_modified_tag.gfp_blob = tag_blobs.gfp_flags
 
         # Process PAGE_ALLOC_COSTLY_ORDER
         logging.info("Check for differences in PAGE_ALLOC_COSTLY_ORDER ...")
-        current_value = extract_page_alloc_costly_order(cfg.repo_dir)
+        current_value = blob_cache["page_order"].get(tag_blobs.page_order)
         if current_value is None:
             pass  # ignore, as error already logged
         else:
@@ -508,34 +1830,106 @@ if __name__ == "__main__":
                 else:  # value differs from default
                     logging.info("New PAGE_ALLOC_COSTLY_ORDER value found")
                     details[tag].page_order = current_value
-                    last_modified_tag.page_order = tag
+                    last_modified_tag.page_order = current_value
+                    last_modified_tag.page_order_source = tag.name
 
             # already set - check for updates
             else:
                 # do not compare with the default value if a value is already set,
                 # otherwise this change will be lost when changing back to
                 # default (current value) from non-default (last value).
-                last_value = details[last_modified_tag.page_order].page_order
-                if last_value == current_value:  # no changes to last value
+                if last_modified_tag.page_order == current_value:  # no changes
                     logging.info(
                         "No differences for PAGE_ALLOC_COSTLY_ORDER to last tag %s found",
-                        last_modified_tag.page_order.name,
+                        last_modified_tag.page_order_source,
                     )
                     details[tag].page_order = None
                 else:  # value has changed
                     logging.info("New PAGE_ALLOC_COSTLY_ORDER value found")
                     details[tag].page_order = current_value
-                    last_modified_tag.page_order = tag
+                    last_modified_tag.page_order = current_value
+                    last_modified_tag.page_order_source = tag.name
+
+        # Process zone types, MAX_ORDER and printk formats
+        for kind in DETAIL_KINDS:
+            current_value = blob_cache[kind].get(getattr(tag_blobs, kind))
+            if not current_value:
+                continue  # ignore, as error already logged
+            last_value = getattr(last_modified_tag, kind)
+            if current_value == last_value:
+                continue
+            logging.info("New %s found", kind)
+            setattr(last_modified_tag, kind, current_value)
+            if isinstance(current_value, dict) and last_value:
+                # record the printk formats of the changed functions only
+                current_value = {
+                    function: formats
+                    for function, formats in current_value.items()
+                    if last_value.get(function) != formats
+                }
+            setattr(details[tag], kind, current_value)
+
+    # The database contains the resolved values, not only the changes.
+    # In incremental mode, new releases are added to the existing database.
+    database = {"version": KERNEL_DATABASE_VERSION, "releases": {}}
+    if cfg.database and cfg.incremental and os.path.exists(cfg.database):
+        database = load_kernel_database(cfg.database)
+        if database is None:
+            sys.exit(1)
+    current = SimpleNamespace(
+        gfp_flags=None,
+        page_order=cfg.page_order,
+        **{kind: None for kind in DETAIL_KINDS},
+    )
+    if cfg.incremental:
+        current.gfp_flags = baseline.gfp_flags
+        current.page_order = baseline.page_order
+    for tag_blobs in seed_blobs:
+        for kind in DETAIL_KINDS:
+            setattr(current, kind, blob_cache[kind].get(getattr(tag_blobs, kind)))
 
     logging.info("Write output files...")
+    used_names = {parent}
     for tag in details:
-        if details[tag].gfp_flags or details[tag].page_order:
+        if details[tag].gfp_flags:
+            current.gfp_flags = details[tag].gfp_flags
+        if details[tag].page_order:
+            current.page_order = details[tag].page_order
+        for kind in DETAIL_KINDS:
+            value = getattr(details[tag], kind)
+            if value and isinstance(value, dict):
+                setattr(current, kind, dict(getattr(current, kind) or {}, **value))
+            elif value:
+                setattr(current, kind, value)
+        if has_changes(details[tag]):
+            if cfg.database:
+                key, entry = kernel_database_entry(
+                    tag=tag,
+                    gfp_filename=details[tag].gfp_filename,
+                    current=current,
+                )
+                database["releases"][key] = entry
+            name = config_name(tag_release(tag))
+            if name in used_names:
+                # Vendor kernels change within a release, add the build number
+                build = tag_sort_key(tag_scheme.regex.match(tag.name))[2:]
+                name += "".join(f"_{number}" for number in build)
+            used_names.add(name)
             write_gfp_oom_template(
                 cfg=cfg,
                 tag=tag,
                 changes=details[tag],
                 gfp_filename=details[tag].gfp_filename,
+                parent=parent,
+                current=current,
+                name=name,
             )
+            # Chain the new configurations in incremental mode only, the
+            # placeholder is kept otherwise.
+            if cfg.incremental:
+                parent = name
+
+    if cfg.database:
+        save_kernel_database(cfg.database, database)
 
-    cleanup_repo()
     logging.info("Script is done")
@@ -4,13 +4,19 @@
 # License: MIT (see LICENSE.txt)
 # THIS PROGRAM COMES WITH NO WARRANTY
 
+import asyncio
 import http.server
 import inspect
+import io
+import json
+import logging
 import os
+import pickle
 import re
 import socketserver
 import threading
 import warnings
+from types import SimpleNamespace
 from typing import Any, Dict, Generator, List, Optional, Tuple
 
 import pytest
@@ -24,6 +30,8 @@ from selenium.webdriver.support.wait import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
 import OOMAnalyser
+import batch_analyser
+import extract_kernel_details
 
 
 class MyRequestHandler(http.server.SimpleHTTPRequestHandler):
@@ -1187,26 +1195,24 @@ Hardware name: HP ProLiant DL385 G7, BIOS A18 12/08/2012
         [
             pytest.param("Normal", 6, 0, 0, id="Normal-order6-node0"),
             pytest.param("Normal", 6, 1, 2, id="Normal-order6-node1"),
-            pytest.param("Normal", 6, "free_chunks_total", 2, id="Normal-order6-total"),
+            pytest.param("Normal", 6, None, 2, id="Normal-order6-total"),
             pytest.param("Normal", 0, 0, 1231, id="Normal-order0-node0"),
             pytest.param("Normal", 0, 1, 2245, id="Normal-order0-node1"),
-            pytest.param(
-                "Normal", 0, "free_chunks_total", 3476, id="Normal-order0-total"
-            ),
+            pytest.param("Normal", 0, None, 3476, id="Normal-order0-total"),
             pytest.param("DMA", 5, 0, 1, id="DMA-order5-node0"),
-            pytest.param("DMA", 5, "free_chunks_total", 1, id="DMA-order5-total"),
+            pytest.param("DMA", 5, None, 1, id="DMA-order5-total"),
             pytest.param("DMA32", 4, 0, 157, id="DMA32-order4-node0"),
-            pytest.param("DMA32", 4, "free_chunks_total", 157, id="DMA32-order4-total"),
-            pytest.param(
-                "Normal", "total_free_kb_per_node", 0, 38260, id="Normal-total_kb-node0"
-            ),
-            pytest.param(
-                "Normal", "total_free_kb_per_node", 1, 50836, id="Normal-total_kb-node1"
-            ),
+            pytest.param("DMA32", 4, None, 157, id="DMA32-order4-total"),
+            pytest.param("Normal", None, 0, 38260, id="Normal-total_kb-node0"),
+            pytest.param("Normal", None, 1, 50836, id="Normal-total_kb-node1"),
         ],
     )
     def test_090_extract_zoneinfo(self, zone, order, node, expect_count) -> None:
-        """Test extracting zone usage information"""
+        """Test extracting zone usage information
+
+        An order of None returns the total free memory in kB and a node of
+        None the free chunks of all nodes.
+        """
         oom = OOMAnalyser.OOMEntity(OOMAnalyser.OOMDisplay.example_rhel7)
         analyser = OOMAnalyser.OOMAnalyser(oom)
         success = analyser.analyse()
@@ -1218,15 +1224,35 @@ Hardware name: HP ProLiant DL385 G7, BIOS A18 12/08/2012
             ".el7.",
         ), "Wrong KernelConfig release"
         buddyinfo = analyser.oom_result.buddyinfo
-        assert zone in buddyinfo, f"Missing details for zone {zone} in buddy info"
-        assert (
-            order in buddyinfo[zone]
-        ), f'Missing details for order "{order}" in buddy info'
-        count = buddyinfo[zone][order][node]
+        assert buddyinfo.has_zone(
+            zone
+        ), f"Missing details for zone {zone} in buddy info"
+        if order is None:
+            count = buddyinfo.total_free_kb(zone, node)
+        elif node is None:
+            count = buddyinfo.free_chunks_total(zone, order)
+        else:
+            count = buddyinfo.free_chunks(zone, order, node)
         assert (
             count == expect_count
         ), f'Wrong chunk count for order {order} in zone "{zone}" for node "{node}" (got: {count}, expect {expect_count})'
 
+    def test_095_buddyinfo_missing_zone(self) -> None:
+        """Test querying zones which don't exist on all nodes"""
+        oom = OOMAnalyser.OOMEntity(OOMAnalyser.OOMDisplay.example_rhel7)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        assert analyser.analyse(), analyser.oom_result.error_msg
+
+        buddyinfo = analyser.oom_result.buddyinfo
+        assert buddyinfo.zones == ["DMA", "DMA32", "Normal"]
+        assert buddyinfo.nodes == [0, 1]
+        assert buddyinfo.max_order == 11
+        assert buddyinfo.free_chunks("DMA", 4, 1) is None
+        assert buddyinfo.has_free_chunk("DMA", 0, 1) is None
+        assert buddyinfo.total_free_kb("DMA", 1) is None
+        assert buddyinfo.free_chunks("Movable", 0, 0) is None
+        assert buddyinfo.has_free_chunk("Normal", 11, 1) is False
+
     @pytest.mark.parametrize(
         "zone,node,level_name,expect_level",
         [
@@ -1271,6 +1297,87 @@ Hardware name: HP ProLiant DL385 G7, BIOS A18 12/08/2012
             numa_node == 0
         ), f"Wrong node with memory shortage (got: {numa_node}, expect: 0)"
 
+    def test_097_fragmentation_indices(self) -> None:
+        """Test the fragmentation index and the unusable free space index"""
+        oom = OOMAnalyser.OOMEntity(OOMAnalyser.OOMDisplay.example_rhel7)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        assert analyser.analyse(), analyser.oom_result.error_msg
+        buddyinfo = analyser.oom_result.buddyinfo
+
+        assert buddyinfo.fragmentation_index("Normal", 0, 0) == -1000
+        assert buddyinfo.fragmentation_index("Normal", 6, 0) == 942
+        assert buddyinfo.unusable_free_index("Normal", 0, 0) == 0
+        assert buddyinfo.unusable_free_index("Normal", 6, 0) == 1000
+        assert buddyinfo.fragmentation_index("DMA", 0, 1) is None
+
+        # compare with the calculation in mm/vmstat.c for every order separately
+        for zone in buddyinfo.zones:
+            for node in buddyinfo.nodes:
+                if buddyinfo.total_free_kb(zone, node) is None:
+                    continue
+                counts = [
+                    buddyinfo.free_chunks(zone, order, node)
+                    for order in range(buddyinfo.max_order)
+                ]
+                free_pages = sum(c << o for o, c in enumerate(counts))
+                free_blocks = sum(counts)
+                for order in range(buddyinfo.max_order):
+                    suitable = sum(
+                        c << (o - order) for o, c in enumerate(counts) if o >= order
+                    )
+                    unusable = (
+                        (free_pages - (suitable << order)) * 1000 // free_pages
+                        if free_pages
+                        else 1000
+                    )
+                    if not free_blocks:
+                        fragmentation = 0
+                    elif suitable:
+                        fragmentation = -1000
+                    else:
+                        fragmentation = 1000 - (
+                            (1000 + free_pages * 1000 // (1 << order)) // free_blocks
+                        )
+                    assert buddyinfo.unusable_free_index(zone, order, node) == unusable
+                    assert (
+                        buddyinfo.fragmentation_index(zone, order, node)
+                        == fragmentation
+                    )
+
+    def test_099_node_meminfo(self) -> None:
+        """Test extracting the per-node Mem-Info lines and hugepage pools"""
+        oom = OOMAnalyser.OOMEntity(OOMAnalyser.OOMDisplay.example_archlinux_6_1_1)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        assert analyser.analyse(), analyser.oom_result.error_msg
+
+        node_meminfo = analyser.oom_result.node_meminfo
+        assert list(node_meminfo) == [0]
+        node = node_meminfo[0]
+        assert node["active_anon_kb"] == 5653768
+        assert node["isolated_anon_kb"] == 0
+        assert node["anon_thp_kb"] == 1236992
+        assert node["all_unreclaimable"] is False
+        assert sorted(node["zones"]) == ["DMA", "DMA32", "Normal"]
+        assert node["zones"]["Normal"]["boost_kb"] == 8192
+        assert node["zones"]["Normal"]["reserved_highatomic_kb"] == 0
+        assert node["hugepages"] == [
+            {
+                "hugepages_total": 0,
+                "hugepages_free": 0,
+                "hugepages_surp": 0,
+                "hugepages_size_kb": 2048,
+            }
+        ]
+
+        oom = OOMAnalyser.OOMEntity(OOMAnalyser.OOMDisplay.example_rhel7)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        assert analyser.analyse(), analyser.oom_result.error_msg
+        node_meminfo = analyser.oom_result.node_meminfo
+        assert sorted(node_meminfo) == [0, 1]
+        assert node_meminfo[0]["zones"]["DMA"]["all_unreclaimable"] is True
+        assert node_meminfo[1]["zones"]["Normal"]["pages_scanned"] == 125777
+        assert len(node_meminfo[1]["hugepages"]) == 2
+
     def test_105_max_order(self):
         """Check that the kernel configuration MAX_ORDER matches the expected value."""
         oom = OOMAnalyser.OOMEntity(OOMAnalyser.OOMDisplay.example_rhel7)
@@ -1309,7 +1416,7 @@ Hardware name: HP ProLiant DL385 G7, BIOS A18 12/08/2012
         assert analyser.analyse(), analyser.oom_result.error_msg
 
         result = analyser.oom_result
-        zones = sorted(result.buddyinfo.keys())
+        zones = sorted(result.buddyinfo.zones)
         assert (
             zones == expected_zones
         ), f"Wrong zones in buddy info (got: {zones}, expect: {expected_zones})"
@@ -1403,6 +1510,264 @@ Hardware name: HP ProLiant DL385 G7, BIOS A18 12/08/2012
             == OOMAnalyser.OOMAllocationFailureReason.FAILED_BELOW_LOW_WATERMARK
         ), "Unexpected reason why the memory allocation has failed."
 
+    @pytest.mark.parametrize(
+        "zone,order,node,expected_verdict",
+        [
+            pytest.param(
+                "Normal",
+                0,
+                0,
+                OOMAnalyser.OOMAllocationFailureReason.FAILED_BELOW_LOW_WATERMARK,
+                id="Normal-order0-node0",
+            ),
+            pytest.param(
+                "Normal",
+                0,
+                1,
+                OOMAnalyser.OOMAllocationFailureReason.WOULD_SUCCEED,
+                id="Normal-order0-node1",
+            ),
+            pytest.param(
+                "Normal",
+                8,
+                1,
+                OOMAnalyser.OOMAllocationFailureReason.WOULD_SUCCEED,
+                id="Normal-order8-node1",
+            ),
+            pytest.param(
+                "Normal",
+                9,
+                1,
+                OOMAnalyser.OOMAllocationFailureReason.FAILED_NO_FREE_CHUNKS,
+                id="Normal-order9-node1",
+            ),
+            pytest.param(
+                "DMA32",
+                0,
+                0,
+                OOMAnalyser.OOMAllocationFailureReason.FAILED_BELOW_LOW_WATERMARK,
+                id="DMA32-order0-node0",
+            ),
+            pytest.param("DMA", 0, 1, None, id="DMA-order0-node1"),
+            pytest.param("Normal", 11, 1, None, id="Normal-order11-node1"),
+        ],
+    )
+    def test_115_alloc_feasibility(self, zone, order, node, expected_verdict) -> None:
+        """Test the allocation verdicts for all zones, orders and nodes"""
+        # Node 1 has enough free memory to pass the watermark check
+        example = OOMAnalyser.OOMDisplay.example_rhel7.replace(
+            "Node 1 Normal free:49436kB", "Node 1 Normal free:99436kB"
+        )
+        oom = OOMAnalyser.OOMEntity(example)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        assert analyser.analyse(), analyser.oom_result.error_msg
+
+        feasibility = analyser.oom_result.alloc_feasibility
+        verdict = feasibility.verdict(zone, order, node)
+        assert verdict == expected_verdict, (
+            f'Wrong verdict for Node {node}, Zone "{zone}" and order {order} '
+            f"(got: {verdict}, expected {expected_verdict})"
+        )
+        assert feasibility.satisfiable(0) == [("Normal", 1)]
+        assert feasibility.threshold_kb("Normal", 0) == 45980
+        assert (
+            analyser.oom_result.mem_alloc_failure
+            == OOMAnalyser.OOMAllocationFailureReason.FAILED_BELOW_LOW_WATERMARK
+        ), "Verdict of the trigger process changed"
+
+    @pytest.mark.parametrize(
+        "replacements,expected_steps",
+        [
+            pytest.param(
+                [],
+                [
+                    (0, "Normal", "ALLOCATION_FAILED_BELOW_LOW_WATERMARK"),
+                    (0, "DMA32", "ALLOCATION_FAILED_BELOW_LOW_WATERMARK"),
+                    (0, "DMA", "ALLOCATION_FAILED_BELOW_LOW_WATERMARK"),
+                    (1, "Normal", "ALLOCATION_FAILED_BELOW_LOW_WATERMARK"),
+                ],
+                id="all-nodes-failed",
+            ),
+            pytest.param(
+                [("Node 0 DMA32 free:59728kB", "Node 0 DMA32 free:99728kB")],
+                [
+                    (0, "Normal", "ALLOCATION_FAILED_BELOW_LOW_WATERMARK"),
+                    (0, "DMA32", "ALLOCATION_WOULD_SUCCEED"),
+                ],
+                id="fallback-to-DMA32",
+            ),
+            pytest.param(
+                [
+                    (
+                        "gfp_mask=0x201da, order=0",
+                        "gfp_mask=0x201da, nodemask=1, order=0",
+                    )
+                ],
+                [(1, "Normal", "ALLOCATION_FAILED_BELOW_LOW_WATERMARK")],
+                id="nodemask",
+            ),
+        ],
+    )
+    def test_117_zonelist_walk(self, replacements, expected_steps) -> None:
+        """Test the simulated walk through the zonelist"""
+        example = OOMAnalyser.OOMDisplay.example_rhel7
+        for old, new in replacements:
+            assert old in example
+            example = example.replace(old, new)
+        oom = OOMAnalyser.OOMEntity(example)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        assert analyser.analyse(), analyser.oom_result.error_msg
+
+        steps = [
+            (step["node"], step["zone"], step["verdict"])
+            for step in analyser.oom_result.zonelist_walk
+        ]
+        assert (
+            steps == expected_steps
+        ), f"Wrong zonelist walk (got: {steps}, expect: {expected_steps})"
+        first_step = analyser.oom_result.zonelist_walk[0]
+        assert first_step["free_kb"] < first_step["threshold_kb"]
+
+    def test_118_unreclaimable_slab(self) -> None:
+        """Test extraction and summary of the unreclaimable slab table"""
+        oom = OOMAnalyser.OOMEntity(OOMAnalyser.OOMDisplay.example_archlinux_6_1_1)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        assert analyser.analyse(), analyser.oom_result.error_msg
+        assert analyser.oom_result.unreclaimable_slab == {
+            "name": [],
+            "used_kb": [],
+            "total_kb": [],
+        }
+        assert "unreclaimable_slab_total_kb" not in analyser.oom_result.details
+
+        slab_table = (
+            "0 pages hwpoisoned\n"
+            "Unreclaimable slab info:\n"
+            "Name                      Used          Total\n"
+            "kmalloc-2k                 512KB       1024KB\n"
+            "task_struct              25600KB      27840KB\n"
+            "kmalloc-64                  64KB         64KB\n"
+            "Tasks state (memory values in pages):"
+        )
+        example = OOMAnalyser.OOMDisplay.example_archlinux_6_1_1.replace(
+            "0 pages hwpoisoned\nTasks state (memory values in pages):", slab_table
+        )
+        oom = OOMAnalyser.OOMEntity(example)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        analyser.UNRECLAIMABLE_SLAB_TOP_N = 2
+        assert analyser.analyse(), analyser.oom_result.error_msg
+        assert analyser.oom_result.unreclaimable_slab == {
+            "name": ["task_struct", "kmalloc-2k", "kmalloc-64"],
+            "used_kb": [25600, 512, 64],
+            "total_kb": [27840, 1024, 64],
+        }
+        details = analyser.oom_result.details
+        assert details["unreclaimable_slab_used_kb"] == 26176
+        assert details["unreclaimable_slab_total_kb"] == 28928
+        assert details["_unreclaimable_slab_top"] == [
+            {"name": "task_struct", "used_kb": 25600, "total_kb": 27840, "percent": 96},
+            {"name": "kmalloc-2k", "used_kb": 512, "total_kb": 1024, "percent": 3},
+        ]
+        # the process table is still extracted after the slab table
+        assert details["_pstable"]
+
+    @pytest.mark.parametrize(
+        "k, items, expected",
+        [
+            pytest.param(3, [5, 1, 9, 3, 7, 2], [9, 7, 5], id="k-smaller-than-items"),
+            pytest.param(5, [2, 1], [2, 1], id="k-larger-than-items"),
+            pytest.param(0, [2, 1], [], id="k-zero"),
+            pytest.param(3, [], [], id="no-items"),
+        ],
+    )
+    def test_119a_nlargest(self, k, items, expected) -> None:
+        """Test the bounded heap to find the largest items"""
+        assert OOMAnalyser.nlargest(k, items, lambda i: i) == expected
+
+    def test_119b_nlargest_keeps_order_of_identical_keys(self) -> None:
+        """Test that items with identical keys keep their original order"""
+        items = [("a", 1), ("b", 2), ("c", 1), ("d", 2), ("e", 1)]
+        result = OOMAnalyser.nlargest(3, items, lambda i: i[1])
+        assert result == [("b", 2), ("d", 2), ("a", 1)]
+
+    def test_119c_process_memory(self) -> None:
+        """Test the memory attribution to processes and process names"""
+        mysqld = "[ 6576] 12345  6576  8478546  5157063   15483  1527848             0 mysqld\n"
+        thread = "[ 6577] 12345  6576  8478546  5157063   15483  1527848             0 mysqld\n"
+        example = OOMAnalyser.OOMDisplay.example_rhel7
+        assert mysqld in example
+        oom = OOMAnalyser.OOMEntity(example)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        assert analyser.analyse(), analyser.oom_result.error_msg
+        ram_used_kb = analyser.oom_result.details["system_total_ram_used_kb"]
+
+        oom = OOMAnalyser.OOMEntity(example.replace(mysqld, mysqld + thread))
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        analyser.PROCESS_MEMORY_TOP_N = 2
+        assert analyser.analyse(), analyser.oom_result.error_msg
+        result = analyser.oom_result
+        # the thread doesn't increase the used memory
+        assert result.details["system_total_ram_used_kb"] == ram_used_kb
+        assert len(result.process_memory) == len(result.details["_pstable"]) - 1
+
+        expected_mysqld = {
+            "tgid": 6576,
+            "name": "mysqld",
+            "threads": 2,
+            "rss_kb": 5157063 * 4,
+            "swap_kb": 1527848 * 4,
+            "pgtables_kb": 15483 * 4,
+            "total_kb": (5157063 + 1527848 + 15483) * 4,
+            "ram_percent": 79,
+        }
+        assert [p["tgid"] for p in result.details["_top_processes"]] == [6576, 27502]
+        assert result.details["_top_processes"][0] == expected_mysqld
+        assert [g["name"] for g in result.details["_top_process_names"]] == [
+            "mysqld",
+            "java",
+        ]
+        sshd = [g for g in result.process_memory_by_name if g["name"] == "sshd"][0]
+        assert sshd["processes"] == sshd["threads"] == 13
+        assert sshd["rss_kb"] == sum(
+            p["rss_kb"] for p in result.process_memory if p["name"] == "sshd"
+        )
+
+    def test_119d_kill_candidates(self) -> None:
+        """Test the approximated badness score and the ranking of kill candidates"""
+        oom = OOMAnalyser.OOMEntity(OOMAnalyser.OOMDisplay.example_ubuntu2110)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        analyser.KILL_CANDIDATES_TOP_N = 3
+        assert analyser.analyse(), analyser.oom_result.error_msg
+        ranking = analyser.oom_result.kill_ranking
+        assert ranking["expected_pid"] == ranking["killed_pid"] == 651
+        assert ranking["killed_rank"] == 1
+        assert ranking["killed_as_expected"]
+        # snapd uses more memory, but is protected by oom_score_adj
+        assert ranking["expected_pid_without_adj"] == 611
+        assert ranking["adj_changed_outcome"]
+        candidates = analyser.oom_result.kill_candidates
+        assert [c["pid"] for c in candidates] == [651, 608, 615]
+        assert candidates[0]["badness"] == candidates[0]["points"]
+
+        # an unkillable process is not a candidate
+        mysqld = "12345  6576  8478546  5157063   15483  1527848             0 mysqld"
+        example = OOMAnalyser.OOMDisplay.example_rhel7
+        assert mysqld in example
+        oom = OOMAnalyser.OOMEntity(
+            example.replace(mysqld, mysqld.replace("    0 mysqld", "-1000 mysqld"))
+        )
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        assert analyser.analyse(), analyser.oom_result.error_msg
+        ranking = analyser.oom_result.kill_ranking
+        assert ranking["expected_pid"] == 27502
+        assert ranking["killed_pid"] == 6576
+        assert ranking["killed_rank"] is None
+        assert not ranking["killed_as_expected"]
+        assert 6576 not in [c["pid"] for c in analyser.oom_result.kill_candidates]
+        # but it's still part of the ranking without oom_score_adj
+        assert ranking["expected_pid_without_adj"] == 6576
+        assert ranking["adj_changed_outcome"]
+
     def test_120_fragmentation(self) -> None:
         """Test memory fragmentation"""
         oom = OOMAnalyser.OOMEntity(OOMAnalyser.OOMDisplay.example_rhel7)
@@ -1671,6 +2036,780 @@ Hardware name: HP ProLiant DL385 G7, BIOS A18 12/08/2012
             result == expected
         ), f"got {result}, expected {expected} for platform={platform!r}, limit_kb={limit_kb}"
 
+    def test_170_cgroup_memory_stat(self) -> None:
+        """Test the generic tokenizer for the cgroup memory.stat block"""
+        # move "slab" to the end and add a key unknown to all kernel configurations
+        example = OOMAnalyser.OOMDisplay.example_proxmox_cgroup_oom.replace(
+            "                          slab 22183352\n", ""
+        ).replace(
+            "                          thp_collapse_alloc 0\n",
+            "                          thp_collapse_alloc 0\n"
+            "                          slab 22183352\n"
+            "                          zswap 4096\n",
+        )
+        oom = OOMAnalyser.OOMEntity(example)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        assert analyser.analyse(), analyser.oom_result.error_msg
+        assert analyser.oom_result.oom_type == OOMAnalyser.OOMType.CGROUP_V2
+
+        stat = analyser.oom_result.cgroup_memory_stat
+        assert len(stat) == 41
+        assert list(stat.keys())[:2] == ["anon", "file"]
+        assert stat["anon"] == 31154200576
+        assert stat["slab"] == 22183352
+        assert stat["zswap"] == 4096
+        details = analyser.oom_result.details
+        assert details["cgroup_memory_anon_bytes"] == 31154200576
+        assert details["cgroup_memory_workingset_nodereclaim_bytes"] == 266042
+        assert details["cgroup_memory_zswap_bytes"] == 4096
+        # the block ends before the process table
+        assert details["_pstable"]
+
+        # cgroup v1 before 5.3 prints all values of a cgroup in a single line
+        example = OOMAnalyser.OOMDisplay.example_proxmox_cgroup_oom
+        start = example.index("[Di Aug 12 03:54:03 2025] swap: usage")
+        end = example.index("[Di Aug 12 03:54:03 2025] Tasks state")
+        example = (
+            example[:start]
+            + "[Di Aug 12 03:54:03 2025] memory+swap: usage 31211520kB, "
+            "limit 9007199254740988kB, failcnt 0\n"
+            "[Di Aug 12 03:54:03 2025] kmem: usage 0kB, "
+            "limit 9007199254740988kB, failcnt 0\n"
+            "[Di Aug 12 03:54:03 2025] Memory cgroup stats for /lxc/39004: "
+            "cache:672152KB rss:30423984KB rss_huge:0KB shmem:671856KB "
+            "mapped_file:381480KB swap:0KB unevictable:0KB\n"
+            "[Di Aug 12 03:54:03 2025] Memory cgroup stats for /lxc/39004/ns: "
+            "cache:4KB rss:8KB rss_huge:0KB shmem:0KB "
+            "mapped_file:0KB swap:0KB unevictable:0KB\n" + example[end:]
+        )
+        oom = OOMAnalyser.OOMEntity(example)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        assert analyser.analyse(), analyser.oom_result.error_msg
+        assert analyser.oom_result.oom_type == OOMAnalyser.OOMType.CGROUP_V1
+        stat = analyser.oom_result.cgroup_memory_stat
+        assert list(stat.keys()) == [
+            "file",
+            "anon",
+            "rss_huge",
+            "shmem",
+            "mapped_file",
+            "swap",
+            "unevictable",
+        ]
+        assert stat["anon"] == 30423984 * 1024
+        assert stat["file"] == 672152 * 1024
+        details = analyser.oom_result.details
+        assert details["cgroup_memory_shmem_bytes"] == 671856 * 1024
+        assert details["_pstable"]
+
+        oom = OOMAnalyser.OOMEntity(OOMAnalyser.OOMDisplay.example_rhel7)
+        analyser = OOMAnalyser.OOMAnalyser(oom)
+        assert analyser.analyse(), analyser.oom_result.error_msg
+        assert analyser.oom_result.cgroup_memory_stat == {}
+
+    def test_180_precalculated_gfp_values(self) -> None:
+        """Test that already evaluated GFP flag values are used unchanged"""
+
+        class KernelConfigPrecalculated(OOMAnalyser.BaseKernelConfig):
+            GFP_FLAGS = {
+                # evaluated from left to right, the string would result in 0x00
+                "GFP_TRANSHUGE_LIGHT": {
+                    "value": "___GFP_A | ___GFP_B & ~___GFP_B",
+                    "_value": 0x01,
+                },
+                "GFP_UNEVALUATED": {"value": "___GFP_A | ___GFP_B"},
+                "___GFP_A": {"value": 0x01},
+                "___GFP_B": {"value": 0x02},
+            }
+
+        kcfg = KernelConfigPrecalculated()
+        assert kcfg.GFP_FLAGS["GFP_TRANSHUGE_LIGHT"]["_value"] == 0x01
+        assert kcfg.GFP_FLAGS["GFP_UNEVALUATED"]["_value"] == 0x03
+        assert kcfg._gfp_flag2decimal("GFP_TRANSHUGE_LIGHT") == 0x01
+
+
+@pytest.mark.python_only
+class TestBatchAnalyser(BaseTests):
+    """Test the batch analysis of OOM messages outside the browser"""
+
+    @staticmethod
+    async def _post(port: int, body: bytes, path: str = "/analyse") -> Tuple[int, Dict]:
+        """Post the body to the ingestion server and return status and JSON response"""
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1")
+        )
+        writer.write(body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        header, _, content = response.partition(b"\r\n\r\n")
+        status = int(header.split()[1])
+        return status, json.loads(content)
+
+    def test_010_server_analyse(self) -> None:
+        """Test analysing OOM messages with the ingestion server on localhost"""
+
+        async def run() -> List[Tuple[int, Dict]]:
+            server = batch_analyser.AnalysisServer(workers=1, max_request_size=20000)
+            port = await server.start()
+            try:
+                return [
+                    await self._post(
+                        port, OOMAnalyser.OOMDisplay.example_rhel7.encode()
+                    ),
+                    await self._post(port, b"no OOM"),
+                    await self._post(port, b"x" * 20001),
+                    await self._post(port, b"", path="/unknown"),
+                ]
+            finally:
+                await server.stop()
+
+        results = asyncio.run(run())
+
+        status, response = results[0]
+        assert status == 200, f"Analysis failed: {response}"
+        assert response["kernel_version"] == "3.10.0-514.6.1.el7.x86_64"
+        assert response["details"]["trigger_proc_name"] == "sed"
+        assert (
+            response["mem_alloc_failure"]
+            == OOMAnalyser.OOMAllocationFailureReason.FAILED_BELOW_LOW_WATERMARK
+        )
+        assert {p["pid"] for p in response["pstable"]} >= {390, 6576}
+
+        for (status, response), expected_status in zip(results[1:], [422, 413, 404]):
+            assert (
+                status == expected_status
+            ), f"Unexpected HTTP status (got: {status}, expect: {expected_status})"
+            assert response["error"], "Missing error message"
+
+    def test_020_server_backpressure(self) -> None:
+        """Test rejecting requests if too many requests are pending"""
+
+        async def run() -> int:
+            server = batch_analyser.AnalysisServer(workers=1, max_pending=0)
+            port = await server.start()
+            try:
+                status, _ = await self._post(
+                    port, OOMAnalyser.OOMDisplay.example_rhel7.encode()
+                )
+            finally:
+                await server.stop()
+            return status
+
+        status = asyncio.run(run())
+        assert status == 503, f"Unexpected HTTP status (got: {status}, expect: 503)"
+
+    def test_030_result_cache(self, tmp_path) -> None:
+        """Test the content-addressed cache for analysis results"""
+        example = OOMAnalyser.OOMDisplay.example_rhel7
+        prefixed = "\n".join(
+            f"Jan 22 10:11:12 myhost kernel: {line}" for line in example.splitlines()
+        )
+        key = batch_analyser.oom_text_key(example)
+        assert key == batch_analyser.oom_text_key(
+            prefixed
+        ), "Line prefixes should not change the cache key"
+
+        result = batch_analyser.analyse_oom_text(example)
+        cache = batch_analyser.ResultCache(max_entries=1)
+        cache.put(key, result)
+        cache.put("other", result)
+        assert len(cache) == 1
+        assert cache.get(key) is None, "Least recently used entry not evicted"
+        assert cache.get("other") is result
+
+        filename = str(tmp_path / "cache")
+        cache = batch_analyser.ResultCache(filename=filename)
+        cache.put(key, result)
+        cache.close()
+        cache = batch_analyser.ResultCache(filename=filename)
+        success, oom_result = cache.get(key)
+        cache.close()
+        assert success
+        assert oom_result.kversion == "3.10.0-514.6.1.el7.x86_64"
+
+        # Cache hits don't use the worker pool and thereby bypass the backpressure
+        async def run() -> Tuple[int, Dict]:
+            cache = batch_analyser.ResultCache()
+            cache.put(key, result)
+            server = batch_analyser.AnalysisServer(
+                workers=1, max_pending=0, cache=cache
+            )
+            port = await server.start()
+            try:
+                return await self._post(port, prefixed.encode())
+            finally:
+                await server.stop()
+
+        status, response = asyncio.run(run())
+        assert status == 200, f"Unexpected HTTP status (got: {status}, expect: 200)"
+        assert response["details"]["trigger_proc_name"] == "sed"
+
+        # Identical OOMs are analysed once, failed analyses aren't cached
+        logfile = tmp_path / "messages"
+        logfile.write_text(
+            prefixed
+            + "\n"
+            + prefixed.replace("myhost", "otherhost")
+            + "\nJan 22 10:11:12 myhost kernel: broken invoked oom-killer: gfp_mask=0x0"
+            + "\nJan 22 10:11:12 myhost kernel: Killed process 1 (broken)\n"
+        )
+        cache = batch_analyser.ResultCache()
+        results = list(batch_analyser.analyse_files([str(logfile)], 1, cache))
+        assert [success for _, success, _ in results] == [True, True, False]
+        assert results[0][2].kversion == results[1][2].kversion
+        assert len(cache) == 1, "Failed analysis should not be cached"
+        assert cache.hits == 0 and cache.misses == 2
+
+        results = list(batch_analyser.analyse_files([str(logfile)], 1, cache))
+        assert [success for _, success, _ in results] == [True, True, False]
+        assert cache.hits == 1
+
+        # The fleet report caches only the summaries
+        results = list(
+            batch_analyser.analyse_files([str(logfile)], 1, cache, summarise=True)
+        )
+        assert [success for _, success, _ in results] == [True, True, False]
+        assert results[0][2]["kernel_version"] == "3.10.0-514.6.1.el7.x86_64"
+        assert cache.get("summary:" + key) == (True, results[0][2])
+        assert isinstance(cache.get(key)[1], OOMAnalyser.OOMResult)
+
+    def test_040_split_oom_blocks(self) -> None:
+        """Test splitting a log file into single OOM messages"""
+        lines = ["noise\n"]
+        for example in [
+            OOMAnalyser.OOMDisplay.example_rhel7,
+            OOMAnalyser.OOMDisplay.example_ubuntu2110,
+        ]:
+            lines.extend(f"host kernel: {line}\n" for line in example.splitlines())
+            lines.append("noise\n")
+        lines.append("host kernel: incomplete invoked oom-killer: gfp_mask=0x0\n")
+
+        blocks = list(batch_analyser.split_oom_blocks(lines))
+        assert len(blocks) == 2
+        assert "invoked oom-killer:" in blocks[0].splitlines()[0]
+        assert "Killed process" in blocks[1].splitlines()[-1]
+
+    def test_050_fleet_aggregation(self) -> None:
+        """Test the streaming aggregation of many analysis results"""
+        aggregator = batch_analyser.FleetAggregator(top=2)
+        for index, example in enumerate(
+            [
+                OOMAnalyser.OOMDisplay.example_rhel7,
+                OOMAnalyser.OOMDisplay.example_rhel7,
+                OOMAnalyser.OOMDisplay.example_ubuntu2110,
+            ]
+        ):
+            success, oom_result = batch_analyser.analyse_oom_text(example)
+            assert success
+            aggregator.add(batch_analyser.summarise_oom_result(oom_result, str(index)))
+        aggregator.add_failed()
+
+        report = aggregator.report()
+        assert report["total"] == 3
+        assert report["failed"] == 1
+        by_kernel = report["groups"]["kernel_version"]
+        assert list(by_kernel) == ["3.10.0-514.6.1.el7.x86_64", "5.13.0-19-generic"]
+        rhel = by_kernel["3.10.0-514.6.1.el7.x86_64"]
+        assert rhel["count"] == 2
+        assert rhel["killed_proc_total_rss_kb"]["p50"] == pytest.approx(
+            20629004, rel=0.01
+        )
+        assert [o["source"] for o in rhel["top_offenders"]] == ["0", "1"]
+        assert report["groups"]["killed_proc_name"]["mysqld"]["count"] == 2
+
+    def test_055_worker_summaries(self, tmp_path) -> None:
+        """Test that the workers return only the summaries for the fleet report"""
+        examples = [
+            OOMAnalyser.OOMDisplay.example_rhel7,
+            OOMAnalyser.OOMDisplay.example_ubuntu2110,
+        ]
+        logfile = tmp_path / "messages"
+        logfile.write_text("\n".join(examples) + "\n")
+
+        results = list(batch_analyser.analyse_files([str(logfile)], 1, summarise=True))
+        assert [source for source, _, _ in results] == [
+            f"{logfile}#1",
+            f"{logfile}#2",
+        ]
+        for (_, success, summary), example in zip(results, examples):
+            assert success
+            assert isinstance(summary, dict)
+            _, oom_result = batch_analyser.analyse_oom_text(example)
+            assert summary == batch_analyser.summarise_oom_result(oom_result)
+            assert len(pickle.dumps(summary)) * 20 < len(pickle.dumps(oom_result))
+
+        assert batch_analyser.analyse_and_summarise("no OOM") == (False, None)
+
+    @pytest.mark.parametrize(
+        "values, percentile, expected",
+        [
+            pytest.param(range(1, 1001), 50, 500, id="median"),
+            pytest.param(range(1, 1001), 99, 990, id="p99"),
+            pytest.param([0, 0, 0, 10], 50, 0, id="zeros"),
+        ],
+    )
+    def test_060_quantile_sketch(self, values, percentile, expected) -> None:
+        """Test the approximation of percentiles"""
+        sketch = batch_analyser.QuantileSketch(relative_error=0.01)
+        for value in values:
+            sketch.add(value)
+        assert sketch.percentile(percentile) == pytest.approx(expected, rel=0.02)
+
+    @pytest.mark.parametrize(
+        "example",
+        [
+            "example_archlinux_6_1_1",
+            "example_proxmox_cgroup_oom",
+            "example_rhel7",
+            "example_ubuntu2110",
+        ],
+    )
+    def test_070_binary_encoding(self, example) -> None:
+        """Test encoding and decoding analysis results"""
+        _, oom_result = batch_analyser.analyse_oom_text(
+            getattr(OOMAnalyser.OOMDisplay, example)
+        )
+        fh = io.BytesIO()
+        batch_analyser.write_oom_results(fh, [oom_result, oom_result])
+        fh.seek(0)
+        decoded = list(batch_analyser.read_oom_results(fh))
+        assert len(decoded) == 2
+
+        for attribute in [
+            "details",
+            "error_msg",
+            "kversion",
+            "mem_alloc_failure",
+            "mem_fragmented",
+            "oom_text",
+            "oom_type",
+            "system_swap_active",
+            "watermarks",
+        ]:
+            assert getattr(decoded[1], attribute) == getattr(
+                oom_result, attribute
+            ), f'Attribute "{attribute}" differs after decoding'
+        assert decoded[1].kconfig.name == oom_result.kconfig.name
+        assert batch_analyser.buddyinfo_to_dict(
+            decoded[1].buddyinfo
+        ) == batch_analyser.buddyinfo_to_dict(oom_result.buddyinfo)
+        assert batch_analyser.oom_result_to_dict(
+            decoded[1]
+        ) == batch_analyser.oom_result_to_dict(
+            oom_result
+        ), "Analysis result differs after decoding"
+
+        data = bytearray(batch_analyser.encode_oom_result(oom_result))
+        assert len(data) < len(
+            oom_result.oom_text
+        ), "Encoded result is larger than the OOM text"
+        data[4] = batch_analyser.ENCODING_VERSION + 1
+        with pytest.raises(ValueError, match="Unsupported encoding version"):
+            batch_analyser.decode_oom_result(bytes(data))
+
+    def test_080_parquet_export(self, tmp_path) -> None:
+        """Test exporting analysis results as Parquet files"""
+        convert = batch_analyser.ParquetExporter._convert
+        assert convert("killed_proc_total_rss_kb", "1024") == 1024
+        assert convert("killed_proc_total_rss_kb", "n/a") is None
+        assert convert("killed_proc_total_rss_kb", [1024]) is None
+        assert convert("killed_proc_total_rss_kb", {"rss": 1024}) is None
+
+        parquet = pytest.importorskip("pyarrow.parquet")
+
+        examples = [
+            OOMAnalyser.OOMDisplay.example_rhel7,
+            OOMAnalyser.OOMDisplay.example_ubuntu2110,
+            OOMAnalyser.OOMDisplay.example_archlinux_6_1_1,
+        ]
+        with batch_analyser.ParquetExporter(
+            str(tmp_path), row_group_size=2
+        ) as exporter:
+            for index, example in enumerate(examples):
+                _, oom_result = batch_analyser.analyse_oom_text(example)
+                assert exporter.add(oom_result, f"example{index}") == index
+
+        ooms = parquet.ParquetFile(str(tmp_path / "ooms.parquet"))
+        assert ooms.metadata.num_rows == 3
+        assert ooms.metadata.num_row_groups == 2
+        rows = ooms.read().to_pylist()
+        assert rows[0]["kernel_version"] == "3.10.0-514.6.1.el7.x86_64"
+        assert rows[0]["killed_proc_total_rss_kb"] == 20629004
+        assert rows[1]["source"] == "example1"
+
+        processes_file = parquet.ParquetFile(str(tmp_path / "processes.parquet"))
+        for index in range(processes_file.metadata.num_row_groups):
+            assert processes_file.metadata.row_group(index).num_rows <= 2
+        processes = processes_file.read().to_pylist()
+        mysqld = [p for p in processes if p["oom_id"] == 0 and p["pid"] == 6576]
+        assert len(mysqld) == 1
+        assert mysqld[0]["name"] == "mysqld"
+        assert mysqld[0]["pgtables_bytes"] is None
+
+    def test_090_cgroup_trie(self) -> None:
+        """Test the cgroup hierarchy of many cgroup OOMs"""
+        aggregator = batch_analyser.FleetAggregator()
+        example = OOMAnalyser.OOMDisplay.example_proxmox_cgroup_oom
+        for index, (path, usage_kb) in enumerate(
+            [
+                ("/kubepods/burstable/pod1/app", "31211520"),
+                ("/kubepods/burstable/pod1/sidecar", "15605760"),
+                ("/kubepods/besteffort/pod2/app", "31211520"),
+                ("/lxc/39004", "3121152"),
+            ]
+        ):
+            text = example.replace(
+                "Memory cgroup stats for /lxc/39004:",
+                f"Memory cgroup stats for {path}:",
+            ).replace("memory: usage 31211520kB", f"memory: usage {usage_kb}kB")
+            success, oom_result = batch_analyser.analyse_oom_text(text)
+            assert success
+            aggregator.add(batch_analyser.summarise_oom_result(oom_result, str(index)))
+        success, oom_result = batch_analyser.analyse_oom_text(
+            OOMAnalyser.OOMDisplay.example_rhel7
+        )
+        aggregator.add(batch_analyser.summarise_oom_result(oom_result, "kernel"))
+
+        trie = aggregator.cgroups
+        assert trie.count == 4
+        assert list(trie.to_dict()["children"]) == ["kubepods", "lxc"]
+        burstable = trie.find("/kubepods/burstable/")
+        assert burstable.count == 2
+        assert burstable.peak_usage_ratio == 1.0
+        assert burstable.peak_source == "0"
+        assert trie.find("/kubepods/burstable/pod1/sidecar").peak_usage_ratio == 0.5
+        assert trie.find("/lxc").peak_usage_ratio == 0.1
+        assert trie.find("/kubepods/guaranteed") is None
+
+        report = aggregator.report(cgroup_prefix="/kubepods", cgroup_depth=1)
+        assert report["cgroups"]["count"] == 3
+        assert report["cgroups"]["children"]["burstable"] == {
+            "count": 2,
+            "peak_usage_ratio": 1.0,
+            "peak_source": "0",
+        }
+        assert aggregator.report(cgroup_prefix="/unknown")["cgroups"] is None
+
+
+GFP_HEADER = """\
+/* Bit numbers of the plain GFP flags */
+enum {
+\t___GFP_DMA_BIT,
+\t___GFP_HIGHMEM_BIT,
+#ifdef CONFIG_LOCKDEP
+\t___GFP_NOLOCKDEP_BIT,
+#endif
+\t___GFP_RECLAIM_BIT = 10,
+\t___GFP_LAST_BIT
+};
+
+#define ___GFP_DMA\tBIT(___GFP_DMA_BIT)
+#define ___GFP_HIGHMEM\tBIT(___GFP_HIGHMEM_BIT)
+#ifdef CONFIG_LOCKDEP
+#define ___GFP_NOLOCKDEP\tBIT(___GFP_NOLOCKDEP_BIT)
+#else
+#define ___GFP_NOLOCKDEP\t0
+#endif
+#define __GFP_DMA\t((__force gfp_t)___GFP_DMA)
+#define __GFP_HIGHMEM\t((__force gfp_t)___GFP_HIGHMEM)
+#define GFP_BOTH\t(__GFP_DMA | \\
+\t\t\t __GFP_HIGHMEM)
+#define GFP_NOT_DMA\t(GFP_BOTH & ~__GFP_DMA)
+#define gfp_zone(flags) ((flags) & __GFP_DMA)
+"""
+"""Shortened GFP header file with the constructs of newer kernels"""
+
+
+@pytest.mark.python_only
+class TestExtractKernelDetails(BaseTests):
+    @pytest.mark.parametrize(
+        "expression, expected",
+        [
+            ("1 | 2 << 3", 17),
+            ("(1 | 2) << 3", 24),
+            ("1 << 2 + 1", 8),
+            ("6 - 2 - 1", 3),
+            ("1 | 2 & 3", 3),
+            ("0x5 ^ 0x3", 6),
+            ("0xff & ~0x0f", 0xF0),
+            ("0xff&~0x0f", 0xF0),
+            ("~0", -1),
+            ("010", 8),
+            ("0x100000UL >> 4", 0x10000),
+            ("BIT(3)", 8),
+            ("BIT(1 + 2) | 1", 9),
+            ("((__force gfp_t)0x20u)", 0x20),
+            ("(__force gfp_t)___GFP_IO | ___GFP_FS", 0xC0),
+        ],
+    )
+    def test_010_constant_expression(self, expression, expected) -> None:
+        """Test the evaluation of C constant expressions"""
+        symbols = {"___GFP_IO": 0x40, "___GFP_FS": 0x80}
+        value = extract_kernel_details.ConstantExpression(
+            expression, symbols.__getitem__
+        ).evaluate()
+        assert value == expected, f'Wrong value of "{expression}"'
+
+    @pytest.mark.parametrize(
+        "expression, msg",
+        [
+            ("1 +", "Unexpected end"),
+            ("", "Unexpected end"),
+            ("(1", r'Missing "\)"'),
+            ("1 2", "Unexpected token"),
+            ("1 $ 2", "Unexpected character"),
+            ("FOO(1)", r"Unsupported macro FOO\(\)"),
+            ("UNDEFINED | 1", "Undefined symbol UNDEFINED"),
+            ("LOOP_A", "Recursive definition of LOOP_A"),
+        ],
+    )
+    def test_011_constant_expression_errors(self, expression, msg) -> None:
+        """Test the errors of invalid C constant expressions"""
+        symbols = extract_kernel_details.SymbolTable(
+            {"LOOP_A": "LOOP_B", "LOOP_B": "LOOP_A | 1"}
+        )
+        with pytest.raises(extract_kernel_details.ExpressionError, match=msg):
+            extract_kernel_details.ConstantExpression(
+                expression, symbols.value
+            ).evaluate()
+
+    def test_020_extract_definitions(self) -> None:
+        """Test the extraction of macros and enum constants"""
+        definitions = extract_kernel_details.extract_definitions(GFP_HEADER)
+        # enum constants without a value are numbered automatically
+        assert definitions["___GFP_DMA_BIT"] == "0"
+        assert definitions["___GFP_HIGHMEM_BIT"] == "___GFP_DMA_BIT + 1"
+        assert definitions["___GFP_NOLOCKDEP_BIT"] == "___GFP_HIGHMEM_BIT + 1"
+        assert definitions["___GFP_RECLAIM_BIT"] == "10"
+        assert definitions["___GFP_LAST_BIT"] == "___GFP_RECLAIM_BIT + 1"
+        # the first definition of the #ifdef is used
+        assert definitions["___GFP_NOLOCKDEP"] == "BIT(___GFP_NOLOCKDEP_BIT)"
+        # continued lines are joined and function-like macros are skipped
+        assert definitions["GFP_BOTH"].split() == [
+            "(__GFP_DMA",
+            "|",
+            "__GFP_HIGHMEM)",
+        ]
+        assert "gfp_zone" not in definitions
+
+        symbols = extract_kernel_details.SymbolTable(definitions)
+        assert symbols.value("___GFP_LAST_BIT") == 11
+        assert symbols.value("___GFP_NOLOCKDEP") == 0x04
+
+    def test_030_extract_gfp_flags(self, caplog) -> None:
+        """Test the extraction and evaluation of GFP flags"""
+        flags = extract_kernel_details.extract_gfp_flags(GFP_HEADER)
+        assert flags["plain"] == {
+            "___GFP_DMA": "0x01",
+            "___GFP_HIGHMEM": "0x02",
+            "___GFP_NOLOCKDEP": "0x04",
+        }
+        assert flags["modifier"]["__GFP_DMA"] == '"___GFP_DMA"'
+        assert flags["useful"]["GFP_NOT_DMA"] == '"GFP_BOTH & ~__GFP_DMA"'
+        assert flags["values"]["GFP_BOTH"] == 0x03
+        assert flags["values"]["GFP_NOT_DMA"] == 0x02
+        assert "___GFP_DMA_BIT" not in flags["values"]
+
+        broken = GFP_HEADER + "#define GFP_BROKEN\t(__GFP_UNKNOWN | __GFP_DMA)\n"
+        with caplog.at_level(logging.ERROR):
+            flags = extract_kernel_details.extract_gfp_flags(broken)
+        assert (
+            "Failed to evaluate flag GFP_BROKEN: Undefined symbol __GFP_UNKNOWN"
+            in caplog.text
+        )
+        assert flags["useful"]["GFP_BROKEN"] == '"__GFP_UNKNOWN | __GFP_DMA"'
+        assert "GFP_BROKEN" not in flags["values"]
+
+    @pytest.mark.parametrize(
+        "fmt, expected",
+        [
+            pytest.param(
+                "total-vm:%lukB, anon-rss:%lukB\n",
+                r"^total-vm:(?P<total_vm_kb>\d+)kB, anon-rss:(?P<anon_rss_kb>\d+)kB\s*$",
+                id="lu",
+            ),
+            pytest.param("%pV", r"^(?P<field1>\S+)", id="pV"),
+            pytest.param(
+                "nodemask=%*pbl\n", r"^nodemask=\s*(?P<nodemask>\S+)\s*$", id="pbl"
+            ),
+            pytest.param(
+                "gfp_mask=%#x(%pGg), order=%d\n",
+                r"^gfp_mask=(?P<gfp_mask>0x[0-9a-f]+)\((?P<field2>\S+)\), "
+                r"order=(?P<order>-?\d+)\s*$",
+                id="alternate form",
+            ),
+            pytest.param(
+                "Killed process %d (%s) [%u%%]",
+                r"^Killed process (?P<field1>-?\d+) \((?P<field2>.+?)\) "
+                r"\[(?P<field3>\d+)%\]",
+                id="escaping",
+            ),
+            pytest.param(
+                "  %5d %8lu\n",
+                r"^\s+(?P<field1>-?\d+) \s*(?P<field2>\d+)\s*$",
+                id="width",
+            ),
+            pytest.param(
+                extract_kernel_details.KERN_CONT + " %lu*%lukB",
+                r" (?P<field1>\d+)\*(?P<field2>\d+)kB",
+                id="KERN_CONT",
+            ),
+        ],
+    )
+    def test_040_printk_format_to_regex(self, fmt, expected) -> None:
+        """Test the translation of printk formats into regex patterns"""
+        pattern = extract_kernel_details.printk_format_to_regex(fmt)
+        assert pattern == expected
+        re.compile(pattern)
+
+    def test_041_printk_format_to_regex_names(self) -> None:
+        """Test the translation of printk formats with explicit group names"""
+        pattern = extract_kernel_details.printk_format_to_regex(
+            "Killed process %d (%s) total-vm:%lukB\n",
+            names=["pid", "name"],
+            prefix="killed_proc_",
+        )
+        match = re.match(pattern, "Killed process 6576 (mysqld) total-vm:33914892kB")
+        assert match.groupdict() == {
+            "killed_proc_pid": "6576",
+            "killed_proc_name": "mysqld",
+            "killed_proc_total_vm_kb": "33914892",
+        }
+
+    @pytest.mark.parametrize(
+        "scheme, tags, expected_order, expected_names",
+        [
+            (
+                "upstream",
+                ["v5.10.1", "v5.10", "v5.9", "v6.1-rc1"],
+                ["v5.9", "v5.10", "v5.10.1"],
+                ["KernelConfig_5_9", "KernelConfig_5_10", "KernelConfig_5_10"],
+            ),
+            (
+                "rhel",
+                [
+                    "kernel-4.18.0-80.el8_0",
+                    "kernel-3.10.0-1160.2.1.el7",
+                    "kernel-3.10.0-1160.el7",
+                    "kernel-3.10.0-957.el7",
+                    "v3.10",
+                ],
+                [
+                    "kernel-3.10.0-957.el7",
+                    "kernel-3.10.0-1160.el7",
+                    "kernel-3.10.0-1160.2.1.el7",
+                    "kernel-4.18.0-80.el8_0",
+                ],
+                [
+                    "KernelConfig_3_10_EL7",
+                    "KernelConfig_3_10_EL7",
+                    "KernelConfig_3_10_EL7",
+                    "KernelConfig_4_18_EL8",
+                ],
+            ),
+            (
+                "uek",
+                ["v5.15.0-200.131.27", "v5.15.0-3.60.5.el8uek", "v5.4.17-2136.300.7"],
+                ["v5.4.17-2136.300.7", "v5.15.0-3.60.5.el8uek", "v5.15.0-200.131.27"],
+                [
+                    "KernelConfig_5_4_UEK",
+                    "KernelConfig_5_15_UEK",
+                    "KernelConfig_5_15_UEK",
+                ],
+            ),
+            (
+                "ubuntu",
+                [
+                    "Ubuntu-5.15.0-100.110",
+                    "Ubuntu-hwe-5.15-5.15.0-91.101",
+                    "Ubuntu-5.13.0-19.19",
+                    "kernel-3.10.0-1160.el7",
+                ],
+                [
+                    "Ubuntu-5.13.0-19.19",
+                    "Ubuntu-hwe-5.15-5.15.0-91.101",
+                    "Ubuntu-5.15.0-100.110",
+                ],
+                [
+                    "KernelConfig_5_13_GENERIC",
+                    "KernelConfig_5_15_GENERIC",
+                    "KernelConfig_5_15_GENERIC",
+                ],
+            ),
+        ],
+    )
+    def test_050_tag_schemes(
+        self, monkeypatch, scheme, tags, expected_order, expected_names
+    ) -> None:
+        """Test the parsing and ordering of upstream and vendor kernel tags"""
+        monkeypatch.setattr(
+            extract_kernel_details,
+            "tag_scheme",
+            extract_kernel_details.TAG_SCHEMES[scheme],
+        )
+        regex = extract_kernel_details.tag_scheme.regex
+        matching = [tag for tag in tags if regex.match(tag)]
+        order = sorted(
+            matching,
+            key=lambda tag: extract_kernel_details.tag_sort_key(regex.match(tag)),
+        )
+        assert order == expected_order
+
+        names = [
+            extract_kernel_details.config_name(
+                extract_kernel_details.tag_release(SimpleNamespace(name=tag))
+            )
+            for tag in order
+        ]
+        assert names == expected_names
+
+    def test_051_tag_release_suffix(self, monkeypatch) -> None:
+        """Test the release suffix of vendor kernels"""
+        monkeypatch.setattr(
+            extract_kernel_details,
+            "tag_scheme",
+            extract_kernel_details.TAG_SCHEMES["rhel"],
+        )
+        release = extract_kernel_details.tag_release(
+            SimpleNamespace(name="kernel-5.14.0-70.13.1.el9_0")
+        )
+        assert release == (5, 14, ".el9.")
+
+    def test_060_diff_gfp_flags(self) -> None:
+        """Test the comparison of the resolved GFP flags of two releases"""
+        # insert a new bit and remove a compound flag
+        newer = (
+            GFP_HEADER.replace(
+                "\t___GFP_DMA_BIT,\n", "\t___GFP_DMA_BIT,\n\t___GFP_MOVABLE_BIT,\n"
+            )
+            .replace(
+                "#define __GFP_DMA\t",
+                "#define ___GFP_MOVABLE\tBIT(___GFP_MOVABLE_BIT)\n#define __GFP_DMA\t",
+            )
+            .replace("#define GFP_NOT_DMA\t(GFP_BOTH & ~__GFP_DMA)\n", "")
+        )
+        old_flags = extract_kernel_details.extract_gfp_flags(GFP_HEADER)
+        new_flags = extract_kernel_details.extract_gfp_flags(newer)
+
+        diff = extract_kernel_details.diff_gfp_flags(old_flags, new_flags)
+        assert diff.added == {"___GFP_MOVABLE": 0x02}
+        assert diff.removed == {"GFP_NOT_DMA": 0x02}
+        assert diff.renumbered == {
+            "GFP_BOTH": (0x03, 0x05),
+            "__GFP_HIGHMEM": (0x02, 0x04),
+            "___GFP_HIGHMEM": (0x02, 0x04),
+            "___GFP_NOLOCKDEP": (0x04, 0x08),
+        }
+        report = extract_kernel_details.format_gfp_diff("v1", "v2", diff)
+        assert "  GFP_BOTH                         0x03 -> 0x05\n" in report
+
+        diff = extract_kernel_details.diff_gfp_flags(old_flags, old_flags)
+        assert not (diff.added or diff.removed or diff.renumbered)
+        assert "identical" in extract_kernel_details.format_gfp_diff("v1", "v1", diff)
+
 
 @pytest.mark.browser
 class TestBroswerArchLinux(BaseInBrowserTests):